@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+'''
+	Import time benchmark for mediameta.
+
+	Measures in fresh interpreters how long it takes to import the package
+	and to get to the classes needed for a particular format. Run it from
+	the repository root:
+
+		python3 benchmarks/import_time.py [repetitions]
+
+	Byte code is compiled once before measuring, so the numbers reflect an
+	installed package rather than the first ever run.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import os
+import sys
+import subprocess
+import compileall
+from statistics import median
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+SCENARIOS = [
+	('import mediameta', 'import mediameta'),
+	('VideoMetadata', 'import mediameta; mediameta.VideoMetadata'),
+	('ImageMetadata', 'import mediameta; mediameta.ImageMetadata'),
+	('ImageMetadata + interpreters', 'import mediameta; mediameta.ImageMetadata; mediameta.mediametadata._default_interpreter("FNumber")'),
+	('everything', 'import mediameta; [getattr(mediameta, n) for n in mediameta._lazy_names]')
+]
+
+TIMER = 'import time; t = time.perf_counter(); {0}; print(time.perf_counter() - t)'
+
+def measure(statement:str, repetitions:int) -> float:
+	env = dict(os.environ, PYTHONPATH=SRC)
+	env.pop('PYTHONDONTWRITEBYTECODE', None)
+	timings = []
+	for _ in range(repetitions):
+		out = subprocess.run([sys.executable, '-c', TIMER.format(statement)], env=env,
+			capture_output=True, text=True, check=True).stdout
+		timings.append(float(out))
+	return median(timings) * 1000
+
+if __name__ == '__main__':
+	repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+	compileall.compile_dir(os.path.join(SRC, 'mediameta'), quiet=1)
+
+	print('Median of {0} runs, ms'.format(repetitions))
+	for (title, statement) in SCENARIOS:
+		print('{0:<32}{1:8.2f}'.format(title, measure(statement, repetitions)))
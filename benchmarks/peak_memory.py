@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+'''
+	Peak memory regression check for mediameta.
+
+	Generates big sparse files whose metadata sits far from the start: a
+	TIFF with its IFDs at the end, a QuickTime movie with moov after a
+	multi-gigabyte mdat and a HEIC with a big meta box and its Exif item at
+	the end. Each file is opened in a fresh interpreter, which reports the
+	peak of Python allocations (tracemalloc) and the growth of its maximum
+	resident set size while the constructor runs. Run it from the
+	repository root:
+
+		python3 benchmarks/peak_memory.py [file size in GiB]
+
+	Budgets are tied to the bytes of metadata written into each file, not
+	to the size of the file, so a parser that reads a whole file or maps
+	and touches all of it goes over them. Exits with status 1 if any file
+	does. Needs a POSIX system and a file system with sparse files.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import os
+import sys
+import json
+import struct
+import tempfile
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Budgets are base + factor * bytes of metadata in the file. Python objects
+# are several times bigger than the bytes they are decoded from.
+TRACEMALLOC_BASE = 256 * 1024
+TRACEMALLOC_FACTOR = 8
+RSS_BASE = 16 * 1024 * 1024
+RSS_FACTOR = 8
+
+CHILD = '''
+import sys, json, resource, tracemalloc
+import mediameta
+cls = getattr(mediameta, sys.argv[1])
+def max_rss():
+	rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return rss if sys.platform == 'darwin' else rss * 1024
+rss = max_rss()
+tracemalloc.start()
+meta = cls(sys.argv[2])
+(_, peak) = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+print(json.dumps({'tags': len(list(meta.all())), 'peak': peak, 'rss': max_rss() - rss}))
+'''
+
+def ifd(entries:list, offset:int) -> bytes:
+	# A little endian IFD at offset in the file followed by the values that do
+	# not fit into the entries. entries are (tag, type, count, value bytes).
+	values_offset = offset + 2 + len(entries) * 12 + 4
+	table = struct.pack('<H', len(entries))
+	values = b''
+	for (tag, tag_type, count, value) in sorted(entries):
+		if len(value) <= 4:
+			table += struct.pack('<HHI', tag, tag_type, count) + value.ljust(4, b'\x00')
+		else:
+			table += struct.pack('<HHII', tag, tag_type, count, values_offset + len(values))
+			values += value + b'\x00' * (len(value) & 1)
+	return table + b'\x00\x00\x00\x00' + values
+
+def ascii(text:str) -> tuple:
+	value = text.encode('ascii') + b'\x00'
+	return (2, len(value), value)
+
+def long(*numbers) -> tuple:
+	return (4, len(numbers), struct.pack('<{0}I'.format(len(numbers)), *numbers))
+
+def tiff(file_name:str, file_size:int) -> int:
+	# IFD0 with 20000 strips and an EXIF IFD, both in the last bytes of the file
+	strips = 20000
+	exif = ifd([(0x9003, *ascii('2022:06:01 12:00:00'))], 0)
+	ifd0_entries = [
+		(0x0100, *long(8000)), (0x0101, *long(6000)),
+		(0x010F, *ascii('Dandelion')), (0x0110, *ascii('Sparse')),
+		(0x0111, *long(*range(8, 8 + strips))), (0x0117, *long(*([1] * strips))),
+		(0x0132, *ascii('2022:06:01 12:00:00')), (0x8769, *long(0))
+	]
+	tail_offset = file_size - len(ifd(ifd0_entries, 0)) - len(exif)
+	ifd0_entries[-1] = (0x8769, *long(tail_offset + len(ifd(ifd0_entries, 0))))
+	tail = ifd(ifd0_entries, tail_offset)
+	tail += ifd([(0x9003, *ascii('2022:06:01 12:00:00'))], tail_offset + len(tail))
+	header = b'II*\x00' + struct.pack('<I', tail_offset)
+	return write_sparse(file_name, file_size, header, tail)
+
+def box(box_type:bytes, data:bytes) -> bytes:
+	return struct.pack('>I', 8 + len(data)) + box_type + data
+
+def big_box_header(box_type:bytes, size:int) -> bytes:
+	# Header of a box with a 64-bit size
+	return struct.pack('>I', 1) + box_type + struct.pack('>Q', size)
+
+def mov(file_name:str, file_size:int) -> int:
+	# ftyp, a huge mdat, then moov with 1000 keys in its meta
+	keys = [('com.dandelion.key{0}'.format(i)).encode('ascii') for i in range(1000)]
+	keys[0] = b'com.apple.quicktime.creationdate'
+	values = [b'2022-06-01T12:00:00+0000'] + [b'value' * 4] * (len(keys) - 1)
+	keys_data = b'\x00' * 4 + struct.pack('>I', len(keys)) + b''.join(struct.pack('>I', 8 + len(k)) + b'mdta' + k for k in keys)
+	ilst_data = b''.join(struct.pack('>II', 24 + len(v), i + 1) + struct.pack('>I', 16 + len(v)) + b'data' + struct.pack('>II', 1, 0) + v
+		for (i, v) in enumerate(values))
+	meta = box(b'meta', box(b'hdlr', b'\x00' * 8 + b'mdta' + b'\x00' * 13) + box(b'keys', keys_data) + box(b'ilst', ilst_data))
+	moov = box(b'moov', box(b'mvhd', b'\x00' * 100) + meta)
+	header = box(b'ftyp', b'qt  ' + b'\x00' * 4 + b'qt  ')
+	mdat = big_box_header(b'mdat', file_size - len(header) - len(moov))
+	return write_sparse(file_name, file_size, header + mdat, moov)
+
+def heic(file_name:str, file_size:int) -> int:
+	# A meta box of 20000 items ahead of a huge mdat, the Exif item at the end of the file
+	items = 20000
+	exif = ifd([(0x010F, *ascii('Dandelion')), (0x0110, *ascii('Sparse')), (0x0132, *ascii('2022:06:01 12:00:00'))], 8)
+	exif_item = struct.pack('>I', 0) + b'II*\x00' + struct.pack('<I', 8) + exif
+	exif_offset = file_size - len(exif_item)
+	infe = [box(b'infe', b'\x02\x00\x00\x00' + struct.pack('>HH', 1, 0) + b'Exif\x00')]
+	infe += [box(b'infe', b'\x02\x00\x00\x00' + struct.pack('>HH', i, 0) + b'hvc1\x00') for i in range(2, items + 1)]
+	iinf = box(b'iinf', b'\x00' * 4 + struct.pack('>H', items) + b''.join(infe))
+	locations = [struct.pack('>HHHII', 1, 0, 1, exif_offset, len(exif_item))]
+	locations += [struct.pack('>HHHII', i, 0, 1, 4096 + i * 1024, 1024) for i in range(2, items + 1)]
+	iloc = box(b'iloc', b'\x00' * 4 + b'\x44\x00' + struct.pack('>H', items) + b''.join(locations))
+	meta = box(b'meta', b'\x00' * 4 + box(b'hdlr', b'\x00' * 8 + b'pict' + b'\x00' * 13) +
+		box(b'pitm', b'\x00' * 4 + struct.pack('>H', 2)) + iinf + iloc)
+	header = box(b'ftyp', b'heic' + b'\x00' * 4 + b'mif1heic') + meta
+	mdat = big_box_header(b'mdat', file_size - len(header))
+	return write_sparse(file_name, file_size, header + mdat, exif_item)
+
+def write_sparse(file_name:str, file_size:int, head:bytes, tail:bytes) -> int:
+	# Writes head at the start and tail at the end of a file with a hole in
+	# between. Returns how many bytes were written, the metadata of the file.
+	with open(file_name, 'wb') as f:
+		f.write(head)
+		f.seek(file_size - len(tail))
+		f.write(tail)
+	return len(head) + len(tail)
+
+SCENARIOS = [
+	('TIFF, IFDs at the end', 'ImageMetadata', '.tif', tiff),
+	('MOV, moov at the end', 'VideoMetadata', '.mov', mov),
+	('HEIC, big meta box', 'ImageMetadata', '.heic', heic)
+]
+
+def measure(class_name:str, file_name:str) -> dict:
+	env = dict(os.environ, PYTHONPATH=SRC)
+	out = subprocess.run([sys.executable, '-c', CHILD, class_name, file_name], env=env,
+		capture_output=True, text=True)
+	if out.returncode != 0:
+		return {'error': out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'exit status {0}'.format(out.returncode)}
+	return json.loads(out.stdout)
+
+if __name__ == '__main__':
+	file_size = int(float(sys.argv[1]) * 1024**3) if len(sys.argv) > 1 else 4 * 1024**3
+	failed = False
+
+	print('{0:<26}{1:>12}{2:>8}{3:>12}{4:>12}{5:>12}{6:>12}'.format('File', 'metadata, B', 'tags',
+		'peak, KiB', 'budget', 'RSS, KiB', 'budget'))
+	with tempfile.TemporaryDirectory() as directory:
+		for (title, class_name, extension, generate) in SCENARIOS:
+			file_name = os.path.join(directory, 'sparse' + extension)
+			metadata_size = generate(file_name, file_size)
+			result = measure(class_name, file_name)
+			os.remove(file_name)
+
+			if 'error' in result:
+				print('{0:<26}{1:>12}  FAILED: {2}'.format(title, metadata_size, result['error']))
+				failed = True
+				continue
+
+			peak_budget = TRACEMALLOC_BASE + TRACEMALLOC_FACTOR * metadata_size
+			rss_budget = RSS_BASE + RSS_FACTOR * metadata_size
+			over = result['tags'] == 0 or result['peak'] > peak_budget or result['rss'] > rss_budget
+			failed = failed or over
+			print('{0:<26}{1:>12}{2:>8}{3:>12}{4:>12}{5:>12}{6:>12}{7}'.format(title, metadata_size, result['tags'],
+				result['peak'] // 1024, peak_budget // 1024, result['rss'] // 1024, rss_budget // 1024,
+				'  OVER BUDGET' if over else ''))
+
+	sys.exit(1 if failed else 0)
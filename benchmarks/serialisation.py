@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+'''
+	Serialisation benchmark for mediameta.
+
+	Compares to_bytes() and from_bytes() with pickle on typical files it
+	generates: a camera JPEG with EXIF and GPS data, a TIFF and a QuickTime
+	movie, one object at a time and as a batch of many objects of the same
+	camera (dump_batch() and load_batch() against pickling the list). Run
+	it from the repository root:
+
+		python3 benchmarks/serialisation.py [batch size]
+
+	Reports the best of several runs in microseconds per object and the
+	size of a record against the size of a pickle.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import os
+import sys
+import struct
+import pickle
+import timeit
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import mediameta
+
+REPEAT = 20
+
+def ifd(entries:list, offset:int, next_ifd:int = 0) -> bytes:
+	# A little endian IFD at offset from the TIFF header followed by the values
+	# that do not fit into the entries. entries are (tag, type, count, value bytes).
+	values_offset = offset + 2 + len(entries) * 12 + 4
+	table = struct.pack('<H', len(entries))
+	values = b''
+	for (tag, tag_type, count, value) in sorted(entries):
+		if len(value) <= 4:
+			table += struct.pack('<HHI', tag, tag_type, count) + value.ljust(4, b'\x00')
+		else:
+			table += struct.pack('<HHII', tag, tag_type, count, values_offset + len(values))
+			values += value + b'\x00' * (len(value) & 1)
+	return table + struct.pack('<I', next_ifd) + values
+
+def ascii(text:str) -> tuple:
+	value = text.encode('ascii') + b'\x00'
+	return (2, len(value), value)
+
+def short(*numbers) -> tuple:
+	return (3, len(numbers), struct.pack('<{0}H'.format(len(numbers)), *numbers))
+
+def long(*numbers) -> tuple:
+	return (4, len(numbers), struct.pack('<{0}I'.format(len(numbers)), *numbers))
+
+def rational(*pairs) -> tuple:
+	return (5, len(pairs), b''.join(struct.pack('<II', *pair) for pair in pairs))
+
+def undefined(value:bytes) -> tuple:
+	return (7, len(value), value)
+
+def tiff_block() -> bytes:
+	# TIFF header, IFD0, EXIF and GPS IFDs of a typical camera
+	exif = [
+		(0x829A, *rational((1, 250))), (0x829D, *rational((28, 10))), (0x8822, *short(2)),
+		(0x8827, *short(200)), (0x9000, *undefined(b'0232')), (0x9003, *ascii('2022:06:01 12:00:00')),
+		(0x9004, *ascii('2022:06:01 12:00:00')), (0x9201, *rational((8, 1))), (0x9202, *rational((3, 1))),
+		(0x9204, *rational((0, 1))), (0x9207, *short(5)), (0x9209, *short(16)), (0x920A, *rational((50, 1))),
+		(0x9290, *ascii('123')), (0x9291, *ascii('123')), (0xA001, *short(1)), (0xA002, *long(6000)),
+		(0xA003, *long(4000)), (0xA402, *short(0)), (0xA403, *short(0)), (0xA405, *short(75)),
+		(0xA406, *short(0)), (0xA434, *ascii('50mm F1.8'))
+	]
+	gps = [
+		(0x0000, 1, 4, b'\x02\x03\x00\x00'), (0x0001, *ascii('N')), (0x0002, *rational((59, 1), (56, 1), (1234, 100))),
+		(0x0003, *ascii('E')), (0x0004, *rational((30, 1), (18, 1), (5678, 100))), (0x0006, *rational((1500, 100)))
+	]
+	ifd0 = [
+		(0x010F, *ascii('Dandelion')), (0x0110, *ascii('Benchmark')), (0x0112, *short(1)),
+		(0x011A, *rational((72, 1))), (0x011B, *rational((72, 1))), (0x0128, *short(2)),
+		(0x0131, *ascii('Firmware 1.0')), (0x0132, *ascii('2022:06:01 12:00:00')),
+		(0x8769, *long(0)), (0x8825, *long(0))
+	]
+	ifd0_length = len(ifd(ifd0, 8))
+	exif_length = len(ifd(exif, 8 + ifd0_length))
+	ifd0[-2] = (0x8769, *long(8 + ifd0_length))
+	ifd0[-1] = (0x8825, *long(8 + ifd0_length + exif_length))
+	return b'II*\x00' + struct.pack('<I', 8) + ifd(ifd0, 8) + ifd(exif, 8 + ifd0_length) + \
+		ifd(gps, 8 + ifd0_length + exif_length)
+
+def jpeg(file_name:str):
+	exif = b'Exif\x00\x00' + tiff_block()
+	with open(file_name, 'wb') as f:
+		f.write(b'\xFF\xD8\xFF\xE1' + struct.pack('>H', 2 + len(exif)) + exif + b'\xFF\xD9')
+
+def tiff(file_name:str):
+	with open(file_name, 'wb') as f:
+		f.write(tiff_block())
+
+def box(box_type:bytes, data:bytes) -> bytes:
+	return struct.pack('>I', 8 + len(data)) + box_type + data
+
+def mov(file_name:str):
+	keys = [b'com.apple.quicktime.make', b'com.apple.quicktime.model', b'com.apple.quicktime.creationdate',
+		b'com.apple.quicktime.location.ISO6709']
+	values = [b'Dandelion', b'Benchmark', b'2022-06-01T12:00:00+0000', b'+59.9368+030.3158+015.000/']
+	keys_data = b'\x00' * 4 + struct.pack('>I', len(keys)) + b''.join(struct.pack('>I', 8 + len(k)) + b'mdta' + k for k in keys)
+	ilst_data = b''.join(struct.pack('>II', 24 + len(v), i + 1) + struct.pack('>I', 16 + len(v)) + b'data' + struct.pack('>II', 1, 0) + v
+		for (i, v) in enumerate(values))
+	meta = box(b'meta', box(b'hdlr', b'\x00' * 8 + b'mdta' + b'\x00' * 13) + box(b'keys', keys_data) + box(b'ilst', ilst_data))
+	with open(file_name, 'wb') as f:
+		f.write(box(b'ftyp', b'qt  ' + b'\x00' * 4 + b'qt  ') + box(b'moov', box(b'mvhd', b'\x00' * 100) + meta))
+
+SCENARIOS = [
+	('JPEG, EXIF and GPS', '.jpg', jpeg),
+	('TIFF', '.tif', tiff),
+	('MOV', '.mov', mov)
+]
+
+def best(statement, number:int) -> float:
+	# Microseconds per call, the best of REPEAT runs
+	return min(timeit.repeat(statement, number=number, repeat=REPEAT)) / number * 1e6
+
+if __name__ == '__main__':
+	batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+	print('Best of {0} runs, us per object'.format(REPEAT))
+	print('{0:<26}{1:>10}{2:>10}{3:>12}{4:>10}{5:>10}{6:>10}'.format('File', 'to_bytes', 'dumps',
+		'from_bytes', 'loads', 'record, B', 'pickle, B'))
+	with tempfile.TemporaryDirectory() as directory:
+		for (title, extension, generate) in SCENARIOS:
+			file_name = os.path.join(directory, 'sample' + extension)
+			generate(file_name)
+			meta = mediameta.open(file_name)
+			record = meta.to_bytes()
+			pickled = pickle.dumps(meta)
+
+			print('{0:<26}{1:>10.2f}{2:>10.2f}{3:>12.2f}{4:>10.2f}{5:>10}{6:>10}'.format(title,
+				best(meta.to_bytes, 1000), best(lambda: pickle.dumps(meta), 1000),
+				best(lambda: mediameta.MediaMetadata.from_bytes(record), 1000), best(lambda: pickle.loads(pickled), 1000),
+				len(record), len(pickled)))
+
+			items = [mediameta.open(file_name) for _ in range(batch_size)]
+			batch = mediameta.dump_batch(items)
+			pickled = pickle.dumps(items)
+			print('{0:<26}{1:>10.2f}{2:>10.2f}{3:>12.2f}{4:>10.2f}{5:>10}{6:>10}'.format('  batch of {0}'.format(batch_size),
+				best(lambda: mediameta.dump_batch(items), 1) / batch_size, best(lambda: pickle.dumps(items), 1) / batch_size,
+				best(lambda: mediameta.load_batch(batch), 1) / batch_size, best(lambda: pickle.loads(pickled), 1) / batch_size,
+				len(batch) // batch_size, len(pickled) // batch_size))
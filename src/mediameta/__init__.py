@@ -18,18 +18,97 @@
 	SPDX-License-Identifier: MIT
 '''
 
-from .tags import _TiffTags
-from .tags import _ExifTags
-from .tags import _GPSTags
-
+# The base class, the exceptions and the helper functions are light and
+# always needed, so they are imported right away.
 from .mediametadata import UnsupportedMediaFile
+from .mediametadata import ParsingBudgetExceeded
 from .mediametadata import MediaMetadata
+from .mediametadata import BlobReference
 from .mediametadata import str_to_rational
 from .mediametadata import format_rational
 from .mediametadata import GPS_link
+from .mediametadata import dump_batch
+from .mediametadata import dump_batch_into
+from .mediametadata import load_batch
+from .mediametadata import interpretation_cache_info
+from .mediametadata import set_interpretation_cache_size
+from .mediametadata import clear_interpretation_cache
+from .iohints import prefetch
+from .iohints import prefetched
+from .iohints import physical_order
+
+# Everything else is imported on first access, so that a short-lived process
+# only pays for the formats and features it actually uses. Reading a date from
+# a MOV file, for instance, never loads the TIFF/EXIF tag tables.
+_lazy_names = {
+	'_TiffTags': 'tags',
+	'_ExifTags': 'tags',
+	'_GPSTags': 'tags',
+
+	'ImageMetadata': 'imagemetadata',
+
+	'VideoMetadata': 'videometadata',
+
+	'GeoIndex': 'geoindex',
+	'GPS_coordinates': 'geoindex',
+	'ISO6709_to_decimal': 'geoindex',
+	'DMS_to_decimal': 'geoindex',
+
+	'TimeIndex': 'timeindex',
+	'capture_timestamp': 'timeindex',
+	'EXIF_to_epoch': 'timeindex',
+	'ISO8601_to_epoch': 'timeindex',
+
+	'XMPReader': 'xmp',
+	'parse_xmp': 'xmp',
+
+	'ImageResources': 'iptc',
+	'IPTCIndex': 'iptc',
+	'ICCProfile': 'icc',
+	'MPImage': 'mpf',
+
+	'open': 'mediatype',
+	'sniff': 'mediatype',
+
+	'metadata_digest': 'duplicates',
+	'fingerprint': 'duplicates',
+	'find_duplicates': 'duplicates',
+
+	'content_identifier': 'livephotos',
+	'burst_uuid': 'livephotos',
+	'pair_live_photos': 'livephotos',
+	'group_bursts': 'livephotos',
+
+	'archive_members': 'archives',
+	'read_member': 'archives',
+	'scan_archive': 'archives',
+
+	'ShardQueue': 'shards',
+	'SQLiteShardQueue': 'shards',
+	'enqueue': 'shards',
+	'scan_shards': 'shards',
+	'load_shards': 'shards'
+}
+
+# Names imported right away and names imported on first access alike. open()
+# is left out, a star import must not hide the builtin, use mediameta.open().
+__all__ = [
+	'UnsupportedMediaFile', 'ParsingBudgetExceeded', 'MediaMetadata', 'BlobReference',
+	'str_to_rational', 'format_rational', 'GPS_link',
+	'dump_batch', 'dump_batch_into', 'load_batch',
+	'interpretation_cache_info', 'set_interpretation_cache_size', 'clear_interpretation_cache',
+	'prefetch', 'prefetched', 'physical_order'
+] + [name for name in _lazy_names if name != 'open']
 
-from .imagemetadata import ImageMetadata
+def __getattr__(name:str):
+	if name not in _lazy_names:
+		raise AttributeError("module '" + __name__ + "' has no attribute '" + name + "'")
+	from importlib import import_module
+	value = getattr(import_module('.' + _lazy_names[name], __name__), name)
+	globals()[name] = value  # next time it is found without calling __getattr__
+	return value
 
-from .videometadata import VideoMetadata
+def __dir__():
+	return sorted(list(globals().keys()) + list(_lazy_names.keys()))
 
 __version__ = '0.2.0'
@@ -0,0 +1,232 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+import os
+import io
+import mmap
+import tarfile
+import zipfile
+from struct import unpack
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
+
+from .mediametadata import UnsupportedMediaFile
+from .mediametadata import MediaMetadata
+from .mediatype import _HEADER_SIZE
+from .mediatype import _from_header
+
+# Compressed members cannot be seeked in, this much of their start is
+# decompressed and parsed. Metadata further in is not found.
+_PREFIX_SIZE = 1024 * 1024
+
+# ZIP local file header: signature, version, flags, compression, time, date,
+# CRC, sizes, file name length, extra field length
+_ZIP_LOCAL_HEADER = '<IHHHHHIIIHH'
+_ZIP_LOCAL_HEADER_SIZE = 30
+_ZIP_LOCAL_SIGNATURE = 0x04034B50
+
+# Member names are appended to the archive name after this separator
+_MEMBER_SEPARATOR = '!'
+
+class _RegionFile:
+	# A region of a file, offset to offset + size, seen as a file of its own
+
+	def __init__(self, file_name:str, offset:int, size:int):
+		self._f = open(file_name, 'rb')
+		self._offset = offset
+		self._size = size
+		self._pos = 0
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def close(self):
+		self._f.close()
+
+	def tell(self) -> int:
+		return self._pos
+
+	def seek(self, offset:int, whence:int = os.SEEK_SET) -> int:
+		match whence:
+			case os.SEEK_CUR:
+				offset += self._pos
+			case os.SEEK_END:
+				offset += self._size
+		self._pos = max(0, offset)
+		return self._pos
+
+	def read(self, size:int = -1) -> bytes:
+		left = max(0, self._size - self._pos)
+		size = left if size < 0 else min(size, left)
+		self._f.seek(self._offset + self._pos)
+		data = self._f.read(size)
+		self._pos += len(data)
+		return data
+
+	pass
+
+class _MemberSource:
+	# Where the bytes of an archive member are: a region of the archive file
+	# for members stored as they are, or the decompressed start of the member
+
+	def __init__(self, archive_name:str, offset:int, size:int, prefix:bytes = None):
+		self.archive_name = archive_name
+		self.offset = offset
+		self.size = size
+		self.prefix = prefix
+
+	def open(self):
+		if self.prefix is not None:
+			return io.BytesIO(self.prefix)
+		return _RegionFile(self.archive_name, self.offset, self.size)
+
+	def map(self) -> tuple:
+		if self.prefix is not None:
+			return (None, self.prefix)
+		# Mappings start at a multiple of the allocation granularity
+		start = self.offset - self.offset % mmap.ALLOCATIONGRANULARITY
+		with open(self.archive_name, 'rb') as f:
+			mapping = mmap.mmap(f.fileno(), self.offset - start + self.size, access=mmap.ACCESS_READ, offset=start)
+		return (mapping, memoryview(mapping)[self.offset - start:])
+
+	pass
+
+def _zip_members(archive_name:str, prefix_size:int):
+	with zipfile.ZipFile(archive_name) as archive, open(archive_name, 'rb') as f:
+		for info in archive.infolist():
+			if info.is_dir() or info.flag_bits & 0x1:   # encrypted
+				continue
+			if info.compress_type == zipfile.ZIP_STORED:
+				# The data follows the local header, whose name and extra field may
+				# differ in length from those in the central directory
+				f.seek(info.header_offset)
+				local = f.read(_ZIP_LOCAL_HEADER_SIZE)
+				if len(local) < _ZIP_LOCAL_HEADER_SIZE:
+					continue
+				fields = unpack(_ZIP_LOCAL_HEADER, local)
+				if fields[0] != _ZIP_LOCAL_SIGNATURE:
+					continue
+				offset = info.header_offset + _ZIP_LOCAL_HEADER_SIZE + fields[9] + fields[10]
+				yield (info.filename, _MemberSource(archive_name, offset, info.file_size))
+			else:
+				try:
+					with archive.open(info) as member:
+						prefix = member.read(prefix_size)
+				except (zipfile.BadZipFile, NotImplementedError, OSError):
+					continue
+				yield (info.filename, _MemberSource(archive_name, 0, len(prefix), prefix))
+
+def _tar_members(archive_name:str, prefix_size:int):
+	# Members of an uncompressed TAR are regions of it, a compressed one
+	# is read as a stream and only the start of every member is kept
+	try:
+		archive = tarfile.open(archive_name, 'r:')
+	except tarfile.ReadError:
+		archive = None
+
+	if archive is not None:
+		with archive:
+			for info in archive:
+				if info.isfile() and not info.issparse():
+					yield (info.name, _MemberSource(archive_name, info.offset_data, info.size))
+		return
+
+	with tarfile.open(archive_name, 'r|*') as archive:
+		for info in archive:
+			if info.isfile():
+				prefix = archive.extractfile(info).read(prefix_size)
+				yield (info.name, _MemberSource(archive_name, 0, len(prefix), prefix))
+
+def archive_members(archive_name:str, prefix_size:int = _PREFIX_SIZE):
+	'''
+		Yields (member name, source) for the files in a ZIP or TAR archive.
+		Nothing is extracted: members stored uncompressed are read in place,
+		of compressed ones only the first prefix_size bytes are decompressed
+		into memory. Pass a source to read_member() to get its metadata.
+	'''
+	archive_name = os.fspath(archive_name)
+	if zipfile.is_zipfile(archive_name):
+		yield from _zip_members(archive_name, prefix_size)
+	else:
+		yield from _tar_members(archive_name, prefix_size)
+
+def read_member(archive_name:str, member_name:str, source, encoding:str = 'utf_8', read_budget:int = None,
+	time_budget:float = None, **options) -> MediaMetadata:
+	'''
+		Returns ImageMetadata or VideoMetadata of an archive member, telling
+		its format by its content like open(). The object is named
+		'archive!member'. Raises UnsupportedMediaFile if the format is not known.
+	'''
+	with source.open() as f:
+		header = f.read(_HEADER_SIZE)
+	# The source stays with the object, xmp(), iptc(), blob() and the like read
+	# the member through it later. For compressed members it holds their prefix.
+	return _from_header(os.fspath(archive_name) + _MEMBER_SEPARATOR + member_name, header, encoding,
+		read_budget, time_budget, source=source, **options)
+
+def _read_member_record(archive_name:str, member_name:str, source, options:dict) -> (bytes | None):
+	# Runs in a worker process, the result comes back as a to_bytes() record
+	try:
+		return read_member(archive_name, member_name, source, **options).to_bytes()
+	except (UnsupportedMediaFile, OSError):
+		return None
+
+def scan_archive(archive_name:str, workers:int = None, prefix_size:int = _PREFIX_SIZE, **options):
+	'''
+		Yields (member name, metadata or None) for every file in a ZIP or TAR
+		archive without extracting anything to disk. Members are parsed by a
+		pool of workers processes, os.cpu_count() of them by default, results
+		come in the order they are ready. workers = 0 parses them one by one
+		in this process. options are passed on to the constructors.
+	'''
+	members = archive_members(archive_name, prefix_size)
+
+	if workers == 0:
+		for (member_name, source) in members:
+			try:
+				yield (member_name, read_member(archive_name, member_name, source, **options))
+			except (UnsupportedMediaFile, OSError):
+				yield (member_name, None)
+		return
+
+	# Only a few members are in flight at a time, compressed ones carry their bytes
+	limit = 2 * (workers if workers is not None else os.cpu_count() or 1)
+	with ProcessPoolExecutor(workers) as pool:
+		pending = {}
+		for (member_name, source) in members:
+			pending[pool.submit(_read_member_record, archive_name, member_name, source, options)] = (member_name, source)
+			if len(pending) >= limit:
+				(done, _) = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					yield _member_result(*pending.pop(future), future.result())
+		for future in list(pending):
+			yield _member_result(*pending.pop(future), future.result())
+
+def _member_result(member_name:str, source:_MemberSource, record:(bytes | None)) -> tuple:
+	# The record keeps where the rest of the metadata is in the member, the
+	# source it is read through stays in this process
+	if record is None:
+		return (member_name, None)
+	meta = MediaMetadata.from_bytes(record)
+	meta._source = source
+	return (member_name, meta)
@@ -17,35 +17,36 @@
 
 	SPDX-License-Identifier: MIT
 '''
-from typing import Literal
 from struct import unpack_from
 
-def uint_32(byte_array:bytes, start_index:int, byte_order:Literal['little','big']) -> int:
+# byte_order is either 'little' or 'big' in the functions below
+
+def uint_32(byte_array:bytes, start_index:int, byte_order:str) -> int:
 	format = '<' if byte_order == 'little' else '>'
 	format += 'I'
 	return unpack_from(format, buffer=byte_array, offset=start_index)[0]
 
-def uint_16(byte_array:bytes, start_index:int, byte_order:Literal['little','big']) -> int:
+def uint_16(byte_array:bytes, start_index:int, byte_order:str) -> int:
 	format = '<' if byte_order == 'little' else '>'
 	format += 'H'
 	return unpack_from(format, buffer=byte_array, offset=start_index)[0]
 
-def uint_8(byte_array:bytes, start_index:int, byte_order:Literal['little','big']) -> int:
+def uint_8(byte_array:bytes, start_index:int, byte_order:str) -> int:
 	format = '<' if byte_order == 'little' else '>'
 	format += 'B'
 	return unpack_from(format, buffer=byte_array, offset=start_index)[0]
 
-def sint_32(byte_array:bytes, start_index:int, byte_order:Literal['little','big']) -> int:
+def sint_32(byte_array:bytes, start_index:int, byte_order:str) -> int:
 	format = '<' if byte_order == 'little' else '>'
 	format += 'i'
 	return unpack_from(format, buffer=byte_array, offset=start_index)[0]
 
-def sint_16(byte_array:bytes, start_index:int, byte_order:Literal['little','big']) -> int:
+def sint_16(byte_array:bytes, start_index:int, byte_order:str) -> int:
 	format = '<' if byte_order == 'little' else '>'
 	format += 'h'
 	return unpack_from(format, buffer=byte_array, offset=start_index)[0]
 
-def sint_8(byte_array:bytes, start_index:int, byte_order:Literal['little','big']) -> int:
+def sint_8(byte_array:bytes, start_index:int, byte_order:str) -> int:
 	format = '<' if byte_order == 'little' else '>'
 	format += 'b'
 	return unpack_from(format, buffer=byte_array, offset=start_index)[0]
@@ -0,0 +1,101 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+from hashlib import blake2b
+
+from .mediametadata import MediaMetadata
+from .mediametadata import BlobReference
+
+def metadata_digest(meta:MediaMetadata) -> bytes:
+	'''
+		Returns a 16 byte digest of the metadata of a file. For images with
+		an EXIF block (JPEG, HEIF, PNG, WebP, JPEG XL) it is the digest of the
+		block as read from the file, taken while the file was parsed. Files that
+		are exact copies of each other have the same digest. For other files it
+		is a digest of the raw tag values.
+	'''
+	if meta._digest is not None:
+		return meta._digest
+
+	# MakerNote tags are left out, they are only there if someone asked for them
+	h = blake2b(digest_size=16)
+	for (key, values) in meta._tags.items():
+		if isinstance(key, int) and key >> 16 > 1:
+			continue
+		h.update(str(key).encode('utf_8') + b'\x00')
+		for value in values:
+			if isinstance(value, (bytes, bytearray, memoryview)):
+				h.update(value)
+			elif isinstance(value, BlobReference):
+				h.update(repr(value).encode('utf_8'))
+			else:
+				h.update(str(value).encode('utf_8', errors='surrogatepass'))
+			h.update(b'\x00')
+	return h.digest()
+
+def _first(meta:MediaMetadata, names:list):
+	for name in names:
+		values = meta._raw(name)
+		if len(values) > 0:
+			return values[0]
+	return None
+
+def _text(value) -> str:
+	return value.strip().casefold() if isinstance(value, str) else ''
+
+def fingerprint(meta:MediaMetadata) -> (tuple | None):
+	'''
+		Returns a key identifying the shot rather than the file: (Make, Model,
+		DateTimeOriginal, SubsecTimeOriginal, smaller dimension, larger
+		dimension, ImageUniqueID), normalised so that copies re-encoded or
+		rotated by other software still match. Returns None if the metadata
+		has neither a capture time nor a unique ID to tell shots apart.
+	'''
+	date_time = _text(_first(meta, ['DateTimeOriginal', 'com.apple.quicktime.creationdate']))
+	unique_id = _text(_first(meta, ['ImageUniqueID']))
+	if date_time == '' and unique_id == '':
+		return None
+
+	subsec = _text(_first(meta, ['SubsecTimeOriginal'])).rstrip('0')
+	make = _text(_first(meta, ['Make', 'com.apple.quicktime.make']))
+	model = _text(_first(meta, ['Model', 'com.apple.quicktime.model']))
+
+	width = _first(meta, ['PixelXDimension', 'ImageWidth'])
+	height = _first(meta, ['PixelYDimension', 'ImageHeight'])
+	if isinstance(width, int) and isinstance(height, int):
+		(width, height) = (min(width, height), max(width, height))
+	else:
+		(width, height) = (0, 0)
+
+	return (make, model, date_time, subsec, width, height, unique_id)
+
+def find_duplicates(items, key = metadata_digest) -> list:
+	'''
+		Groups metadata objects by key, a function of one object, in a single
+		pass over items (a hash join of the batch with itself). Returns the
+		groups of two or more objects. With the default key groups are exact
+		copies, with fingerprint they are copies of the same shot. Objects whose
+		key is None are not grouped.
+	'''
+	groups = {}
+	for meta in items:
+		k = key(meta)
+		if k is not None:
+			groups.setdefault(k, []).append(meta)
+	return [group for group in groups.values() if len(group) > 1]
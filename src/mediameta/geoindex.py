@@ -0,0 +1,223 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+import re
+import heapq
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+from math import radians, sin, cos, asin, sqrt
+
+from .mediametadata import MediaMetadata
+from .mediametadata import str_to_rational
+from .packedindex import _PackedIndex
+
+_EARTH_RADIUS = 6371008.8 # mean Earth radius in metres
+
+# ISO 6709 as written by Apple devices: '+41.0668+029.0193+045.000/'.
+# Latitude and longitude may also come as ±DDMM.MMM or ±DDMMSS.SSS.
+_ISO6709 = re.compile(r'^([+-]\d+(?:\.\d*)?)([+-]\d+(?:\.\d*)?)')
+
+def _iso6709_component(s:str, degree_digits:int) -> float:
+	sign = -1.0 if s[0] == '-' else 1.0
+	int_part, _, frac_part = s[1:].partition('.')
+	frac = float('0.' + frac_part) if frac_part else 0.0
+	match len(int_part) - degree_digits:
+		case 0: # ±DD.DDDD
+			value = int(int_part) + frac
+		case 2: # ±DDMM.MMMM
+			value = int(int_part[:degree_digits]) + (int(int_part[degree_digits:]) + frac)/60
+		case 4: # ±DDMMSS.SSSS
+			value = int(int_part[:degree_digits]) + int(int_part[degree_digits:degree_digits+2])/60 + \
+				(int(int_part[degree_digits+2:]) + frac)/3600
+		case _:
+			raise ValueError
+	return sign * value
+
+def ISO6709_to_decimal(location:str) -> (tuple | None):
+	'''
+		Converts an ISO 6709 location string, e.g. '+41.0668+029.0193+045.000/',
+		to a (latitude, longitude) tuple of decimal degrees. Returns None if the
+		string cannot be understood.
+	'''
+	m = _ISO6709.match(location.strip())
+	if m is None:
+		return None
+	try:
+		return (_iso6709_component(m.group(1), 2), _iso6709_component(m.group(2), 3))
+	except ValueError:
+		return None
+
+def DMS_to_decimal(dms:list, ref:str) -> float:
+	'''
+		Converts a raw EXIF GPS coordinate, a list of three '_numerator_/_denominator_'
+		strings for degrees, minutes and seconds, to decimal degrees. ref is one of
+		'N', 'S', 'E' or 'W'.
+	'''
+	d, m, s = map(str_to_rational, dms[:3])
+	value = d + m/60 + s/3600
+	return -value if ref in ('S', 'W') else value
+
+def GPS_coordinates(meta:MediaMetadata) -> (tuple | None):
+	'''
+		Returns (latitude, longitude) in decimal degrees as recorded in the
+		metadata of an image or a video, or None if there is no location or
+		it cannot be decoded. Raw (not interpreted) values are used, so it does
+		not matter whether interpret() was called on meta.
+	'''
+	try:
+		lat_dms = meta._raw('GPSLatitude')
+		lng_dms = meta._raw('GPSLongitude')
+		location = meta._raw('com.apple.quicktime.location.ISO6709')
+		if len(lat_dms) > 0 and len(lng_dms) > 0:
+			lat_ref = meta._raw('GPSLatitudeRef')
+			lng_ref = meta._raw('GPSLongitudeRef')
+			lat = DMS_to_decimal(lat_dms, lat_ref[0] if len(lat_ref) > 0 else 'N')
+			lng = DMS_to_decimal(lng_dms, lng_ref[0] if len(lng_ref) > 0 else 'E')
+		elif len(location) > 0:
+			coord = ISO6709_to_decimal(location[0])
+			if coord is None:
+				return None
+			lat, lng = coord
+		else:
+			return None
+	except (ValueError, ZeroDivisionError, TypeError, IndexError, AttributeError):
+		return None
+
+	if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+		return None
+
+	return (lat, lng)
+
+def distance(lat1:float, lng1:float, lat2:float, lng2:float) -> float:
+	'''
+		Great-circle (haversine) distance in metres between two points
+		given in decimal degrees.
+	'''
+	phi1 = radians(lat1)
+	phi2 = radians(lat2)
+	h = sin((phi2 - phi1)/2)**2 + cos(phi1)*cos(phi2)*sin(radians(lng2 - lng1)/2)**2
+	return 2 * _EARTH_RADIUS * asin(min(1.0, sqrt(h)))
+
+class GeoIndex(_PackedIndex):
+	'''
+		Spatial index over the GPS locations of a batch of media files.
+
+		Points are kept in packed arrays sorted by latitude, so bounding box
+		queries bisect straight to the latitude band of interest and nearest
+		neighbour queries walk outwards from the query latitude until no closer
+		point can be found. The index can be saved to a file and loaded back
+		without extracting metadata again.
+	'''
+	# Serialisation layout: magic, version, number of points, then latitudes and
+	# longitudes as packed doubles, then file names as length-prefixed utf-8 strings.
+	_MAGIC = b'MMGI'
+	_COLUMNS = (('_lat', 'd'), ('_lng', 'd'))
+
+	def __init__(self):
+		self._lat = array('d')
+		self._lng = array('d')
+		self._names = []
+		self._sorted = True
+
+	def __len__(self):
+		return len(self._names)
+
+	def add(self, file_name:str, lat:float, lng:float):
+		self._lat.append(lat)
+		self._lng.append(lng)
+		self._names.append(file_name)
+		self._sorted = False
+
+	def add_metadata(self, meta:MediaMetadata) -> bool:
+		'''
+			Adds the location of meta to the index. Returns False if meta does not
+			carry a usable location.
+		'''
+		coord = GPS_coordinates(meta)
+		if coord is None:
+			return False
+		self.add(meta.file_name(), coord[0], coord[1])
+		return True
+
+	def build(self):
+		'''
+			Sorts the points by latitude. Queries call it implicitly, call it
+			explicitly to pay the sorting cost up front.
+		'''
+		if self._sorted:
+			return
+		order = sorted(range(len(self._names)), key=self._lat.__getitem__)
+		self._lat = array('d', (self._lat[i] for i in order))
+		self._lng = array('d', (self._lng[i] for i in order))
+		self._names = [self._names[i] for i in order]
+		self._sorted = True
+
+	def bounding_box(self, lat_min:float, lng_min:float, lat_max:float, lng_max:float) -> list:
+		'''
+			Returns a list of (file_name, lat, lng) tuples for the points inside
+			the box. A box crossing the antimeridian is given with lng_min > lng_max.
+		'''
+		self.build()
+		lo = bisect_left(self._lat, lat_min)
+		hi = bisect_right(self._lat, lat_max)
+		wraps = lng_min > lng_max
+		found = []
+		for i in range(lo, hi):
+			lng = self._lng[i]
+			if (lng_min <= lng or lng <= lng_max) if wraps else (lng_min <= lng <= lng_max):
+				found.append((self._names[i], self._lat[i], lng))
+		return found
+
+	def nearest(self, lat:float, lng:float, n:int = 1) -> list:
+		'''
+			Returns up to n (distance, file_name, lat, lng) tuples for the points
+			closest to (lat, lng), nearest first. Distances are in metres.
+		'''
+		self.build()
+		count = len(self._names)
+		if n <= 0 or count == 0:
+			return []
+
+		best = [] # max-heap of (-distance, index)
+		lo = bisect_left(self._lat, lat) - 1
+		hi = lo + 1
+		while lo >= 0 or hi < count:
+			# Take the side whose next latitude is closer to the query
+			if hi >= count or (lo >= 0 and lat - self._lat[lo] <= self._lat[hi] - lat):
+				i = lo
+				lo -= 1
+			else:
+				i = hi
+				hi += 1
+
+			# The latitude difference alone bounds the distance from below,
+			# and it only grows as we walk further out
+			if len(best) == n and radians(abs(self._lat[i] - lat)) * _EARTH_RADIUS > -best[0][0]:
+				break
+
+			d = distance(lat, lng, self._lat[i], self._lng[i])
+			if len(best) < n:
+				heapq.heappush(best, (-d, i))
+			elif d < -best[0][0]:
+				heapq.heapreplace(best, (-d, i))
+
+		return [(-d, self._names[i], self._lat[i], self._lng[i]) for (d, i) in sorted(best, reverse=True)]
+
+	pass
@@ -0,0 +1,142 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+from .dataroutines import uint_32
+
+_ICC_HEADER_SIZE = 128
+_ICC_SIGNATURE = b'acsp'
+
+_DeviceClasses = {
+	'scnr': 'Input',
+	'mntr': 'Display',
+	'prtr': 'Output',
+	'link': 'DeviceLink',
+	'spac': 'ColorSpace',
+	'abst': 'Abstract',
+	'nmcl': 'NamedColor'
+}
+
+_RenderingIntents = {
+	0: 'Perceptual',
+	1: 'Media-relative colorimetric',
+	2: 'Saturation',
+	3: 'ICC-absolute colorimetric'
+}
+
+class ICCProfile:
+	'''
+		Reader of the header and the tag table of an ICC colour profile.
+
+		Nothing is decoded up front. Header fields are read from the first 128
+		bytes when asked for, the tag table is indexed on first access to a
+		tag. tag() returns a tag's data as a memoryview into the profile
+		without copying it. Raises ValueError if data is not an ICC profile.
+	'''
+
+	def __init__(self, data:bytes):
+		self._data = memoryview(data)
+		self._tags = None   # signature -> (offset, length), indexed on first access
+		if len(self._data) < _ICC_HEADER_SIZE + 4 or bytes(self._data[36:40]) != _ICC_SIGNATURE:
+			raise ValueError('Not an ICC profile')
+
+	def __len__(self):
+		return len(self._data)
+
+	def data(self) -> memoryview:
+		return self._data
+
+	def __signature(self, offset:int) -> str:
+		return bytes(self._data[offset:offset+4]).decode('latin_1').strip()
+
+	def version(self) -> str:
+		# Major version, then minor and bug fix versions in the two nibbles of the next byte
+		return '{0}.{1}.{2}'.format(self._data[8], self._data[9] >> 4, self._data[9] & 0x0F)
+
+	def device_class(self) -> str:
+		signature = self.__signature(12)
+		return _DeviceClasses.get(signature, signature)
+
+	def color_space(self) -> str:
+		# 'RGB', 'GRAY', 'CMYK', 'Lab'...
+		return self.__signature(16)
+
+	def connection_space(self) -> str:
+		# 'XYZ' or 'Lab'
+		return self.__signature(20)
+
+	def rendering_intent(self) -> str:
+		intent = uint_32(self._data, 64, 'big') & 0xFFFF
+		return _RenderingIntents.get(intent, str(intent))
+
+	def creator(self) -> str:
+		return self.__signature(80)
+
+	def __index(self):
+		if self._tags is not None:
+			return
+		self._tags = {}
+		count = min(uint_32(self._data, _ICC_HEADER_SIZE, 'big'), (len(self._data) - _ICC_HEADER_SIZE - 4) // 12)
+		for i in range(count):
+			entry = _ICC_HEADER_SIZE + 4 + i * 12
+			offset = uint_32(self._data, entry + 4, 'big')
+			length = uint_32(self._data, entry + 8, 'big')
+			if offset + length <= len(self._data):
+				self._tags.setdefault(self.__signature(entry), (offset, length))
+
+	def tags(self) -> list:
+		self.__index()
+		return list(self._tags.keys())
+
+	def tag(self, signature:str) -> (memoryview | None):
+		self.__index()
+		if signature not in self._tags:
+			return None
+		offset, length = self._tags[signature]
+		return self._data[offset:offset+length]
+
+	def description(self) -> (str | None):
+		'''
+			The profile description ('desc' tag), e.g. 'Display P3' or 'sRGB IEC61966-2.1'.
+		'''
+		return self.text('desc')
+
+	def text(self, signature:str) -> (str | None):
+		'''
+			Decodes a text tag: textDescriptionType and textType of version 2
+			profiles, the first record of multiLocalizedUnicodeType of version 4.
+		'''
+		data = self.tag(signature)
+		if data is None or len(data) < 12:
+			return None
+		match bytes(data[0:4]):
+			case b'desc':
+				length = uint_32(data, 8, 'big')
+				return bytes(data[12:12+length]).split(b'\x00')[0].decode('latin_1')
+			case b'text':
+				return bytes(data[8:]).split(b'\x00')[0].decode('latin_1')
+			case b'mluc':
+				if uint_32(data, 8, 'big') == 0 or len(data) < 28:
+					return None
+				length = uint_32(data, 20, 'big')
+				offset = uint_32(data, 24, 'big')
+				return bytes(data[offset:offset+length]).decode('utf_16_be', errors='replace')
+			case _:
+				return None
+
+	pass
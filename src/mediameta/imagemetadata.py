@@ -18,150 +18,862 @@
 	SPDX-License-Identifier: MIT
 '''
 
-import os
+import mmap
+import zlib
+from struct import Struct
+from struct import pack
+from struct import unpack_from
+from struct import error as struct_error
 
 from .dataroutines import uint_32
 from .dataroutines import uint_16
 from .dataroutines import sint_32
 from .dataroutines import str_b
 
-from .tags import _TiffTags
-from .tags import _ExifTags
-from .tags import _GPSTags
+from .tags import _GPS_NAMESPACE
+from .tags import _MAKERNOTE_PREFIX
+from .tags import _MakerNoteNamespaces
+from .tags import _TagRegistry
+from .tags import _tag_name
+from .tags import _tag_keys
+
+from .isobmff import _file_boxes
+from .isobmff import _boxes
+from .isobmff import _item_info
+from .isobmff import _item_locations
 
 from .mediametadata import UnsupportedMediaFile
 from .mediametadata import MediaMetadata
+from .mediametadata import BlobReference
+from .mediametadata import _metadata_digest
+
+# Sizes in bytes of TIFF field types, see TIFF 6.0, Section 2
+_TypeSizes = {1:1, 2:1, 3:2, 4:4, 5:8, 6:1, 7:1, 8:2, 9:4, 10:8, 11:4, 12:8}
+
+# Tags pointing to other IFDs
+_EXIF_IFD_POINTER = 0x8769
+_GPS_IFD_POINTER = 0x8825
+_INTEROPERABILITY_IFD_POINTER = 0xA005
+_MAKERNOTE = 0x927C
+
+# 0x002A - TIFF, and all the RAW formats based on it that keep the TIFF magic number
+# (DNG, CR2, NEF, ARW). 0x4F52 ('RO') and 0x5352 ('RS') - Olympus ORF, 0x0055 - Panasonic RW2.
+# CR2 adds its own fields after the TIFF header, the first IFD just starts further on.
+_TiffMagicNumbers = [0x002A, 0x4F52, 0x5352, 0x0055]
+
+# The uuid box of CR3 files holding the CMT boxes
+_CANON_CMT_UUID = bytes.fromhex('85c0b687820f11e08111f4ce462b6a48')
+_CanonCMTBoxes = [b'CMT1', b'CMT2', b'CMT3', b'CMT4']
+
+# Sanity limits for values read from a file. No legitimate metadata comes close.
+_MAX_IFD_ENTRIES = 4096
+_MAX_TAG_VALUES = 65536
+_MAX_TAG_SIZE = 16 * 1024 * 1024
+
+# Binary values longer than this are blobs, see __blob()
+_MAX_INLINE_BLOB = 64
+
+# APPn segments of JPEG files recognised by their signatures
+_JPEGSegmentSignatures = [
+	(0xFFE1, b'Exif\x00\x00', 'Exif'),
+	(0xFFE1, b'http://ns.adobe.com/xap/1.0/\x00', 'XMP'),
+	(0xFFE1, b'http://ns.adobe.com/xmp/extension/\x00', 'ExtendedXMP'),
+	(0xFFE2, b'ICC_PROFILE\x00', 'ICC_PROFILE'),
+	(0xFFE2, b'MPF\x00', 'MPF'),
+	(0xFFED, b'Photoshop 3.0\x00', 'Photoshop')
+]
+_JPEGSegmentMarkers = set(marker for (marker, _, _) in _JPEGSegmentSignatures)
+_JPEG_SIGNATURE_LENGTH = max(len(signature) for (_, signature, _) in _JPEGSegmentSignatures)
+
+# The main XMP packet refers to its extension by this property
+_XMP_HAS_EXTENDED = 'xmpNote:HasExtendedXMP'
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_XMP_KEYWORD = b'XML:com.adobe.xmp\x00'
+_JXL_SIGNATURE = b'\x00\x00\x00\x0cJXL \r\n\x87\n'
+
+# State kept by to_bytes(): big endian, MakerNote decoded, MakerNote offset, offset and
+# length of the TIFF/EXIF data (-1 for none), number of IFD entries, number of segments.
+# Then the keys and the offsets:uint32 of the IFD entries, the offsets and the
+# lengths:uint64 of the segments and their kinds joined by NUL follow.
+_STATE_HEADER = Struct('<??qqQII')
+
+def _copied_blobs(values):
+	# Tag values with blobs held as memoryviews turned into bytes
+	if isinstance(values, memoryview):
+		return bytes(values)
+	if isinstance(values, list) and any(isinstance(value, memoryview) for value in values):
+		return [bytes(value) if isinstance(value, memoryview) else value for value in values]
+	return values
 
 class ImageMetadata(MediaMetadata):
 
-	def __init__(self, file_name:str, encoding:str = 'utf_8'):
-		super().__init__(file_name, encoding)
-
-		self._nonprintable_tags += [
-			'XMLPacket', 'MakerNote', 'UserComment', 
-			'ImageResources', 'ImageDescription',
-			'IPTCNAA', 'StripByteCounts', 'StripOffsets',
-			'InterColorProfile', 'JPEGTables', 'OECF',
-			'SpatialFrequencyResponse', 'CFAPattern',
-			'DeviceSettingDescription', 'ExifIFDPointer',
-			'GPSInfoIFDPointer', 'InteroperabilityIFDPointer'
-		]
-
-		match self._file_extension:
-			case '.JPG' | '.JPEG':
-				raw_meta_data = self.__find_meta_jpeg(file_name)
-			case '.HEIC':
-				raw_meta_data = self.__find_meta_heic(file_name)
-			case '.TIF' | '.TIFF':
-				raw_meta_data = self.__find_meta_tiff(file_name)
-			case _:
+	# Locations of metadata segments found in the file but not read, a list
+	# of (kind, offset, length) tuples. Empty if the format has no segments.
+	_segments = ()
+
+	# Indexes built on first access
+	_image_resources = None
+	_iptc = None
+	_icc_profile = None
+	_mp_images = None
+
+	# What decoding the MakerNote needs to know about the TIFF/EXIF data it came from
+	_byte_order = 'big'
+	_makernote_offset = None
+	_makernote_decoded = False
+
+	# Where the TIFF/EXIF data is in the file, (offset, length), and where the
+	# IFD entry of every tag read from it starts, {key: offset in the TIFF data}.
+	# update() patches the file through them.
+	_exif_location = None
+	_entry_offsets = {}
+
+	# Defaults for records restored by from_bytes(), which skips the constructor
+	__keep_blobs = True
+	__exif_offset = None
+	__blob_data = None
+	__mapping = None
+	__packed_entries = None
+
+	def __init__(self, file_name:str, encoding:str = 'utf_8', read_budget:int = None, time_budget:float = None, keep_blobs:bool = True,
+		file_type:str = None, header:bytes = None, source = None):
+		super().__init__(file_name, encoding, read_budget, time_budget, file_type, header, source)
+
+		self._segments = []
+		self._entry_offsets = {}
+
+		# Big binary values (MakerNote, InterColorProfile, XMLPacket...) come from
+		# the TIFF/EXIF data at __exif_offset in the file. They are kept as
+		# memoryviews over that data, or as references to the file if not kept.
+		self.__keep_blobs = keep_blobs
+		self.__exif_offset = None
+		self.__blob_data = None
+		self.__mapping = None
+
+		raw_meta_data = None
+		try:
+			match self._file_extension:
+				case '.JPG' | '.JPEG':
+					raw_meta_data = self.__find_meta_jpeg(file_name)
+				case '.HEIC' | '.HEIF' | '.AVIF':
+					raw_meta_data = self.__find_meta_heif(file_name)
+				case '.CR3':
+					raw_meta_data = self.__find_meta_cr3(file_name)
+				case '.TIF' | '.TIFF' | '.DNG' | '.CR2' | '.NEF' | '.ARW' | '.ORF' | '.RW2':
+					raw_meta_data = self.__find_meta_tiff(file_name)
+				case '.PNG':
+					raw_meta_data = self.__find_meta_png(file_name)
+				case '.WEBP':
+					raw_meta_data = self.__find_meta_webp(file_name)
+				case '.JXL':
+					raw_meta_data = self.__find_meta_jxl(file_name)
+				case _:
+					raise UnsupportedMediaFile
+			
+			if raw_meta_data is None:
 				raise UnsupportedMediaFile
-		
-		if raw_meta_data is None:
-			raise UnsupportedMediaFile
-		
-		(tiff_tags, exif_tags, gps_tags, inter_tags) = self.__parse_meta_data(raw_meta_data)
+			
+			if isinstance(raw_meta_data, dict):
+				(tiff_tags, exif_tags, gps_tags, inter_tags) = self.__parse_cmt_boxes(raw_meta_data)
+			else:
+				(tiff_tags, exif_tags, gps_tags, inter_tags) = self.__parse_meta_data(raw_meta_data)
+				if self.__exif_offset is not None:
+					self._exif_location = (self.__exif_offset, len(raw_meta_data))
+		except (struct_error, IndexError, ValueError) as e:
+			# Whatever the bounds checks missed, a broken file is just not supported
+			raise UnsupportedMediaFile from e
+		finally:
+			self.__blob_data = None
+			if self.__mapping is not None:
+				if isinstance(raw_meta_data, memoryview):
+					raw_meta_data.release()
+				self.__mapping.close()
+				self.__mapping = None
+			self._parsed()
 
 		self._tags = tiff_tags | exif_tags | gps_tags | inter_tags
 
+	def __getstate__(self):
+		# Pickling cannot take memoryviews. Blobs are copied to bytes, and the
+		# indexes built over them on first access are left to be built again.
+		state = self.__dict__.copy()
+		for name in ('_tags', '_interpreted_tags'):
+			state[name] = {key:_copied_blobs(values) for (key, values) in state[name].items()}
+		for name in ('_image_resources', '_iptc', '_icc_profile'):
+			state.pop(name, None)
+		return state
+
+	def _state_to_bytes(self) -> bytes:
+		# Where the unread segments, the TIFF/EXIF data and its IFD entries are, so
+		# that a restored object reads XMP, ICC profiles, MakerNotes and the like
+		# and updates the file as the parsed one does
+		entry_offsets = self._ifd_entries()
+		entry_count = len(entry_offsets)
+		(exif_offset, exif_length) = self._exif_location if self._exif_location is not None else (-1, 0)
+		state = _STATE_HEADER.pack(self._byte_order == 'big', self._makernote_decoded,
+			self._makernote_offset if self._makernote_offset is not None else -1, exif_offset, exif_length,
+			entry_count, len(self._segments))
+		if entry_count > 0:
+			state += pack('<%dI' % entry_count, *entry_offsets) + pack('<%dI' % entry_count, *entry_offsets.values())
+		if len(self._segments) > 0:
+			(kinds, offsets, lengths) = zip(*self._segments)
+			state += pack('<%dQ' % len(offsets), *offsets) + pack('<%dQ' % len(lengths), *lengths) + '\x00'.join(kinds).encode('ascii')
+		return state
+
+	def _state_from_bytes(self, data:bytes):
+		(big_endian, self._makernote_decoded, makernote_offset, exif_offset, exif_length,
+			entry_count, segment_count) = _STATE_HEADER.unpack_from(data, 0)
+		self._byte_order = 'big' if big_endian else 'little'
+		self._makernote_offset = makernote_offset if makernote_offset >= 0 else None
+		self._exif_location = (exif_offset, exif_length) if exif_offset >= 0 else None
+
+		offset = _STATE_HEADER.size
+		# Only update() needs the IFD entries, they are unpacked by _ifd_entries()
+		self.__packed_entries = bytes(data[offset:offset+8*entry_count]) if entry_count > 0 else None
+		offset += 8 * entry_count
+		self._segments = []
+		if segment_count > 0:
+			offsets = unpack_from('<%dQ' % segment_count, data, offset)
+			lengths = unpack_from('<%dQ' % segment_count, data, offset + 8 * segment_count)
+			kinds = str(data[offset+16*segment_count:], 'ascii').split('\x00')
+			if len(kinds) != segment_count:
+				raise ValueError('Corrupt mediameta record')
+			self._segments = list(zip(kinds, offsets, lengths))
+
+	def _ifd_entries(self) -> dict:
+		# _entry_offsets, unpacked from the record first if restored by from_bytes()
+		if self.__packed_entries is not None:
+			count = len(self.__packed_entries) // 8
+			self._entry_offsets = dict(zip(unpack_from('<%dI' % count, self.__packed_entries, 0),
+				unpack_from('<%dI' % count, self.__packed_entries, 4 * count)))
+			self.__packed_entries = None
+		return self._entry_offsets
+
+	def _tag_keys(self, name:str) -> tuple:
+		if name.startswith(_MAKERNOTE_PREFIX):
+			self.__decode_makernote()
+		return _tag_keys(name)
+
+	def _tag_name(self, key:int) -> str:
+		return _tag_name(key)
+
 	def __find_meta_jpeg(self, file_name:str):
 		exif_raw_data = None
-		exif_data_length = 0
 
 		# Sanity check
-		file_size = os.path.getsize(file_name)
+		file_size = self._size()
 		if file_size < 20:
 			return exif_raw_data
 
-		f = open(file_name, 'rb')
+		with self._open() as f:
+			# Check the SOI (Start Of Image) marker.
+			# Must always be 0xFFD8, big endian byte order.
+			self._charge(2)
+			b2 = int.from_bytes(f.read(2), 'big')     # b2 - two bytes
+			
+			if b2 != 0xFFD8:
+				#print('Bad SOI marker in ' + file_name +'. Not a valid JPEG.')
+				return exif_raw_data
 
-		# Check the SOI (Start Of Image) marker.
-		# Must always be 0xFFD8, big endian byte order.
-		b2 = int.from_bytes(f.read(2), 'big')     # b2 - two bytes
-		
-		if b2 != 0xFFD8:
-			#print('Bad SOI marker in ' + file_name +'. Not a valid JPEG.')
-			return exif_raw_data
+			# APP1 EXIF (0xFFE1, big endian) is mandatory FIRST marker after SOI, 
+			# see (EXIF 2.3, p4.5.5, Table 2 - page 6). But we walk the markers to 
+			# jump over APP0 JFIF (0xFFE0) and whatever else might precede it.
+			# Other APPn segments we know of are not read, only their locations
+			# are noted in case they are asked for later.
+			offset = 2
+			while offset < file_size - 4:
+				self._charge(4)
+				f.seek(offset)
+				marker = int.from_bytes(f.read(2), 'big')
+				segment_length = int.from_bytes(f.read(2), 'big')     # The length value includes the length of itself, 2 bytes
+
+				# Stop at anything that is not a marker, at SOS (the image data follows)
+				# and at segments too short to hold their own length
+				if marker & 0xFF00 != 0xFF00 or marker == 0xFFDA or segment_length < 2:
+					break
 
-		# APP1 EXIF (0xFFE1, big endian) is mandatory FIRST marker after SOI, 
-		# see (EXIF 2.3, p4.5.5, Table 2 - page 6). But we search for it to 
-		# jump over APP0 JFIF (0xFFE0) marker in case it is present.
-		offset = 2
-		f.seek(offset)
-		b2 = int.from_bytes(f.read(2), 'big')
-		offset += 2
-		while b2 != 0xFFE1 and offset < file_size - 2:							# FIXME: the first occurence of 0xFFE1 must be EXIF
-			b2 = int.from_bytes(f.read(2), 'big')						# so we stop at it for now. But APP1 XMP (also 0xFFE1) 
-			f.seek(offset + b2)													# and ICC (0xFFE2) can follow. Would be nice to add them.
-			offset += 2 + b2
-			b2 = int.from_bytes(f.read(2), 'big')
-
-		if b2 == 0xFFE1:                                                        # Found TIFF/EXIF data.
-			exif_data_length = int.from_bytes(f.read(2), 'big') - 2   # The length value includes the length of itself, 2 bytes
-			f.seek(offset + 2 + 4 + 2)                                          # Skip to the start of TIFF header: APP1 length - 2 bytes, 'Exif' - 4 bytes, 0x0000 filler - 2 bytes
-			exif_raw_data = f.read(exif_data_length)                            # Read TIFF, EXIF and GPS tags as raw bytes and stop processing
+				if marker in _JPEGSegmentMarkers:
+					head_length = min(segment_length - 2, _JPEG_SIGNATURE_LENGTH)
+					self._charge(head_length)
+					head = f.read(head_length)
+					for (kind_marker, signature, kind) in _JPEGSegmentSignatures:
+						if marker == kind_marker and head.startswith(signature):
+							data_offset = offset + 4 + len(signature)
+							data_length = segment_length - 2 - len(signature)
+							if kind == 'Exif':
+								if exif_raw_data is None:                                 # Found TIFF/EXIF data, the first one counts
+									self._charge(data_length)
+									f.seek(data_offset)
+									exif_raw_data = f.read(data_length)               # Read TIFF, EXIF and GPS tags as raw bytes
+									self.__exif_offset = data_offset
+							else:
+								self._segments.append((kind, data_offset, data_length))
+							break
+
+				offset += 2 + segment_length
 			
 		return exif_raw_data
 
+	def _segment_chunks(self, offset:int, length:int, chunk_size:int = 16384):
+		# Yields the bytes of a segment noted by the marker walk chunk by chunk,
+		# so that the consumer can stop reading whenever it has what it needs
+		with self._open() as f:
+			f.seek(offset)
+			while length > 0:
+				chunk = f.read(min(chunk_size, length))
+				if len(chunk) == 0:
+					break
+				length -= len(chunk)
+				yield chunk
+
+	def xmp(self, properties:list = None) -> dict:
+		'''
+			Reads XMP properties, e.g. ['xmp:Rating', 'dc:subject'], and returns
+			them as a dictionary. Without properties all top level properties are
+			returned. The packet is streamed and parsing stops as soon as all
+			requested properties are found. Extended XMP split across several
+			JPEG segments is reassembled when the main packet does not have
+			everything requested.
+		'''
+		from .xmp import XMPReader
+
+		# The GUID of extended XMP is needed to find its parts
+		extended = [s for s in self._segments if s[0] == 'ExtendedXMP']
+		wanted = properties
+		if properties is not None and len(extended) > 0 and _XMP_HAS_EXTENDED not in properties:
+			wanted = properties + [_XMP_HAS_EXTENDED]
+
+		reader = XMPReader(wanted)
+		main = [s for s in self._segments if s[0] == 'XMP']
+		if len(main) > 0:
+			for chunk in self._segment_chunks(main[0][1], main[0][2]):
+				if reader.feed(chunk):
+					break
+		else:
+			packet = self.blob('XMLPacket')
+			if packet is not None:
+				reader.feed(packet)
+		values = reader.close()
+
+		guid = values.get(_XMP_HAS_EXTENDED)
+		if properties is not None and _XMP_HAS_EXTENDED not in properties:
+			values.pop(_XMP_HAS_EXTENDED, None)
+
+		missing = properties is None or any(p not in values for p in properties)
+		if guid is not None and missing:
+			for (prop, value) in self.__extended_xmp(extended, guid, properties, values).items():
+				values.setdefault(prop, value)
+
+		return values
+
+	def image_resources(self):
+		'''
+			Returns the index of Photoshop image resource blocks (8BIM), see
+			ImageResources. The blocks are read on first call.
+		'''
+		if self._image_resources is None:
+			from .iptc import ImageResources
+			segments = [s for s in self._segments if s[0] == 'Photoshop']
+			data = b''
+			if len(segments) > 0:
+				# Resource data may continue from one APP13 segment to the next
+				data = b''.join(b''.join(self._segment_chunks(offset, length)) for (_, offset, length) in segments)
+			elif (raw := self.blob('ImageResources')) is not None:
+				data = raw
+			self._image_resources = ImageResources(data)
+		return self._image_resources
+
+	def iptc(self):
+		'''
+			Returns the index of IPTC-IIM datasets, see IPTCIndex. They come from
+			the IPTCNAA tag or from the image resource block that holds them.
+		'''
+		if self._iptc is None:
+			from .iptc import IPTCIndex
+			from .iptc import _IPTC_RESOURCE
+			data = self.blob('IPTCNAA')
+			if data is None:
+				data = self.image_resources().get(_IPTC_RESOURCE)
+			self._iptc = IPTCIndex(data if data is not None else b'', self._international_encoding)
+		return self._iptc
+
+	def icc_profile(self):
+		'''
+			Returns the ICC colour profile of the image, see ICCProfile, or None
+			if there is none. A profile split across several JPEG APP2 segments
+			is put together in the order of their sequence numbers. The profile
+			is read on first call.
+		'''
+		if self._icc_profile is None:
+			from .icc import ICCProfile
+			data = self.__icc_data()
+			try:
+				self._icc_profile = ICCProfile(data) if data is not None else False
+			except ValueError:
+				self._icc_profile = False
+		return self._icc_profile if self._icc_profile is not False else None
+
+	def __icc_data(self) -> (bytes | None):
+		# JPEG segments start with the sequence number of the segment (from 1) and the count of segments
+		parts = {}
+		for (kind, offset, length) in self._segments:
+			match kind:
+				case 'ICC_PROFILE':
+					data = b''.join(self._segment_chunks(offset, length))
+					if len(data) > 2:
+						parts.setdefault(data[0], data[2:])
+				case 'ICC':
+					return b''.join(self._segment_chunks(offset, length))
+				case 'iCCP':
+					data = b''.join(self._segment_chunks(offset, length))
+					name_end = data.find(b'\x00', 0, 80)
+					if name_end == -1 or name_end + 2 > len(data) or data[name_end + 1] != 0:
+						return None
+					try:
+						return zlib.decompressobj().decompress(data[name_end + 2:], _MAX_TAG_SIZE)
+					except zlib.error:
+						return None
+				case _:
+					pass
+		if len(parts) > 0:
+			return b''.join(parts[sequence] for sequence in sorted(parts))
+		return self.blob('InterColorProfile')
+
+	def embedded_images(self) -> list:
+		'''
+			Returns the images of a Multi-Picture JPEG file as a list of MPImage
+			(type, offset, size, dependents), the primary image first. Previews,
+			depth maps and gain maps are listed by the MP Index of the APP2 MPF
+			segment, which is the only part of the file read. The list is empty
+			if the file has no MPF segment.
+		'''
+		if self._mp_images is None:
+			self._mp_images = []
+			segments = [s for s in self._segments if s[0] == 'MPF']
+			if len(segments) > 0:
+				(_, offset, length) = segments[0]
+				data = b''.join(self._segment_chunks(offset, length))
+				try:
+					self._mp_images = self.__mp_index(data, offset)
+				except (struct_error, IndexError, ValueError):
+					pass
+		return self._mp_images
+
+	def __mp_index(self, data:bytes, base:int) -> list:
+		# The MPF segment is a TIFF structure, its first IFD is the MP Index IFD
+		from .mpf import _mp_entries
+		from .mpf import _MPF_NAMESPACE
+		from .mpf import _MPF_ENTRY
+
+		header = self.__tiff_header(data)
+		if header is None:
+			return []
+		(byte_order, ifd_offset) = header
+		self._start_budget()
+		self.__visited_ifds = set()
+		tags = self.__read_tags(data, ifd_offset, _MPF_NAMESPACE, byte_order)
+		entries = tags.get(_MPF_NAMESPACE | _MPF_ENTRY, [])
+		if len(entries) == 0 or not isinstance(entries[0], bytes):
+			return []
+		return _mp_entries(entries[0], byte_order, base)
+
+	def embedded_image(self, index:int) -> (memoryview | None):
+		'''
+			Returns the bytes of image index of embedded_images() as a memoryview
+			of the mapped file, nothing is read until they are used. The file
+			stays mapped as long as the memoryview is referred to. None if there
+			is no such image or it does not fit into the file.
+		'''
+		images = self.embedded_images()
+		if index < 0 or index >= len(images):
+			return None
+		image = images[index]
+		if image.size == 0 or image.offset + image.size > self._size():
+			return None
+		(_, data) = self._map()
+		return memoryview(data)[image.offset:image.offset + image.size]
+
+	def update(self, changes:dict, dry_run:bool = False, atomic:bool = False) -> list:
+		'''
+			Writes new values of tags, {name: values}, into the file. Only tags
+			present in the TIFF/EXIF data of the file can be updated. Values are
+			given the way mediameta stores them: strings, numbers, 'n/d' strings
+			for rationals, bytes for undefined fields. Fixed size values are
+			patched in place. Values that grow are appended to the file (TIFF
+			and RAW) or to the APP1 segment, which is rewritten alone (JPEG),
+			other formats only take values that fit in place.
+
+			Returns the patches as (file offset, number of bytes replaced, new
+			bytes) tuples. dry_run only works them out, atomic writes a patched
+			copy and renames it over the file instead of writing into it.
+		'''
+		from .tiffwriter import _update
+		(patches, stored, tiff_length) = _update(self, changes, dry_run, atomic)
+		if not dry_run:
+			self._tags |= stored
+			# A JPEG APP1 segment that grew moves the rest of the file along
+			(exif_offset, old_length) = self._exif_location
+			if tiff_length != old_length:
+				self._segments = [(kind, offset + tiff_length - old_length if offset >= exif_offset + old_length else offset, length)
+					for (kind, offset, length) in self._segments]
+				self._mp_images = None
+			self._exif_location = (exif_offset, tiff_length)
+			if self._digest is not None:
+				with self._open() as f:
+					f.seek(self._exif_location[0])
+					self._digest = _metadata_digest(f.read(tiff_length))
+			if self._interpreted_tags != {}:
+				self.interpret()
+		return patches
+
+	def makernote(self) -> dict:
+		'''
+			Decodes the MakerNote, if it is not decoded yet, and returns its tags
+			as a dictionary. MakerNotes of Apple, Canon, Nikon, Sony and Fujifilm
+			are understood.
+		'''
+		self.__decode_makernote()
+		return {name:value for (name, value) in self.all() if name.startswith(_MAKERNOTE_PREFIX)}
+
+	def __decode_makernote(self):
+		# MakerNote tags are read into _tags on first access to any of them
+		if self._makernote_decoded:
+			return
+		self._makernote_decoded = True
+
+		note = self.blob('MakerNote')
+		make = self._raw('Make')
+		if note is None:
+			return
+		note = bytes(note)
+
+		from .makernote import _makernote_layout
+		try:
+			layout = _makernote_layout(note, make[0] if len(make) > 0 and isinstance(make[0], str) else '',
+				self._byte_order, self._makernote_offset)
+			if layout is None:
+				return
+			(vendor, ifd_offset, byte_order, delta) = layout
+			self._start_budget()
+			self.__visited_ifds = set()
+			tags = self.__read_tags(note, ifd_offset, _MakerNoteNamespaces[vendor], byte_order, delta)
+		except (struct_error, IndexError, ValueError):
+			return
+
+		self._tags |= tags
+		if self._interpreted_tags != {}:
+			self._interpreted_tags |= tags
+
+	def __extended_xmp(self, segments:list, guid:str, properties:list, found:dict) -> dict:
+		# Each extended XMP segment starts with the 32 character GUID of the whole
+		# extended packet, its full length and the offset of this part in it
+		parts = []
+		with self._open() as f:
+			for (_, offset, length) in segments:
+				if length < 40:
+					continue
+				f.seek(offset)
+				header = f.read(40)
+				if header[:32] == guid.encode('ascii', errors='replace'):
+					parts.append((uint_32(header, 36, 'big'), offset + 40, length - 40))
+
+		from .xmp import XMPReader
+		reader = XMPReader(None if properties is None else [p for p in properties if p not in found])
+		expected = 0
+		for (part_offset, offset, length) in sorted(parts):
+			if part_offset != expected:
+				break	# a part is missing, the rest cannot be parsed
+			for chunk in self._segment_chunks(offset, length):
+				if reader.feed(chunk):
+					return reader.close()
+			expected += length
+
+		return reader.close()
+
 	def __find_meta_tiff(self, file_name:str):
 		# Sanity check
-		file_size = os.path.getsize(file_name)
+		file_size = self._size()
 		if file_size < 20:
 			return None
 		
-		f = open(file_name, 'rb')
+		# TIFF based files, camera RAW files especially, can be very big. The file is
+		# mapped rather than read, so only the pages holding the header, the IFDs and
+		# the values the tags point to are ever read from disk. Read-ahead would
+		# fetch more than that for every page touched, so it is turned off.
+		self._charge(8)
+		(self.__mapping, data) = self._map()
+		if self.__mapping is not None and hasattr(mmap, 'MADV_RANDOM'):
+			self.__mapping.madvise(mmap.MADV_RANDOM)
+		self.__exif_offset = 0
+		return data
+
+	def __find_meta_heif(self, file_name:str):
+		exif_raw_data = None
+
+		# Sanity check
+		file_size = self._size()
+		if file_size < 20:
+			return exif_raw_data
+
+		with self._open() as f:
+			# Only the headers of top level boxes are read until the meta box,
+			# which is small and is read whole
+			meta = None
+			for (box_type, data_offset, data_end) in _file_boxes(f, 0, file_size, self._charge):
+				if box_type == b'meta':
+					self._charge(data_end - data_offset)
+					f.seek(data_offset)
+					meta = f.read(data_end - data_offset)
+					meta_offset = data_offset
+					break
+			if meta is None:
+				return exif_raw_data
 
-		# Read the whole file as TIFF tags
-		# Seems there is no way to determine the size of the meta data in advance
-		return f.read(file_size)
+			# meta is a full box, its children follow version and flags
+			children = {}
+			for (box_type, data_offset, data_end) in _boxes(meta, 4, len(meta)):
+				children.setdefault(box_type, (data_offset, data_end))
+			# The colour profile is a colr property of the primary item, of type prof or rICC
+			if b'iprp' in children:
+				for (box_type, data_offset, data_end) in _boxes(meta, *children[b'iprp']):
+					if box_type != b'ipco':
+						continue
+					for (box_type, data_offset, data_end) in _boxes(meta, data_offset, data_end):
+						if box_type == b'colr' and meta[data_offset:data_offset+4] in (b'prof', b'rICC'):
+							self._segments.append(('ICC', meta_offset + data_offset + 4, data_end - data_offset - 4))
+							break
+					break
 
-	def __find_meta_heic(self, file_name:str):
+			if b'iinf' not in children or b'iloc' not in children:
+				return exif_raw_data
+
+			# Only Exif and XMP items are of interest, not the tiles of the image
+			items = _item_info(meta, *children[b'iinf'], (b'Exif', b'mime'))
+			locations = _item_locations(meta, *children[b'iloc'], items.keys())
+
+			for (item_id, (item_type, content_type)) in items.items():
+				if item_id not in locations:
+					continue
+				(method, extents) = locations[item_id]
+
+				if item_type == b'Exif' and exif_raw_data is None:
+					# The TIFF header is preceded by its offset:uint32 from the end of that offset
+					data = self.__read_item(f, file_size, meta, children.get(b'idat'), method, extents)
+					if data is not None and len(data) > 4:
+						tiff_offset = 4 + uint_32(data, 0, 'big')
+						if tiff_offset < len(data):
+							exif_raw_data = data[tiff_offset:]
+							if method == 0 and len(extents) == 1:
+								self.__exif_offset = extents[0][0] + tiff_offset
+
+				elif item_type == b'mime' and content_type == 'application/rdf+xml':
+					if method == 0 and len(extents) == 1 and sum(extents[0]) <= file_size:
+						self._segments.append(('XMP', extents[0][0], extents[0][1]))
+
+		return exif_raw_data
+
+	def __read_item(self, f, file_size:int, meta:bytes, idat:(tuple | None), method:int, extents:list) -> (bytes | None):
+		# Puts together the extents of an item, from the file or from the idat box of meta
+		parts = []
+		for (offset, length) in extents:
+			match method:
+				case 0:
+					if length == 0 or offset + length > file_size:
+						return None
+					self._charge(length)
+					f.seek(offset)
+					parts.append(f.read(length))
+				case 1:
+					if idat is None or length == 0 or idat[0] + offset + length > idat[1]:
+						return None
+					parts.append(meta[idat[0] + offset:idat[0] + offset + length])
+				case _:
+					return None
+		return b''.join(parts)
+
+	def __find_meta_cr3(self, file_name:str):
+		# Canon CR3 keeps complete TIFF structures in CMT1 (IFD0), CMT2 (EXIF),
+		# CMT3 (MakerNote) and CMT4 (GPS) boxes of a uuid box in moov.
+		# Returns {box type: box data} or None.
+		cmt_boxes = {}
+
+		# Sanity check
+		file_size = self._size()
+		if file_size < 20:
+			return None
+
+		with self._open() as f:
+			for (box_type, data_offset, data_end) in _file_boxes(f, 0, file_size, self._charge):
+				if box_type != b'moov':
+					continue
+				for (box_type, data_offset, data_end) in _file_boxes(f, data_offset, data_end, self._charge):
+					if box_type != b'uuid' or data_end - data_offset < 16:
+						continue
+					self._charge(16)
+					f.seek(data_offset)
+					if f.read(16) != _CANON_CMT_UUID:
+						continue
+					for (box_type, data_offset, data_end) in _file_boxes(f, data_offset + 16, data_end, self._charge):
+						if box_type in _CanonCMTBoxes and box_type not in cmt_boxes:
+							self._charge(data_end - data_offset)
+							f.seek(data_offset)
+							cmt_boxes[box_type] = f.read(data_end - data_offset)
+					break
+				break
+
+		return cmt_boxes if len(cmt_boxes) > 0 else None
+
+	def __find_meta_png(self, file_name:str):
 		exif_raw_data = None
-		exif_size = 0
 
 		# Sanity check
-		file_size = os.path.getsize(file_name)
-		if file_size < 20: # Must check this later
+		file_size = self._size()
+		if file_size < 20:
 			return exif_raw_data
 
-		f = open(file_name, 'rb')
+		with self._open() as f:
+			self._charge(8)
+			if f.read(8) != _PNG_SIGNATURE:
+				return exif_raw_data
 
-		ftype_size = int.from_bytes(f.read(4), 'big')         # size of ftype box
-		f.seek(ftype_size)
-		metadata_size = int.from_bytes(f.read(4), 'big')      # size of metadata box
+			# Chunks are length:uint32, type, data, CRC:uint32. Only chunk headers are read,
+			# image data is seeked over, so it does not matter how big the image is.
+			offset = 8
+			while offset + 12 <= file_size:
+				self._charge(8)
+				f.seek(offset)
+				header = f.read(8)
+				chunk_length = uint_32(header, 0, 'big')
+				chunk_type = header[4:8]
+				data_offset = offset + 8
+				if data_offset + chunk_length + 4 > file_size or chunk_type == b'IEND':
+					break
 
-		# Scan through metadata until we find (a) Exif, (b) iloc
-		data = f.read(metadata_size)
-		exif_offset = -1
-		iloc_offset = -1
-		for i in range(metadata_size-4): 								# '-4' as we are reading by 4-byte values and 
-			b4 = data[i:i+4]											# the last 3 readings would otherwise go out of range
-			if b4 == b'Exif':
-				exif_offset = i
-			elif b4 == b'iloc':
-				iloc_offset = i
+				match chunk_type:
+					case b'eXIf':
+						if exif_raw_data is None:
+							self._charge(chunk_length)
+							exif_raw_data = f.read(chunk_length)
+							self.__exif_offset = data_offset
+					case b'iTXt':
+						# keyword, 0x00, compression flag, compression method, language, 0x00, translated keyword, 0x00, text
+						head_length = min(chunk_length, 256)
+						self._charge(head_length)
+						head = f.read(head_length)
+						if head.startswith(_PNG_XMP_KEYWORD) and len(head) > len(_PNG_XMP_KEYWORD) and head[len(_PNG_XMP_KEYWORD)] == 0:
+							language_end = head.find(b'\x00', len(_PNG_XMP_KEYWORD) + 2)
+							keyword_end = head.find(b'\x00', language_end + 1) if language_end != -1 else -1
+							if keyword_end != -1:
+								self._segments.append(('XMP', data_offset + keyword_end + 1, chunk_length - keyword_end - 1))
+					case b'iCCP':
+						# profile name, 0x00, compression method, zlib stream
+						self._segments.append(('iCCP', data_offset, chunk_length))
+					case _:
+						pass
 
-		if exif_offset == -1 or iloc_offset == -1:
+				offset = data_offset + chunk_length + 4
+
+		return exif_raw_data
+
+	def __find_meta_webp(self, file_name:str):
+		exif_raw_data = None
+
+		# Sanity check
+		file_size = self._size()
+		if file_size < 20:
 			return exif_raw_data
 
-		exif_item_index = uint_16(data, exif_offset - 4, 'big')
-
-		# Scan through ilocs to find exif item location
-		i = iloc_offset + 12
-		while i < metadata_size - 16:
-			item_index = uint_16(data, i, 'big')
-
-			if item_index == exif_item_index:
-				exif_location = uint_32(data, i + 8, 'big')
-				exif_size = uint_32(data, i + 12, 'big')
-				# FIXME: Check EXIF prefix at exif_location
-				f.seek(exif_location)
-				prefix_size = 4 + int.from_bytes(f.read(4), 'big')
-				f.seek(exif_location + prefix_size)
-				exif_raw_data = f.read(exif_size)
-				break
+		with self._open() as f:
+			self._charge(12)
+			header = f.read(12)
+			if header[0:4] != b'RIFF' or header[8:12] != b'WEBP':
+				return exif_raw_data
+			riff_end = min(8 + uint_32(header, 4, 'little'), file_size)
+
+			# Chunks are FourCC, size:uint32 little endian, data padded to even size.
+			# Only chunk headers are read, image data is seeked over.
+			offset = 12
+			while offset + 8 <= riff_end:
+				self._charge(8)
+				f.seek(offset)
+				header = f.read(8)
+				chunk_size = uint_32(header, 4, 'little')
+				data_offset = offset + 8
+				if data_offset + chunk_size > riff_end:
+					break
 
-			i += 16
+				match header[0:4]:
+					case b'EXIF':
+						if exif_raw_data is None:
+							self._charge(chunk_size)
+							exif_raw_data = f.read(chunk_size)
+							self.__exif_offset = data_offset
+							if exif_raw_data.startswith(b'Exif\x00\x00'):   # Some writers keep the JPEG APP1 prefix
+								exif_raw_data = exif_raw_data[6:]
+								self.__exif_offset += 6
+					case b'XMP ':
+						self._segments.append(('XMP', data_offset, chunk_size))
+					case b'ICCP':
+						self._segments.append(('ICC', data_offset, chunk_size))
+					case _:
+						pass
+
+				offset = data_offset + chunk_size + (chunk_size & 1)
+
+		return exif_raw_data
+
+	def __find_meta_jxl(self, file_name:str):
+		exif_raw_data = None
+
+		# Sanity check
+		file_size = self._size()
+		if file_size < 20:
+			return exif_raw_data
+
+		with self._open() as f:
+			# A bare JPEG XL codestream has no metadata, only the container format has
+			self._charge(len(_JXL_SIGNATURE))
+			if f.read(len(_JXL_SIGNATURE)) != _JXL_SIGNATURE:
+				return exif_raw_data
+
+			# Boxes are size:uint32, type, data. Size 1 means a 64-bit size follows the
+			# type, size 0 means the box runs to the end of the file.
+			offset = len(_JXL_SIGNATURE)
+			while offset + 8 <= file_size:
+				self._charge(8)
+				f.seek(offset)
+				header = f.read(8)
+				box_size = uint_32(header, 0, 'big')
+				header_size = 8
+				if box_size == 1:
+					self._charge(8)
+					box_size = int.from_bytes(f.read(8), 'big')
+					header_size = 16
+				elif box_size == 0:
+					box_size = file_size - offset
+				if box_size < header_size or offset + box_size > file_size:
+					break
+				data_offset = offset + header_size
+				data_length = box_size - header_size
+
+				match header[4:8]:
+					case b'Exif':
+						# The TIFF header is preceded by its offset:uint32 from the end of that offset
+						if exif_raw_data is None and data_length > 4:
+							self._charge(4)
+							tiff_offset = 4 + int.from_bytes(f.read(4), 'big')
+							if tiff_offset < data_length:
+								self._charge(data_length - tiff_offset)
+								f.seek(data_offset + tiff_offset)
+								exif_raw_data = f.read(data_length - tiff_offset)
+								self.__exif_offset = data_offset + tiff_offset
+					case b'xml ':
+						self._segments.append(('XMP', data_offset, data_length))
+					case _:
+						pass
+
+				offset += box_size
 
 		return exif_raw_data
 
@@ -171,129 +883,158 @@ class ImageMetadata(MediaMetadata):
 		gps_tags  = {}
 		inter_tags = {}
 
+		# IFD offsets already read, to stop at pointers looping back
+		self.__visited_ifds = set()
+
+		header = self.__tiff_header(exif_data)
+		if header is None:
+			return (tiff_tags, exif_tags, gps_tags, inter_tags)
+		(byte_order, ifd1_offset) = header
+		self._byte_order = byte_order
+		self.__blob_data = exif_data
+
+		# Mapped TIFF files are not one buffer of metadata, they are digested by tags
+		if self.__mapping is None:
+			self._digest = _metadata_digest(exif_data)
+
+		tiff_tags = self.__read_tags(exif_data, ifd1_offset, 0, byte_order)
+
+		exif_offset = self.__pointer(tiff_tags, _EXIF_IFD_POINTER)
+		if exif_offset != -1:
+			exif_tags = self.__read_tags(exif_data, exif_offset, 0, byte_order)
+
+		gps_offset = self.__pointer(tiff_tags, _GPS_IFD_POINTER)
+		if gps_offset == -1:
+			gps_offset = self.__pointer(exif_tags, _GPS_IFD_POINTER)
+		if gps_offset != -1:
+			gps_tags = self.__read_tags(exif_data, gps_offset, _GPS_NAMESPACE, byte_order)
+
+		inter_offset = self.__pointer(tiff_tags, _INTEROPERABILITY_IFD_POINTER)
+		if inter_offset == -1:
+			inter_offset = self.__pointer(exif_tags, _INTEROPERABILITY_IFD_POINTER)
+		if inter_offset != -1:
+			inter_tags = self.__read_tags(exif_data, inter_offset, 0, byte_order)
+
+		return (tiff_tags, exif_tags, gps_tags, inter_tags)
+
+	def __tiff_header(self, exif_data:bytes) -> (tuple | None):
+		# Returns (byte order, offset of the first IFD) or None if there is no valid TIFF header
+
+		# Validity check 0: there must be room for the TIFF header
+		if len(exif_data) < 8:
+			return None
+
 		# Validity check 1: the first two bytes contain little/big endian marker
 		if exif_data[0] == 0x49 and exif_data[1] == 0x49:   # I I - Intel
 			byte_order = 'little'
 		elif exif_data[0] == 0x4D and exif_data[1] == 0x4D: # M M - Motorola
 			byte_order = 'big'
 		else:
-			return (tiff_tags, exif_tags, gps_tags)
+			return None
 
-		# Validity check 2: the third and fourth bytes contain a 0x002A magic number
-		if uint_16(exif_data, 2, byte_order) != 0x002A:
-			return (tiff_tags, exif_tags, gps_tags)
+		# Validity check 2: the third and fourth bytes contain a 0x002A magic number,
+		# or one of the magic numbers of RAW formats that are TIFF otherwise
+		if uint_16(exif_data, 2, byte_order) not in _TiffMagicNumbers:
+			return None
 
 		ifd1_offset = uint_32(exif_data, 4, byte_order)
 
 		# Validity check 3: the first IFD must be reachable
 		if ifd1_offset < 8 or ifd1_offset >= len(exif_data):
-			return (tiff_tags, exif_tags, gps_tags)
+			return None
 
-		tiff_tags = self.__read_tags(exif_data, ifd1_offset, _TiffTags | _ExifTags, byte_order)
+		return (byte_order, ifd1_offset)
 
-		if 'ExifIFDPointer' in tiff_tags:
-			exif_offset = tiff_tags['ExifIFDPointer'][0]
-			exif_tags = self.__read_tags(exif_data, exif_offset, _TiffTags | _ExifTags, byte_order)
+	def __parse_cmt_boxes(self, cmt_boxes:dict):
+		# Every CMT box of a CR3 file is a TIFF structure of its own with one IFD
+		# holding what the name of the box says
+		tags = {}
+		for (box_type, namespace) in [(b'CMT1', 0), (b'CMT2', 0), (b'CMT4', _GPS_NAMESPACE)]:
+			header = self.__tiff_header(cmt_boxes.get(box_type, b''))
+			if header is not None:
+				self.__visited_ifds = set()
+				tags[box_type] = self.__read_tags(cmt_boxes[box_type], header[1], namespace, header[0])
+			else:
+				tags[box_type] = {}
 
-		gps_offset = -1
-		if 'GPSInfoIFDPointer' in tiff_tags:
-			gps_offset = tiff_tags['GPSInfoIFDPointer'][0]
-		elif 'GPSInfoIFDPointer' in exif_tags:
-			gps_offset = exif_tags['GPSInfoIFDPointer'][0]
-		if gps_offset != -1:
-			gps_tags = self.__read_tags(exif_data, gps_offset, _GPSTags, byte_order)
+		# The MakerNote IFD counts its offsets from the TIFF header of its box,
+		# that is what decoding Canon MakerNotes expects anyway
+		header = self.__tiff_header(cmt_boxes.get(b'CMT3', b''))
+		if header is not None:
+			(self._byte_order, self._makernote_offset) = header
+			key = _TagRegistry[_MAKERNOTE].key
+			tags[b'CMT2'][key] = [cmt_boxes[b'CMT3'][self._makernote_offset:]]
+			self._nonprintable_tags.add(key)
 
-		inter_offset = -1
-		if 'InteroperabilityIFDPointer' in tiff_tags:
-			inter_offset = tiff_tags['InteroperabilityIFDPointer'][0]
-		elif 'InteroperabilityIFDPointer' in exif_tags:
-			inter_offset = exif_tags['InteroperabilityIFDPointer'][0]
-		if inter_offset != -1:
-			inter_tags = self.__read_tags(exif_data, inter_offset, _TiffTags | _ExifTags, byte_order)
+		return (tags[b'CMT1'], tags[b'CMT2'], tags[b'CMT4'], {})
 
-		return (tiff_tags, exif_tags, gps_tags, inter_tags)
+	def __pointer(self, tags:dict, key:int) -> int:
+		# Returns an IFD offset stored under key, or -1 if there is none
+		# or the IFD it points to has already been read
+		if key not in tags or len(tags[key]) == 0 or not isinstance(tags[key][0], int):
+			return -1
+		offset = tags[key][0]
+		return -1 if offset in self.__visited_ifds else offset
 
-	def __read_tag_value(self, data:bytes, offset:int, tag:str, byte_order:str):
+	def __read_tag_value(self, data:bytes, offset:int, info, byte_order:str, delta:int = 0):
 		tag_type = uint_16(data, offset + 2, byte_order)
 		num_values = uint_32(data, offset + 4, byte_order)
 		value_offset = uint_32(data, offset + 8, byte_order)
 		values = []
 		encoding = self._international_encoding
 
+		# Bounds check: values that do not fit into the buffer, or unreasonably
+		# many of them, mean a corrupt entry. Skip it.
+		if tag_type not in _TypeSizes or (num_values > _MAX_TAG_VALUES and tag_type not in [1, 2, 7]):
+			return (values, tag_type)
+		byte_count = num_values * _TypeSizes[tag_type]
+		if byte_count > _MAX_TAG_SIZE:
+			return (values, tag_type)
+		where_to_look = offset + 8 if byte_count <= 4 else value_offset + delta
+		if where_to_look < 0 or where_to_look + byte_count > len(data):
+			return (values, tag_type)
+		self._charge(byte_count if byte_count > 4 else 0)
+
 		# Processing for secial cases
-		if tag in ['XPTitle', 'XPComment', 'XPAuthor', 'XPKeywords', 'XPSubject']: # windows tags all in utf_16
-			if num_values <= 2:
-				where_to_look = offset + 8
-			else:
-				where_to_look = value_offset
+		decoding = info.decoding if info is not None else None
+		if decoding == 'utf_16':
 			# FIXME: byte_order for utf_16 can be different from the system where this code is run
 			values.append(str_b(data, where_to_look, num_values, 'utf_16'))
-			tag_type = -1
-		elif tag == 'XMLPacket': # XMP data might often be stored as bytes, not ascii
+			return (values, tag_type)
+		elif decoding == 'ascii':
 			tag_type = 2
+		elif decoding == 'bytes':
+			values.append(self.__blob(data, where_to_look, byte_count))
+			return (values, tag_type)
 
 		# Orderly processing
 		match tag_type:
 			case 1: # 1 - byte, 8-bit unsigned int
-				if num_values <= 4:
-					where_to_look = offset + 8
-				else:
-					where_to_look = value_offset
-					
-				values = [data[where_to_look + i] for i in range(num_values)]
+				values = list(data[where_to_look:where_to_look + num_values])
 
 			case 2: # ascii, 8-bit byte
-				if num_values <= 4:
-					where_to_look = offset + 8
-				else:
-					where_to_look = value_offset
-
 				values.append(str_b(data, where_to_look, num_values, encoding))
 
 			case 3: # short, 16 bit int
-				if num_values <= 2:
-					where_to_look = offset + 8
-				else:
-					where_to_look = value_offset
-		
-				values = [uint_16(data, where_to_look + i, byte_order) for i in range(num_values)]
+				values = [uint_16(data, where_to_look + i*2, byte_order) for i in range(num_values)]
 
 			case 4: # 4 - long, 32 bit int
-				if num_values == 1:
-					where_to_look = offset + 8
-				else:
-					where_to_look = value_offset
-		
-				values = [uint_32(data, where_to_look + i, byte_order) for i in range(num_values)]
+				values = [uint_32(data, where_to_look + i*4, byte_order) for i in range(num_values)]
 
 			case 5: # 5 - rational, two long values, first is numerator, second is denominator
-				where_to_look = value_offset
 				for i in range(num_values):
 					numerator = uint_32(data, where_to_look + i*8, byte_order)
 					denominator = uint_32(data, where_to_look + i*8 + 4, byte_order)
 					values.append(str(numerator) + '/' + str(denominator))
 
 			case 7: # 7 - undefined, value depending on field
-				if num_values <= 4:
-					where_to_look = offset + 8
-				else:
-					where_to_look = value_offset
-
 				#values.append(str_b(data, where_to_look, num_values, encoding))
-				values.append(data[where_to_look:where_to_look+num_values])
-				if tag not in self._nonprintable_tags + ['ExifVersion', 'FlashpixVersion', 'InteroperabilityVersion']:
-					self._nonprintable_tags.append(tag)
+				values.append(self.__blob(data, where_to_look, num_values))
 				
 			case 9: # 9 - slong, 32 bit signed int.
-				if num_values == 1:
-					where_to_look = offset + 8
-				else:
-					where_to_look = value_offset
-		
-				values = [sint_32(data, where_to_look + i, byte_order) for i in range(num_values)]
+				values = [sint_32(data, where_to_look + i*4, byte_order) for i in range(num_values)]
 
 			case 10: #10 - signed rational, two long values, first is numerator, second is denominator
-				where_to_look = value_offset
 				for i in range(num_values):
 					numerator = sint_32(data, where_to_look + i*8, byte_order)
 					denominator = sint_32(data, where_to_look + i*8 + 4, byte_order)
@@ -302,20 +1043,50 @@ class ImageMetadata(MediaMetadata):
 			case _:
 				pass
 
-		return values
+		return (values, tag_type)
 
-	def __read_tags(self, data:bytes, offset:int, tags_to_search:dict, byte_order:str):
-		entries = uint_16(data, offset, byte_order)
+	def __blob(self, data:bytes, offset:int, length:int):
+		# Small binary values and those not from the TIFF/EXIF data of the file
+		# are copied. A mapped file is unmapped after parsing, nothing may refer to it.
+		if length <= _MAX_INLINE_BLOB or data is not self.__blob_data:
+			return bytes(data[offset:offset + length])
+		if not self.__keep_blobs:
+			# TIFF/EXIF data put together from several extents or from the idat box
+			# of a HEIF has no offset in the file to refer to, the value is copied
+			# so that nothing holds on to all of that data
+			if self.__exif_offset is None:
+				return bytes(data[offset:offset + length])
+			return BlobReference(self.__exif_offset + offset, length)
+		if self.__mapping is not None:
+			return bytes(data[offset:offset + length])
+		return memoryview(data)[offset:offset + length]
+
+	def __read_tags(self, data:bytes, offset:int, namespace:int, byte_order:str, delta:int = 0):
 		tags = {}
 
+		# The IFD must fit its entry count, and must not have been read before
+		if offset in self.__visited_ifds or offset + 2 > len(data):
+			return tags
+		self.__visited_ifds.add(offset)
+
+		# Never trust the entry count beyond what the buffer can hold
+		entries = min(uint_16(data, offset, byte_order), (len(data) - offset - 2) // 12, _MAX_IFD_ENTRIES)
+		self._charge(2 + entries * 12)
+
 		for i in range(entries):
 			entry_offset = offset + i * 12 + 2 # entry_offset is relevant to TIFF headers (i.e. 0x4949 or 0x4D4D byte order marker has an offset of 0
-			tag_marker = uint_16(data, entry_offset, byte_order)
-			if tag_marker in tags_to_search:
-				key = tags_to_search[tag_marker]
-			else:
-				key = 'Tag 0x{0:04X} ({1:05})'.format(tag_marker, tag_marker)
-			tags[key] = self.__read_tag_value(data, entry_offset, key, byte_order)
+			key = namespace | uint_16(data, entry_offset, byte_order)
+			info = _TagRegistry.get(key)
+			if info is not None:
+				key = info.key	# share one key object between all files
+			(tags[key], tag_type) = self.__read_tag_value(data, entry_offset, info, byte_order, delta)
+			if key == _MAKERNOTE:
+				self._makernote_offset = uint_32(data, entry_offset + 8, byte_order)
+			if data is self.__blob_data:
+				self._entry_offsets[key] = entry_offset
+			printable = info.printable if info is not None else None
+			if printable is False or (printable is None and tag_type == 7):
+				self._nonprintable_tags.add(key)
 		
 		return tags
 
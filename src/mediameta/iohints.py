@@ -0,0 +1,184 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+import io
+import os
+from struct import pack, unpack_from
+from itertools import islice
+
+# Bulk scans read a few kilobytes from the start of every file. The hints below
+# keep them from evicting other processes' data from the page cache and from
+# writing access times back to the disk. They are ignored where the platform
+# does not have them.
+_O_NOATIME = getattr(os, 'O_NOATIME', 0)
+_HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
+# Start of a file read ahead, enough to hold the metadata of most files
+_HEADER_WINDOW = 64 * 1024
+
+# Linux FS_IOC_FIEMAP: struct fiemap (start, length, flags, mapped extents,
+# extent count, reserved) followed by one struct fiemap_extent of 56 bytes,
+# which starts with logical and physical offsets
+_FS_IOC_FIEMAP = 0xC020660B
+_FIEMAP_HEADER = '=QQIIII'
+_FIEMAP_EXTENT_SIZE = 56
+
+def _open_fd(file_name:str) -> int:
+	# O_NOATIME is only allowed to the owner of the file
+	if _O_NOATIME:
+		try:
+			return os.open(file_name, os.O_RDONLY | _O_NOATIME)
+		except PermissionError:
+			pass
+	return os.open(file_name, os.O_RDONLY)
+
+class _ScanFile(io.FileIO):
+	# Notes (offset, length) of every read from the file in read_ranges, so
+	# that only those bytes are dropped from the page cache afterwards
+
+	def __init__(self, fd:int, read_ranges:list):
+		super().__init__(fd, 'rb')
+		self._read_ranges = read_ranges
+
+	def readinto(self, buffer):
+		offset = self.tell()
+		length = super().readinto(buffer)
+		if length:
+			self._read_ranges.append((offset, length))
+		return length
+
+	def readall(self):
+		offset = self.tell()
+		data = super().readall()
+		if data:
+			self._read_ranges.append((offset, len(data)))
+		return data
+
+	pass
+
+def _open_for_scan(file_name:str, read_ranges:list = None):
+	# No read-ahead beyond the header window, parsers jump around the file.
+	# Reads are noted in read_ranges if given.
+	fd = _open_fd(file_name)
+	if _HAS_FADVISE:
+		os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_RANDOM)
+		os.posix_fadvise(fd, 0, _HEADER_WINDOW, os.POSIX_FADV_WILLNEED)
+	if read_ranges is None:
+		return os.fdopen(fd, 'rb')
+	return io.BufferedReader(_ScanFile(fd, read_ranges))
+
+def _drop_cache(file_name:str, read_ranges:list):
+	# Tells the OS the pages holding read_ranges of the file will not be needed
+	# again. The rest of the file is left alone, other processes may be using
+	# it. Pages that are mapped or dirty stay.
+	if not _HAS_FADVISE or len(read_ranges) == 0:
+		return
+	try:
+		fd = _open_fd(file_name)
+	except OSError:
+		return
+	try:
+		# Parsers read the same headers more than once, overlapping ranges are merged
+		merged = []
+		for (offset, length) in sorted(read_ranges):
+			if len(merged) > 0 and offset <= merged[-1][1]:
+				merged[-1][1] = max(merged[-1][1], offset + length)
+			else:
+				merged.append([offset, offset + length])
+		for (start, end) in merged:
+			os.posix_fadvise(fd, start, end - start, os.POSIX_FADV_DONTNEED)
+	finally:
+		os.close(fd)
+
+def prefetch(file_names, length:int = _HEADER_WINDOW):
+	'''
+		Asks the OS to start reading the first length bytes of the files in
+		the background. Files that cannot be opened are skipped.
+	'''
+	if not _HAS_FADVISE:
+		return
+	for file_name in file_names:
+		try:
+			fd = _open_fd(file_name)
+		except OSError:
+			continue
+		try:
+			os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)
+		finally:
+			os.close(fd)
+
+def prefetched(file_names, depth:int = 8, length:int = _HEADER_WINDOW):
+	'''
+		Yields file_names one by one while the headers of the next depth files
+		are being read ahead, so that parsing one file overlaps with waiting
+		for the disk to deliver the next ones.
+	'''
+	from collections import deque     # slow to import, not needed by a plain import of the package
+	names = iter(file_names)
+	window = deque(islice(names, depth))
+	prefetch(window, length)
+	while len(window) > 0:
+		file_name = window.popleft()
+		for next_name in islice(names, 1):
+			prefetch([next_name], length)
+			window.append(next_name)
+		yield file_name
+
+def _first_block(fd:int) -> (int | None):
+	# Physical offset of the start of the file on its device, None if unknown
+	try:
+		import fcntl
+	except ImportError:
+		return None
+	request = bytearray(pack(_FIEMAP_HEADER, 0, 1, 0, 0, 1, 0) + bytes(_FIEMAP_EXTENT_SIZE))
+	try:
+		fcntl.ioctl(fd, _FS_IOC_FIEMAP, request)
+	except OSError:
+		return None
+	if unpack_from(_FIEMAP_HEADER, request)[3] == 0:
+		return None
+	return unpack_from('=Q', request, 32 + 8)[0]
+
+def physical_order(file_names, use_fiemap:bool = True) -> list:
+	'''
+		Returns file_names sorted the way they lie on their devices: by device,
+		then by the physical offset of the first block where FIEMAP tells it
+		(Linux), otherwise by inode number, which most file systems allocate
+		close to the data. Reading the files in this order turns the random
+		seeks of a scan into a sweep across the disk. Files that cannot be
+		looked at come last in their original order.
+	'''
+	keyed = []
+	for (index, file_name) in enumerate(file_names):
+		try:
+			fd = _open_fd(file_name)
+		except OSError:
+			keyed.append(((1, 0, 0, index), file_name))
+			continue
+		try:
+			st = os.fstat(fd)
+			block = _first_block(fd) if use_fiemap else None
+		finally:
+			os.close(fd)
+		if block is not None:
+			keyed.append(((0, st.st_dev, 0, block), file_name))
+		else:
+			keyed.append(((0, st.st_dev, 1, st.st_ino), file_name))
+	keyed.sort(key=lambda k:k[0])
+	return [file_name for (_, file_name) in keyed]
@@ -0,0 +1,171 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+from .dataroutines import uint_16
+from .dataroutines import uint_32
+
+from .tags import _IPTCTags
+from .tags import _IPTCNumericTags
+from .tags import _ImageResourceTags
+
+_IPTCKeys = {name:key for (key, name) in _IPTCTags.items()}
+
+# Image resource block signatures, 8BIM is by far the most common
+_ResourceSignatures = [b'8BIM', b'PHUT', b'AgHg', b'DCSR']
+
+_IPTC_RESOURCE = 0x0404
+_IPTC_UTF_8 = b'\x1b%G'
+
+class ImageResources:
+	'''
+		Index of Photoshop image resource blocks (8BIM) as found in the APP13
+		segment of JPEG files or in the ImageResources tag of TIFF files.
+
+		Only the IDs and locations of the blocks are recorded, get() returns a
+		block's data as a memoryview into the original buffer without copying it.
+	'''
+
+	def __init__(self, data:bytes):
+		self._data = memoryview(data)
+		self._blocks = {}   # resource ID -> (offset, length), the first block with an ID counts
+
+		offset = 0
+		end = len(self._data)
+		while offset + 12 <= end:
+			if bytes(self._data[offset:offset+4]) not in _ResourceSignatures:
+				break
+			resource_id = uint_16(self._data, offset + 4, 'big')
+			name_size = (self._data[offset + 6] + 2) & ~1       # Pascal string padded to even length
+			data_offset = offset + 6 + name_size + 4
+			if data_offset > end:
+				break
+			data_length = uint_32(self._data, data_offset - 4, 'big')
+			if data_offset + data_length > end:
+				break
+			self._blocks.setdefault(resource_id, (data_offset, data_length))
+			offset = data_offset + data_length + (data_length & 1)   # data padded to even length
+
+	def __len__(self):
+		return len(self._blocks)
+
+	def __contains__(self, resource_id:int):
+		return resource_id in self._blocks
+
+	def ids(self) -> list:
+		return list(self._blocks.keys())
+
+	def name(self, resource_id:int) -> str:
+		return _ImageResourceTags.get(resource_id, 'Resource 0x{0:04X}'.format(resource_id))
+
+	def location(self, resource_id:int) -> (tuple | None):
+		'''
+			Returns (offset, length) of a block's data in the buffer, None if there is no such block.
+		'''
+		return self._blocks.get(resource_id)
+
+	def get(self, resource_id:int) -> (memoryview | None):
+		if resource_id not in self._blocks:
+			return None
+		offset, length = self._blocks[resource_id]
+		return self._data[offset:offset+length]
+
+	pass
+
+class IPTCIndex:
+	'''
+		Index of IPTC-IIM datasets.
+
+		Building the index records where each dataset is, nothing is decoded.
+		A dataset is decoded when it is asked for, e.g. index['Keywords'] or
+		index['2:25'], and the result is kept for later. Like tags of
+		MediaMetadata, values come as lists since many datasets are repeatable.
+	'''
+
+	def __init__(self, data:bytes, encoding:str = 'utf_8'):
+		self._data = memoryview(data)
+		self._encoding = encoding
+		self._datasets = {}     # record << 8 | dataset -> [(offset, length), ...]
+		self._decoded = {}
+
+		offset = 0
+		end = len(self._data)
+		while offset + 5 <= end:
+			if self._data[offset] != 0x1C:      # Tag marker, anything else is padding or garbage
+				break
+			key = self._data[offset + 1] << 8 | self._data[offset + 2]
+			length = uint_16(self._data, offset + 3, 'big')
+			offset += 5
+			if length & 0x8000:                 # Extended dataset, the length is in the next bytes
+				count = length & 0x7FFF
+				if count > 4 or offset + count > end:
+					break
+				length = int.from_bytes(self._data[offset:offset+count], 'big')
+				offset += count
+			if offset + length > end:
+				break
+			self._datasets.setdefault(key, []).append((offset, length))
+			offset += length
+
+		# Record 1 tells whether text is UTF-8
+		if 0x015A in self._datasets:
+			offset, length = self._datasets[0x015A][0]
+			if bytes(self._data[offset:offset+length]) == _IPTC_UTF_8:
+				self._encoding = 'utf_8'
+
+	def __len__(self):
+		return len(self._datasets)
+
+	def __contains__(self, name:str):
+		return self.__key(name) in self._datasets
+
+	def __getitem__(self, name:str) -> list:
+		key = self.__key(name)
+		if key not in self._datasets:
+			return []
+		if key not in self._decoded:
+			self._decoded[key] = [self.__decode(key, offset, length) for (offset, length) in self._datasets[key]]
+		return self._decoded[key]
+
+	def get(self, name:str, default = None):
+		return self[name] if name in self else default
+
+	def keys(self) -> list:
+		return [_IPTCTags.get(key, '{0}:{1}'.format(key >> 8, key & 0xFF)) for key in self._datasets.keys()]
+
+	def all(self) -> dict:
+		return {name:self[name] for name in self.keys()}
+
+	def __key(self, name:str) -> int:
+		# Datasets are known by names, or by 'record:dataset' numbers
+		if name in _IPTCKeys:
+			return _IPTCKeys[name]
+		record, _, dataset = name.partition(':')
+		if record.isdigit() and dataset.isdigit():
+			return int(record) << 8 | int(dataset)
+		return -1
+
+	def __decode(self, key:int, offset:int, length:int) -> (str | int | bytes):
+		raw = bytes(self._data[offset:offset+length])
+		if key in _IPTCNumericTags:
+			return int.from_bytes(raw, 'big')
+		if key >> 8 in (1, 2):
+			return raw.decode(self._encoding, errors='replace').split('\x00')[0]
+		return raw
+
+	pass
@@ -0,0 +1,165 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+from .dataroutines import uint_16
+from .dataroutines import uint_32
+
+# ISO base media file format (HEIC, AVIF, CR3) box navigation. A box is
+# size:uint32, type, data. Size 1 means a 64-bit size follows the type,
+# size 0 means the box runs to the end of its parent.
+
+def _file_boxes(f, offset:int, end:int, charge):
+	# Yields (box type, data offset, data end) for the boxes of a file in [offset, end)
+	# reading only their headers. charge is called before every read.
+	while offset + 8 <= end:
+		charge(16)
+		f.seek(offset)
+		header = f.read(16)
+		if len(header) < 8:
+			return
+		box_size = uint_32(header, 0, 'big')
+		header_size = 8
+		if box_size == 1:
+			if len(header) < 16:
+				return
+			box_size = int.from_bytes(header[8:16], 'big')
+			header_size = 16
+		elif box_size == 0:
+			box_size = end - offset
+		if box_size < header_size or offset + box_size > end:
+			return
+		yield (bytes(header[4:8]), offset + header_size, offset + box_size)
+		offset += box_size
+
+def _boxes(data:bytes, offset:int, end:int):
+	# Same as _file_boxes() for boxes already in memory
+	end = min(end, len(data))
+	while offset + 8 <= end:
+		box_size = uint_32(data, offset, 'big')
+		header_size = 8
+		if box_size == 1:
+			if offset + 16 > end:
+				return
+			box_size = int.from_bytes(data[offset+8:offset+16], 'big')
+			header_size = 16
+		elif box_size == 0:
+			box_size = end - offset
+		if box_size < header_size or offset + box_size > end:
+			return
+		yield (bytes(data[offset+4:offset+8]), offset + header_size, offset + box_size)
+		offset += box_size
+
+def _item_info(data:bytes, offset:int, end:int, item_types:tuple = None) -> dict:
+	# Reads an iinf box: version, flags, entry count, then infe boxes.
+	# Returns {item ID: (item type, content type)}, content type is only
+	# there for 'mime' items. Only items of item_types are returned if given,
+	# images with thousands of tiles have as many items.
+	if offset + 4 > end:
+		return {}
+	version = data[offset]
+	offset += 4 + (2 if version == 0 else 4)
+
+	items = {}
+	for (box_type, data_offset, data_end) in _boxes(data, offset, end):
+		# infe versions before 2 do not carry item types
+		if box_type != b'infe' or data_offset + 12 > data_end or data[data_offset] < 2:
+			continue
+		p = data_offset + 4
+		if data[data_offset] == 2:
+			item_id = uint_16(data, p, 'big')
+			p += 2
+		else:
+			item_id = uint_32(data, p, 'big')
+			p += 4
+		p += 2 # protection index
+		item_type = bytes(data[p:p+4])
+		p += 4
+		if item_types is not None and item_type not in item_types:
+			continue
+
+		content_type = ''
+		if item_type == b'mime':
+			# item name and content type, both zero terminated
+			name_end = data.find(b'\x00', p, data_end)
+			if name_end != -1:
+				type_end = data.find(b'\x00', name_end + 1, data_end)
+				content_type = bytes(data[name_end+1:type_end if type_end != -1 else data_end]).decode('ascii', errors='replace')
+		items.setdefault(item_id, (item_type, content_type))
+
+	return items
+
+def _item_locations(data:bytes, offset:int, end:int, item_ids = None) -> dict:
+	# Reads an iloc box. Returns {item ID: (construction method, [(offset, length), ...])}.
+	# Construction method 0 - offsets in the file, 1 - offsets in the idat box.
+	# Only items of item_ids are returned if given.
+	if offset + 8 > end:
+		return {}
+	version = data[offset]
+	p = offset + 4
+	offset_size = data[p] >> 4
+	length_size = data[p] & 0x0F
+	base_offset_size = data[p+1] >> 4
+	index_size = data[p+1] & 0x0F if version in (1, 2) else 0
+	p += 2
+	if version < 2:
+		item_count = uint_16(data, p, 'big')
+		p += 2
+	else:
+		item_count = uint_32(data, p, 'big')
+		p += 4
+
+	def number(p:int, size:int) -> int:
+		return int.from_bytes(data[p:p+size], 'big')
+
+	locations = {}
+	for _ in range(item_count):
+		if p + 6 + base_offset_size > end:
+			break
+		if version < 2:
+			item_id = uint_16(data, p, 'big')
+			p += 2
+		else:
+			item_id = uint_32(data, p, 'big')
+			p += 4
+		method = 0
+		if version in (1, 2):
+			method = uint_16(data, p, 'big') & 0x0F
+			p += 2
+		p += 2 # data reference index
+		base_offset = number(p, base_offset_size)
+		p += base_offset_size
+		extent_count = uint_16(data, p, 'big')
+		p += 2
+		if extent_count * max(1, index_size + offset_size + length_size) > end - p:
+			break
+		if item_ids is not None and item_id not in item_ids:
+			p += extent_count * (index_size + offset_size + length_size)
+			continue
+
+		extents = []
+		for _ in range(extent_count):
+			p += index_size
+			if p + offset_size + length_size > end:
+				return locations
+			extents.append((base_offset + number(p, offset_size), number(p + offset_size, length_size)))
+			p += offset_size + length_size
+
+		locations.setdefault(item_id, (method, extents))
+
+	return locations
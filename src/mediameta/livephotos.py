@@ -0,0 +1,82 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+from .mediametadata import MediaMetadata
+
+# A Live Photo is a still image and a short video carrying the same identifier
+_VIDEO_CONTENT_IDENTIFIER = 'com.apple.quicktime.content.identifier'
+_IMAGE_CONTENT_IDENTIFIER = 'MakerNote:ContentIdentifier'
+_BURST_UUID = 'MakerNote:BurstUUID'
+
+def _identifier(meta:MediaMetadata, name:str) -> (str | None):
+	values = meta._raw(name)
+	if len(values) == 0 or not isinstance(values[0], str):
+		return None
+	value = values[0].strip().upper()
+	return value if value != '' else None
+
+def content_identifier(meta:MediaMetadata) -> (str | None):
+	'''
+		Returns the identifier linking the image and the video of a Live
+		Photo, or None. Videos carry it under com.apple.quicktime.content.identifier,
+		images in the Apple MakerNote, which is decoded for it if needed.
+	'''
+	video_identifier = _identifier(meta, _VIDEO_CONTENT_IDENTIFIER)
+	if video_identifier is not None:
+		return video_identifier
+	return _identifier(meta, _IMAGE_CONTENT_IDENTIFIER)
+
+def burst_uuid(meta:MediaMetadata) -> (str | None):
+	'''
+		Returns the UUID shared by the shots of a burst, or None.
+	'''
+	return _identifier(meta, _BURST_UUID)
+
+def pair_live_photos(items) -> list:
+	'''
+		Pairs the images and the videos of Live Photos in a batch by their
+		content identifier with one hash join: videos are hashed by identifier
+		in one pass, images look their video up in another. Returns a list of
+		(image, video) tuples. An image exported twice, e.g. as HEIC and JPEG,
+		is paired with the same video both times.
+	'''
+	videos = {}
+	images = []
+	for meta in items:
+		identifier = content_identifier(meta)
+		if identifier is None:
+			continue
+		if len(meta._raw(_VIDEO_CONTENT_IDENTIFIER)) > 0:
+			videos.setdefault(identifier, []).append(meta)
+		else:
+			images.append((identifier, meta))
+
+	return [(image, video) for (identifier, image) in images for video in videos.get(identifier, [])]
+
+def group_bursts(items) -> list:
+	'''
+		Groups the shots of bursts in a batch by burst UUID in one pass.
+		Returns lists of two or more images, in the order of items.
+	'''
+	bursts = {}
+	for meta in items:
+		uuid = burst_uuid(meta)
+		if uuid is not None:
+			bursts.setdefault(uuid, []).append(meta)
+	return [shots for shots in bursts.values() if len(shots) > 1]
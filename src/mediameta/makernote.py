@@ -0,0 +1,71 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+from .dataroutines import uint_32
+
+def _makernote_layout(note:bytes, make:str, byte_order:str, note_offset:(int | None)) -> (tuple | None):
+	# Tells how to read a MakerNote. Returns (vendor, IFD offset, byte order, delta) or None
+	# if the MakerNote is not understood. IFD offset is relative to the start of the note,
+	# delta turns offsets found in the IFD into offsets in the note. Vendors are recognised
+	# by the header of the note, those writing no header by the Make tag. Some of them count
+	# offsets from the TIFF header of the file, so note_offset, where the note is in the
+	# TIFF/EXIF data, must be known for them.
+	make = make.strip().upper()
+
+	if note.startswith(b'Apple iOS\x00'):
+		# 'Apple iOS', 0x00, version:uint16, 'MM', IFD. Offsets from the start of the note.
+		if len(note) < 16:
+			return None
+		return ('Apple', 14, 'big' if note[12:14] == b'MM' else 'little', 0)
+
+	if note.startswith(b'Nikon\x00\x02'):
+		# 'Nikon', 0x00, version:uint16, 0x0000, then a complete TIFF header. Offsets from that header.
+		if len(note) < 18:
+			return None
+		match bytes(note[10:12]):
+			case b'II':
+				order = 'little'
+			case b'MM':
+				order = 'big'
+			case _:
+				return None
+		return ('Nikon', 10 + uint_32(note, 14, order), order, 10)
+
+	if note.startswith(b'FUJIFILM'):
+		# 'FUJIFILM', IFD offset:uint32. Always little endian, offsets from the start of the note.
+		if len(note) < 12:
+			return None
+		return ('Fujifilm', uint_32(note, 8, 'little'), 'little', 0)
+
+	if note_offset is None:
+		return None
+
+	if note.startswith(b'SONY DSC \x00\x00\x00') or note.startswith(b'SONY CAM \x00\x00\x00'):
+		return ('Sony', 12, byte_order, -note_offset)
+
+	if make.startswith('SONY'):
+		return ('Sony', 0, byte_order, -note_offset)
+
+	if make.startswith('CANON'):
+		return ('Canon', 0, byte_order, -note_offset)
+
+	if make.startswith('NIKON') and not note.startswith(b'Nikon'):
+		return ('Nikon', 0, byte_order, -note_offset)
+
+	return None
@@ -18,262 +18,18 @@
 	SPDX-License-Identifier: MIT
 '''
 import os
-
-# TIFF/EXIF tags
-from .tags import _TiffTags
-from .tags import _ExifTags
-from .tags import _GPSTags
-
-from .dataroutines import str_b
-
-# Interpreters - dictionaries
-Orientation = {
-	1: 'Straight',
-	2: 'Flipped horizontally',
-	3: 'Flipped horizontally and vertically',
-	4: 'Flipped vertically',
-	5: 'Flipped vertically and turned 90 degrees clockwise',
-	6: 'Turned 90 degress counterclockwise',
-	7: 'Flipped vertically and turned 90 degrees counterclockwise',
-	8: 'Turned 90 degress clockwise'
-}
-
-ExposureProgram = {
-	0: 'Not defined',
-	1: 'Manual',
-	2: 'Normal program',
-	3: 'Aperture priority',
-	4: 'Shutter priority',
-	5: 'Creative program',
-	6: 'Action program',
-	7: 'Portrait mode',
-	8: 'Landscape mode'
-}
-
-MeteringMode = {
-	0: 'Unknown',
-	1: 'Average',
-	2: 'CenterWeightedAverage',
-	3: 'Spot',
-	4: 'MultiSpot',
-	5: 'Pattern',
-	6: 'Partial',
-	255: 'Other'
-}
-
-LightSource = {
-	0: 'Unknown',
-	1: 'Daylight',
-	2: 'Fluorescent',
-	3: 'Tungsten (incandescent light)',
-	4: 'Flash',
-	9: 'Fine weather',
-	10: 'Cloudy weather',
-	11: 'Shade',
-	12: 'Daylight fluorescent (D 5700 - 7100K)',
-	13: 'Day white fluorescent (N 4600 - 5400K)',
-	14: 'Cool white fluorescent (W 3900 - 4500K)',
-	15: 'White fluorescent (WW 3200 - 3700K)',
-	17: 'Standard light A',
-	18: 'Standard light B',
-	19: 'Standard light C',
-	20: 'D55',
-	21: 'D65',
-	22: 'D75',
-	23: 'D50',
-	24: 'ISO studio tungsten',
-	255: 'Other'
-}
-
-Flash = {
-	0x0000: 'Flash did not fire',
-	0x0001: 'Flash fired',
-	0x0005: 'Strobe return light not detected',
-	0x0007: 'Strobe return light detected',
-	0x0009: 'Flash fired, compulsory flash mode',
-	0x000D: 'Flash fired, compulsory flash mode, return light not detected',
-	0x000F: 'Flash fired, compulsory flash mode, return light detected',
-	0x0010: 'Flash did not fire, compulsory flash mode',
-	0x0018: 'Flash did not fire, auto mode',
-	0x0019: 'Flash fired, auto mode',
-	0x001D: 'Flash fired, auto mode, return light not detected',
-	0x001F: 'Flash fired, auto mode, return light detected',
-	0x0020: 'No flash function',
-	0x0041: 'Flash fired, red-eye reduction mode',
-	0x0045: 'Flash fired, red-eye reduction mode, return light not detected',
-	0x0047: 'Flash fired, red-eye reduction mode, return light detected',
-	0x0049: 'Flash fired, compulsory flash mode, red-eye reduction mode',
-	0x004D: 'Flash fired, compulsory flash mode, red-eye reduction mode, return light not detected',
-	0x004F: 'Flash fired, compulsory flash mode, red-eye reduction mode, return light detected',
-	0x0059: 'Flash fired, auto mode, red-eye reduction mode',
-	0x005D: 'Flash fired, auto mode, return light not detected, red-eye reduction mode',
-	0x005F: 'Flash fired, auto mode, return light detected, red-eye reduction mode'
-}
-
-SensingMethod = {
-	1: 'Not defined',
-	2: 'One-chip color area sensor',
-	3: 'Two-chip color area sensor',
-	4: 'Three-chip color area sensor',
-	5: 'Color sequential area sensor',
-	7: 'Trilinear sensor',
-	8: 'Color sequential linear sensor'
-}
-
-SceneCaptureType = {
-	0: 'Standard',
-	1: 'Landscape',
-	2: 'Portrait',
-	3: 'Night scene'
-}
-
-SceneType = {
-	1: 'Directly photographed'
-}
-
-CustomRendered = {
-	0: 'Normal process',
-	1: 'Custom process'
-}
-
-WhiteBalance = {
-	0: 'Auto white balance',
-	1: 'Manual white balance'
-}
-
-GainControl = {
-	0: 'None',
-	1: 'Low gain up',
-	2: 'High gain up',
-	3: 'Low gain down',
-	4: 'High gain down'
-}
-
-Contrast = {
-	0: 'Normal',
-	1: 'Soft',
-	2: 'Hard'
-}
-
-Saturation = {
-	0: 'Normal',
-	1: 'Low saturation',
-	2: 'High saturation'
-}
-
-Sharpness = {
-	0: 'Normal',
-	1: 'Soft',
-	2: 'Hard'
-}
-
-SubjectDistanceRange = {
-	0: 'Unknown',
-	1: 'Macro',
-	2: 'Close view',
-	3: 'Distant view'
-}
-
-FileSource = {
-	3: 'DSC'
-}
-
-Components = {
-	0: '',
-	1: 'Y',
-	2: 'Cb',
-	3: 'Cr',
-	4: 'R',
-	5: 'G',
-	6: 'B'
-}
-
-ResolutionUnit = {
-	1: '',
-	2: 'in',
-	3: 'cm'
-}
-FocalPlaneResolutionUnit = ResolutionUnit
-
-PhotometricInterpretation = {
-	0: 'White is zero',
-	1: 'Black is zero',
-	2: 'RGB',
-	3: 'Palette color',
-	4: 'Transparency Mask',
-	5: 'Seperated (CMYK)',
-	6: 'YCbCr',
-	8: 'CIE L*a*b*',
-	9: 'ICC L*a*b*',
-	10: 'ITU L*a*b*',
-	32844: 'Pixar LogL',
-	32845: 'Pixar LogLuv',
-	32803: 'CFA (Color Filter Array)',
-	34892: 'LinearRaw',
-	51177: 'Depth'
-}
-
-Compression = {
-	1: 'No compression',
-	2: 'CCITT Group 3 1-Dimensional Modified Huffman run-length encoding',
-	3: 'CCITT Group 3 fax encoding',
-	4: 'CCITT Group 4 fax encoding',
-	5: 'LZW',
-	6: 'JPEG (old-style)',
-	7: 'JPEG',
-	8: 'Deflate (Adobe)',
-	9: 'JBIG on black and white',
-	10: 'JBIG on color',
-	32773: 'PackBits compression',
-	34892: 'Lossy JPEG'
-}
-
-PlanarConfiguration = {
-	1: 'Chunky',
-	2: 'Planar'
-}
-
-YCbCrPositioning = {
-	1: 'Centered',
-	2: 'Cosited'
-}
-
-ColorSpace = {
-	0x0001: 'sRGB',
-	0xFFFF: 'Uncalibrated'
-}
-
-ExposureMode = {
-	0: 'Auto exposure',
-	1: 'Manual exposure',
-	2: 'Auto bracket'
-}
-
-Predictor = {
-	1: 'No prediction scheme used before coding',
-	2: 'Horizontal differencing',
-	3: 'Floating point horizontal differencing'
-}
-
-GPSAltitudeRef = {
-	0: 'Above sea level',
-	1: 'Below sea level'
-}
-
-GPSSpeedRef = {
-	'K': 'km/h',
-	'M': 'miles/h',
-	'N': 'knots'
-}
-
-GPSImgDirectionRef = {
-	'T': 'True',
-	'M': 'Magnetic'
-}
-
-GPSDestBearingRef = GPSImgDirectionRef
-
-# Interpreters - functions
+import sys
+from time import monotonic
+
+from .iohints import _open_for_scan
+from .iohints import _drop_cache
+from struct import pack, pack_into, unpack_from, calcsize
+from struct import Struct
+from struct import error as struct_error
+from itertools import chain, accumulate, compress
+from operator import itemgetter
+
+# Rational values helpers
 def str_to_rational(a:str) -> (int | float):
 	n, d = list(map(int, a.split('/')))
 	return int(n/d) if n % d == 0 else n/d
@@ -281,80 +37,6 @@ def str_to_rational(a:str) -> (int | float):
 def format_rational(x:int | float, num_digits:int = 2) -> str:
 	return str(x) if isinstance(x, int) else str(round(x, num_digits))
 
-def ExifVersion(v):
-	vbytes = v[0]
-	major = str_b(vbytes[0:2],0,2)
-	if major[0] == '0': major = major[1:2]
-	minor = str_b(vbytes[2:4],0,2)
-	if minor[1] == '0': minor = minor[0:1]
-	return [major + '.' + minor, ]
-
-FlashpixVersion = ExifVersion
-InteroperabilityVersion = ExifVersion
-
-def ExposureTime(t):
-	return [t[0] + ' sec', ]
-
-def ShutterSpeedValue(v):
-	return [format_rational(str_to_rational(v[0])) + ' Ev', ]
-
-ApertureValue = ShutterSpeedValue
-ExposureBiasValue = ShutterSpeedValue
-MaxApertureValue = ShutterSpeedValue
-
-def BrightnessValue(a):
-	n, d = list(map(int, a[0].split('/')))
-	if n == 0xFFFFFFFF:
-		return 'Unknown'
-	bv = str(int(n/d)) if n % d == 0 else str(round(n/d,2))
-	return bv + ' Ev'
-
-def FocalLength(f):
-	return [str(str_to_rational(f[0])) + ' mm', ]
-
-def FocalLengthIn35mmFilm(f):
-	return ['Unknown' if f[0] == 0 else str(f[0]) + ' mm', ]
-
-def LensSpecification(s):
-	min_focal_length = 'f min = ' + format_rational(str_to_rational(s[0])) + ' mm'
-	max_focal_length = 'f max = ' + format_rational(str_to_rational(s[1])) + ' mm'
-	try:
-		min_fn_min_lngth = 'f/' + format_rational(str_to_rational(s[2]))
-	except ZeroDivisionError:
-		min_fn_min_lngth = 'F number unknown'
-	try:
-		min_fn_max_lngth = 'f/' + format_rational(str_to_rational(s[3]))
-	except ZeroDivisionError:
-		min_fn_max_lngth = 'F number unknown'
-	#return [min_focal_length, max_focal_length, min_fn_min_lngth, min_fn_max_lngth]
-	return [min_focal_length + ' (' + min_fn_min_lngth + '), ' + max_focal_length + ' (' + min_fn_max_lngth + ')', ]
-
-def FNumber(f):
-	return ['f/' + format_rational(str_to_rational(f[0])), ]
-
-def GPSLatitude(lat):
-	coord = list(map(lambda x:format_rational(str_to_rational(x)), lat))
-	return [coord[0] + '\xB0' + coord[1] + '\'' + coord[2] + '"', ]
-
-GPSLongitude = GPSLatitude
-
-def GPSHPositioningError(err):
-	return list(map(lambda x:format_rational(str_to_rational(x)) + ' m', err))
-
-def GPSAltitude(alt):
-	return list(map(lambda x:format_rational(str_to_rational(x)) + ' m', alt))
-
-def GPSSpeed(s):
-	return list(map(lambda x:format_rational(str_to_rational(x)), s))
-
-def GPSImgDirection(d):
-	return list(map(lambda x:format_rational(str_to_rational(x)) + '\xB0', d))
-
-GPSDestBearing = GPSImgDirection
-
-def GPSVersionID(id):
-	return [str(id[0]) + '.' + str(id[1]) + '.' + str(id[2]) + '.' + str(id[3]), ]
-
 def GPS_link(lat:str, lat_ref:str, lng:str, lng_ref:str, service:str='google') -> str:
 	'''
 		GPS Maps links - returns an url to a maps service with a pin at the specified location
@@ -399,38 +81,325 @@ def GPS_link(lat:str, lat_ref:str, lng:str, lng_ref:str, service:str='google') -
 
 	return url
 
+def __getattr__(name:str):
+	# Interpreters used to be defined in this module, keep them reachable from here
+	interpreter = None if name.startswith('__') else _default_interpreter(name)
+	if interpreter is None:
+		raise AttributeError("module '" + __name__ + "' has no attribute '" + name + "'")
+	return interpreter
+
+# Interpreters found so far by tag name, None if there is none
+_DefaultInterpreters = {}
+
+def _default_interpreter(name:str):
+	# The interpreters are the dictionaries and functions in interpreters.py named
+	# exactly as the tags they interpret. The module is only loaded the first time
+	# something gets interpreted. Look each name up once.
+	if name not in _DefaultInterpreters:
+		from . import interpreters
+		interpreter = getattr(interpreters, name, None)
+		_DefaultInterpreters[name] = interpreter if callable(interpreter) or isinstance(interpreter, dict) else None
+	return _DefaultInterpreters[name]
+
+# Results of the default interpreters keyed by (tag name, raw values). The same
+# cameras write the same lens, aperture and version values into thousands of
+# files, so a batch mostly interprets values it has seen before.
+class CacheInfo(tuple):
+	# (hits, misses, maxsize, currsize) with names, like the namedtuple of
+	# functools caches. collections would double the import time of the package.
+	__slots__ = ()
+
+	def __new__(cls, hits:int, misses:int, maxsize:int, currsize:int):
+		return tuple.__new__(cls, (hits, misses, maxsize, currsize))
+
+	hits = property(lambda self: self[0])
+	misses = property(lambda self: self[1])
+	maxsize = property(lambda self: self[2])
+	currsize = property(lambda self: self[3])
+
+	def __repr__(self):
+		return 'CacheInfo(hits={0}, misses={1}, maxsize={2}, currsize={3})'.format(*self)
+
+	pass
+
+class _InterpretationCache:
+	def __init__(self, maxsize:int):
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self.__entries = {}     # dicts keep insertion order, the least recently used entry comes first
+
+	def interpret(self, name:str, interpreter, values:list) -> list:
+		# Only plain values are worth keying on, blobs (memoryviews) are interpreted directly
+		if self.maxsize <= 0 or not all(type(v) in (str, int, float, bytes) for v in values):
+			return interpreter(values)
+		key = (name, tuple(values))
+		entries = self.__entries
+		result = entries.pop(key, None)
+		if result is not None:
+			entries[key] = result   # moved to the end
+			self.hits += 1
+			return list(result)
+		self.misses += 1
+		result = interpreter(values)
+		if isinstance(result, list):
+			# Interned, the same strings are shared by all files interpreted
+			entries[key] = tuple(sys.intern(r) if type(r) is str else r for r in result)
+			if len(entries) > self.maxsize:
+				del entries[next(iter(entries))]
+			return list(entries[key])
+		return result
+
+	def info(self) -> CacheInfo:
+		return CacheInfo(self.hits, self.misses, self.maxsize, len(self.__entries))
+
+	def clear(self):
+		self.hits = 0
+		self.misses = 0
+		self.__entries.clear()
+
+	def resize(self, maxsize:int):
+		self.maxsize = maxsize
+		while len(self.__entries) > max(maxsize, 0):
+			del self.__entries[next(iter(self.__entries))]
+
+	pass
+
+_interpretation_cache = _InterpretationCache(4096)
+
+def interpretation_cache_info() -> CacheInfo:
+	'''
+		Returns hits, misses, maxsize and currsize of the cache of interpreted values.
+	'''
+	return _interpretation_cache.info()
+
+def set_interpretation_cache_size(maxsize:int):
+	'''
+		Limits the number of interpreted values kept, 0 turns the cache off.
+	'''
+	_interpretation_cache.resize(maxsize)
+
+def clear_interpretation_cache():
+	_interpretation_cache.clear()
+
+def _metadata_digest(data) -> bytes:
+	# 128 bits tell apart the metadata of any library. hashlib takes longer to
+	# import than the rest of the package, it is only imported when needed.
+	from hashlib import blake2b
+	return blake2b(data, digest_size=16).digest()
+
 class UnsupportedMediaFile(Exception):
 	pass
 
+class ParsingBudgetExceeded(UnsupportedMediaFile):
+	pass
+
+class _PrereadFile:
+	# A file whose first bytes were read already, e.g. to tell its format. Reads
+	# of those bytes are served from memory, the rest is read from the file.
+
+	def __init__(self, f, header:bytes):
+		self._f = f
+		self._header = header
+		self._pos = 0
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def close(self):
+		self._f.close()
+
+	def fileno(self) -> int:
+		return self._f.fileno()
+
+	def tell(self) -> int:
+		return self._pos
+
+	def seek(self, offset:int, whence:int = os.SEEK_SET) -> int:
+		if whence == os.SEEK_CUR:
+			offset += self._pos
+			whence = os.SEEK_SET
+		self._pos = self._f.seek(offset, whence)
+		return self._pos
+
+	def read(self, size:int = -1) -> bytes:
+		data = b''
+		if self._pos < len(self._header):
+			end = len(self._header) if size < 0 else min(len(self._header), self._pos + size)
+			data = self._header[self._pos:end]
+			self._pos = end
+			if size >= 0:
+				size -= len(data)
+				if size == 0:
+					return data
+		self._f.seek(self._pos)
+		rest = self._f.read(size)
+		self._pos += len(rest)
+		return data + rest if len(data) > 0 else rest
+
+	pass
+
+class BlobReference:
+	'''
+		Where a binary tag value is in its file, kept instead of the value
+		itself by ImageMetadata(keep_blobs=False). MediaMetadata.blob()
+		reads the value when it is needed.
+	'''
+	__slots__ = ('offset', 'length')
+
+	def __init__(self, offset:int, length:int):
+		self.offset = offset
+		self.length = length
+
+	def __eq__(self, other):
+		return isinstance(other, BlobReference) and self.offset == other.offset and self.length == other.length
+
+	def __hash__(self):
+		return hash((self.offset, self.length))
+
+	def __repr__(self):
+		return 'BlobReference(' + str(self.offset) + ', ' + str(self.length) + ')'
+
+	pass
+
 class MediaMetadata:
-	# _tags follows {'tag_name':[tag_values_list]} format even if there is only 1 value for tag_name
+	# _tags follows {tag_key:[tag_values_list]} format even if there is only 1 value for tag_key.
+	# tag_key is the tag name unless a descendant overrides _tag_keys() and _tag_name().
 	_tags = {}
 	_interpreted_tags = {}
 	_interpreters = {}
 
-	_nonprintable_tags = []
+	# keys of _tags not shown by __str__()
+	_nonprintable_tags = set()
 
 	_file_name = ''
 	_file_extension = ''
 
 	_international_encoding = ''
 
-	def __init__(self, file_name:str, encoding:str = 'utf_8'):
+	_header = None
+
+	# (offset, length) of the reads from the file in a bulk scan, see _parsed()
+	_read_ranges = None
+
+	# Where the bytes of the file come from if it is not a file of its own,
+	# e.g. a member of an archive, see archives.py
+	_source = None
+
+	# Digest of the raw metadata as read from the file, see duplicates.py
+	_digest = None
+
+	# Per-file work limits. A file that needs more bytes read or more time
+	# to parse raises ParsingBudgetExceeded. Override these class attributes
+	# to change the defaults, or pass read_budget/time_budget to the constructor.
+	read_budget = 256 * 1024 * 1024   # bytes, None for no limit
+	time_budget = 5.0                 # seconds, None for no limit
+
+	# Set to True for scans of many files. Files are then opened without updating
+	# their access time where allowed, with no read-ahead beyond the start of the
+	# file, and the bytes read are dropped from the page cache once parsed.
+	bulk_scan = False
+
+	def __init__(self, file_name:str, encoding:str = 'utf_8', read_budget:int = None, time_budget:float = None,
+		file_type:str = None, header:bytes = None, source = None):
 		self._file_name = file_name
+		self._source = source
 
-		_, ext = os.path.splitext(file_name)
-		self._file_extension = ext.upper()
+		# The format is told by the extension unless the caller knows better, see open()
+		if file_type is not None:
+			self._file_extension = file_type.upper()
+		else:
+			_, ext = os.path.splitext(file_name)
+			self._file_extension = ext.upper()
 
-		self._international_encoding = encoding
-	
-	def __getitem__(self, key:str):
-		value = []
+		# First bytes of the file if the caller has read them already, parsers
+		# get them through _open() instead of reading them again
+		self._header = header
 
-		tags = self._interpreted_tags if self._interpreted_tags != {} else self._tags
+		# open() of a bulk scan has read the header through _open_for_scan()
+		if self.bulk_scan and source is None:
+			self._read_ranges = [(0, len(header))] if header else []
 
-		if key in tags:
-			value = tags[key]
+		self._international_encoding = encoding
 
+		# Per-instance containers, the class-level ones are only defaults
+		self._tags = {}
+		self._interpreted_tags = {}
+		self._nonprintable_tags = set()
+
+		self._start_budget(read_budget, time_budget)
+
+	def _start_budget(self, read_budget:int = None, time_budget:float = None):
+		# (Re)starts the work limits, the constructor does it for parsing the file,
+		# metadata decoded later on demand gets a budget of its own
+		self._bytes_left = read_budget if read_budget is not None else self.read_budget
+		time_limit = time_budget if time_budget is not None else self.time_budget
+		self._deadline = monotonic() + time_limit if time_limit is not None else None
+
+	def _open(self):
+		# Opens the file for parsing
+		if self._source is not None:
+			f = self._source.open()
+		elif self.bulk_scan:
+			f = _open_for_scan(self._file_name, self._read_ranges)
+		else:
+			f = open(self._file_name, 'rb')
+		if self._header:
+			return _PrereadFile(f, self._header)
+		return f
+
+	def _size(self) -> int:
+		return self._source.size if self._source is not None else os.path.getsize(self._file_name)
+
+	def _map(self) -> tuple:
+		# Maps the file for parsing. Returns (the mapping to close when done,
+		# the bytes of the file), the mapping is None if there is nothing to close.
+		if self._source is not None:
+			return self._source.map()
+		import mmap
+		with self._open() as f:
+			mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		return (mapping, mapping)
+
+	def _parsed(self):
+		# Called by the constructors of descendants once the file is parsed
+		self._header = None
+		if self.bulk_scan and self._source is None and self._read_ranges is not None:
+			_drop_cache(self._file_name, self._read_ranges)
+			self._read_ranges = None
+
+	def _charge(self, num_bytes:int = 0):
+		# Accounts for num_bytes about to be read from the file and checks the time
+		# spent so far. Parsers call it before every read and inside every loop
+		# whose length comes from the file.
+		if self._bytes_left is not None:
+			self._bytes_left -= num_bytes
+			if self._bytes_left < 0:
+				raise ParsingBudgetExceeded('Read budget exceeded in ' + self._file_name)
+		if self._deadline is not None and monotonic() > self._deadline:
+			raise ParsingBudgetExceeded('Time budget exceeded in ' + self._file_name)
+	
+	def _tag_keys(self, name:str) -> tuple:
+		# Keys under which a tag name can be stored in _tags. Descendants
+		# storing tags under something else than names override it.
+		return (name, )
+
+	def _tag_name(self, key) -> str:
+		# The reverse of _tag_keys()
+		return key
+
+	def _raw(self, name:str) -> list:
+		# Raw values of a tag regardless of interpretation, [] if there is no such tag
+		for key in self._tag_keys(name):
+			if key in self._tags:
+				return self._tags[key]
+		return []
+
+	@staticmethod
+	def _unwrap(value:list):
 		match len(value):
 			case 0:
 				return None
@@ -439,19 +408,51 @@ class MediaMetadata:
 			case _:
 				return value
 
+	def __getitem__(self, key:str):
+		value = []
+
+		tags = self._interpreted_tags if self._interpreted_tags != {} else self._tags
+
+		for tag_key in self._tag_keys(key):
+			if tag_key in tags:
+				value = tags[tag_key]
+				break
+
+		return self._unwrap(value)
+
 	def __str__(self):
 		as_string = ''
-		for (key, value) in self.all():
+		tags = self._interpreted_tags if self._interpreted_tags != {} else self._tags
+		for (key, value) in tags.items():
 			if key not in self._nonprintable_tags:
-				as_string += key + '\t' + str(value) + os.linesep
+				as_string += self._tag_name(key) + '\t' + str(self._unwrap(value)) + os.linesep
 		return as_string
 
 	def all(self):
-		for key in self.keys():
-			yield (key,self[key])
+		tags = self._interpreted_tags if self._interpreted_tags != {} else self._tags
+		for (key, value) in tags.items():
+			yield (self._tag_name(key), self._unwrap(value))
 
 	def keys(self):
-		return list(self._tags.keys())
+		return [self._tag_name(key) for key in self._tags]
+
+	def blob(self, name:str):
+		'''
+			Returns the binary value of a tag as a bytes-like object, bytes or
+			a memoryview. A value kept as BlobReference is read from the file.
+			Returns None if there is no such tag or its value is not binary.
+		'''
+		values = self._raw(name)
+		if len(values) == 0:
+			return None
+		value = values[0]
+		if isinstance(value, BlobReference):
+			with self._open() as f:
+				f.seek(value.offset)
+				return f.read(value.length)
+		if isinstance(value, (bytes, bytearray, memoryview)):
+			return value
+		return None
 
 	def file_name(self):
 		return self._file_name
@@ -468,14 +469,23 @@ class MediaMetadata:
 
 	def interpret(self):
 		i_tags = {}
-		for key in self.keys():
-			values = self._tags[key]
+		for (key, values) in self._tags.items():
+			name = self._tag_name(key)
 			try: 			# try to use an interpreter
-				interpreter = self._interpreters[key] if key in self._interpreters else globals()[key]
+				if name in self._interpreters:
+					interpreter = self._interpreters[name]
+				else:
+					interpreter = _default_interpreter(name)
+					# The default interpreters depend on the values only, their results are cached
+					if callable(interpreter):
+						i_tags[key] = _interpretation_cache.interpret(name, interpreter, values)
+						continue
 				if callable(interpreter):
 					i_tags[key] = interpreter(values)
 				elif isinstance(interpreter, dict):
 					i_tags[key] = list(map(lambda x:interpreter[x],values))
+				elif interpreter is None:
+					raise LookupError
 				else:
 					i_tags[key] = values 
 			except: 		# no or faulty interpreter
@@ -489,4 +499,606 @@ class MediaMetadata:
 	def revert_interpretation(self):
 		self._interpreted_tags = {}
 
+	# Binary serialisation.
+	# Record layout, all little endian:
+	#   header, see _RECORD_HEADER: magic 'MMMD', version:uint8, length:uint16 of the
+	#     names, tag count:uint32, lengths:uint32, uint8, uint32 of the layout, the
+	#     digest and the state
+	#   names: class name, file name, extension and encoding joined by NUL, as utf_8
+	#   layout of the tags, see _RecordLayout:
+	#     keys of _tags, see _pack_values()
+	#     number:uint32 of the non-printable keys, then the keys, see _pack_values()
+	#     number of values of every tag, see _pack_sizes()
+	#     type codes of the values of all tags one after another, see _pack_codes()
+	#   the values in columns by type, see _pack_columns()
+	#   digest of the raw metadata
+	#   state of the object, see _state_to_bytes()
+	# Every part is packed in a few calls whatever the number of tags, the work
+	# per value is left to struct and to str and bytes methods. Files of the same
+	# camera have the same layout, it is worked out once when records are read.
+	# Only the raw values are stored, call interpret() again after loading if needed.
+	# Records of versions 1 and 2 are read by _unpack_legacy().
+	_MAGIC = b'MMMD'
+	_VERSION = 3
+
+	_KEY_NAME = 0
+	_KEY_TIFF = 1
+	_KEY_GPS = 2
+	_KEY_NAMESPACED = 3
+	_KEY_NONPRINTABLE = 0x80
+
+	_VALUE_UINT8 = 0
+	_VALUE_UINT16 = 1
+	_VALUE_INT32 = 2
+	_VALUE_INT64 = 3
+	_VALUE_RATIONAL = 4
+	_VALUE_SRATIONAL = 5
+	_VALUE_FLOAT = 6
+	_VALUE_STR = 7
+	_VALUE_BYTES = 8
+	_VALUE_MIXED = 9
+	_VALUE_BLOBREF = 10
+
+	# struct format characters of the fixed size value types of versions 1 and 2
+	_VALUE_FORMATS = {0:'B', 1:'H', 2:'i', 3:'q', 4:'I', 5:'i', 6:'d'}
+
+	def to_bytes(self) -> bytes:
+		'''
+			Packs the raw metadata into a compact binary record which
+			from_bytes() turns back into an object of the same class.
+		'''
+		tags = self._tags
+		keys = list(tags)
+		values = list(tags.values())
+		flat = list(chain.from_iterable(values))
+		codes = _type_codes(flat)
+		layout = b''.join((
+			_pack_keys(keys),
+			_COUNT.pack(len(self._nonprintable_tags)),
+			_pack_keys(list(self._nonprintable_tags)),
+			_pack_sizes(list(map(len, values))),
+			_pack_codes(codes)
+		))
+		names = '\x00'.join((type(self).__name__, self._file_name, self._file_extension,
+			self._international_encoding)).encode('utf_8', errors='surrogatepass')
+		digest = self._digest if self._digest is not None else b''
+		state = self._state_to_bytes()
+
+		return b''.join((
+			_RECORD_HEADER.pack(self._MAGIC, self._VERSION, len(names), len(keys), len(layout), len(digest), len(state)),
+			names,
+			layout,
+			_pack_columns(flat, codes),
+			digest,
+			state
+		))
+
+	def _state_to_bytes(self) -> bytes:
+		# What the object needs besides its tags to read more of its file later,
+		# e.g. where the segments it has not read yet are. Descendants override
+		# it and _state_from_bytes().
+		return b''
+
+	def _state_from_bytes(self, data:bytes):
+		pass
+
+	@classmethod
+	def from_bytes(cls, data:bytes, offset:int = 0):
+		'''
+			Restores an object from a record made by to_bytes(). data can be any
+			bytes-like object, e.g. a memoryview over shared memory, offset is
+			where the record starts in it. Raises ValueError if there is no
+			valid record at offset.
+		'''
+		return cls._unpack(data, offset)[0]
+
+	@classmethod
+	def _unpack(cls, data:bytes, offset:int) -> tuple:
+		# Returns (object, offset right after the record)
+		if bytes(data[offset:offset+4]) != cls._MAGIC or len(data) < offset + 5 or data[offset+4] not in (1, 2, cls._VERSION):
+			raise ValueError('Not a mediameta record')
+		try:
+			if data[offset+4] < cls._VERSION:
+				return cls._unpack_legacy(data, offset)
+
+			(_, _, names_length, tag_count, layout_length, digest_length, state_length) = _RECORD_HEADER.unpack_from(data, offset)
+			offset += _RECORD_HEADER.size
+			names = str(data[offset:offset+names_length], 'utf_8', 'surrogatepass').split('\x00')
+			offset += names_length
+			if len(names) != 4:
+				raise ValueError('Corrupt mediameta record')
+
+			target = cls._find_class(names[0])
+			if target is None:
+				raise ValueError('Unknown metadata class ' + names[0])
+			meta = target.__new__(target)
+			(_, meta._file_name, meta._file_extension, meta._international_encoding) = names
+			meta._interpreted_tags = {}
+			meta._bytes_left = None
+			meta._deadline = None
+
+			layout = _RecordLayout.get(bytes(data[offset:offset+layout_length]), tag_count, len(data) - offset - layout_length)
+			offset += layout_length
+			(tags, offset) = layout.unpack_tags(data, offset)
+			meta._tags = tags
+			meta._nonprintable_tags = set(layout.nonprintable)
+
+			meta._digest = bytes(data[offset:offset+digest_length]) if digest_length > 0 else None
+			offset += digest_length
+			if state_length > 0:
+				meta._state_from_bytes(data[offset:offset+state_length])
+			offset += state_length
+		except (struct_error, IndexError, KeyError, TypeError, UnicodeDecodeError) as e:
+			raise ValueError('Corrupt mediameta record') from e
+
+		if offset > len(data):
+			raise ValueError('Corrupt mediameta record')
+		return (meta, offset)
+
+	@classmethod
+	def _unpack_legacy(cls, data:bytes, offset:int) -> tuple:
+		# Records of versions 1 and 2, tag by tag. Returns (object, offset right after the record)
+		def short_str(offset:int) -> tuple:
+			length = data[offset]
+			return (str(data[offset+1:offset+1+length], 'utf_8'), offset + 1 + length)
+
+		version = data[offset+4]
+		offset += 5
+
+		class_name, offset = short_str(offset)
+		target = cls._find_class(class_name)
+		if target is None:
+			raise ValueError('Unknown metadata class ' + class_name)
+
+		meta = target.__new__(target)
+		length = unpack_from('<H', data, offset)[0]
+		meta._file_name = str(data[offset+2:offset+2+length], 'utf_8')
+		offset += 2 + length
+		meta._file_extension, offset = short_str(offset)
+		meta._international_encoding, offset = short_str(offset)
+		meta._tags = {}
+		meta._interpreted_tags = {}
+		meta._nonprintable_tags = set()
+		meta._bytes_left = None
+		meta._deadline = None
+
+		tag_count = unpack_from('<H', data, offset)[0]
+		offset += 2
+
+		from .tags import _GPS_NAMESPACE
+		from .tags import _TagRegistry
+
+		for _ in range(tag_count):
+			kind, key_id = unpack_from('<BH', data, offset)
+			offset += 3
+			match kind & ~cls._KEY_NONPRINTABLE:
+				case cls._KEY_TIFF:
+					key = _TagRegistry[key_id].key if key_id in _TagRegistry else key_id
+				case cls._KEY_GPS:
+					key = _GPS_NAMESPACE | key_id
+					key = _TagRegistry[key].key if key in _TagRegistry else key
+				case cls._KEY_NAMESPACED:
+					key = unpack_from('<H', data, offset)[0] << 16 | key_id
+					key = _TagRegistry[key].key if key in _TagRegistry else key
+					offset += 2
+				case _:
+					key = str(data[offset:offset+key_id], 'utf_8')
+					offset += key_id
+			if kind & cls._KEY_NONPRINTABLE:
+				meta._nonprintable_tags.add(key)
+
+			value_type, value_count = unpack_from('<BI', data, offset)
+			offset += 5
+			values, offset = cls.__unpack_legacy_values(data, offset, value_type, value_count)
+			meta._tags[key] = values
+
+		if version > 1:
+			length = data[offset]
+			meta._digest = bytes(data[offset+1:offset+1+length]) if length > 0 else None
+			offset += 1 + length
+
+		return (meta, offset)
+
+	@classmethod
+	def __unpack_legacy_values(cls, data:bytes, offset:int, value_type:int, count:int) -> tuple:
+		# Returns (values, offset right after them)
+		match value_type:
+			case cls._VALUE_RATIONAL | cls._VALUE_SRATIONAL:
+				pairs = unpack_from('<%d%s' % (2*count, cls._VALUE_FORMATS[value_type]), data, offset)
+				values = [str(pairs[i]) + '/' + str(pairs[i+1]) for i in range(0, 2*count, 2)]
+				offset += 8 * count
+			case cls._VALUE_STR | cls._VALUE_BYTES:
+				values = []
+				for _ in range(count):
+					length = unpack_from('<I', data, offset)[0]
+					chunk = data[offset+4:offset+4+length]
+					values.append(str(chunk, 'utf_8', errors='surrogatepass') if value_type == cls._VALUE_STR else bytes(chunk))
+					offset += 4 + length
+			case cls._VALUE_MIXED:
+				values = []
+				for _ in range(count):
+					value, offset = cls.__unpack_legacy_values(data, offset + 1, data[offset], 1)
+					values += value
+			case cls._VALUE_BLOBREF:
+				numbers = unpack_from('<%dQ' % (2 * count), data, offset)
+				values = [BlobReference(numbers[i], numbers[i+1]) for i in range(0, 2 * count, 2)]
+				offset += 16 * count
+			case _ if value_type in cls._VALUE_FORMATS:
+				fmt = '<%d%s' % (count, cls._VALUE_FORMATS[value_type])
+				values = list(unpack_from(fmt, data, offset))
+				offset += calcsize(fmt)
+			case _:
+				raise ValueError('Corrupt mediameta record')
+
+		return (values, offset)
+
+	@classmethod
+	def _find_class(cls, class_name:str):
+		# Looks up the class to restore among cls and its descendants. The
+		# package imports its classes lazily, a known one is imported first.
+		found = _RestoredClasses.get((cls, class_name))
+		if found is not None:
+			return found
+		if class_name in _MetadataClasses:
+			from importlib import import_module
+			import_module('.' + _MetadataClasses[class_name], __package__)
+		if cls.__name__ == class_name:
+			found = cls
+		else:
+			for subclass in cls.__subclasses__():
+				found = subclass._find_class(class_name)
+				if found is not None:
+					break
+		if found is not None:
+			_RestoredClasses[(cls, class_name)] = found
+		return found
+
 	pass
+
+# Classes found by _find_class(), {(class searched from, class name): class}
+_RestoredClasses = {}
+
+# Header of a record, see MediaMetadata.to_bytes()
+_RECORD_HEADER = Struct('<4sBHIIBI')
+
+# A list of values is packed by type. Its type codes come first, see
+# _pack_codes(), then a column for every type present, in the order of their
+# type codes, with all the values of that type packed in one go:
+#   str - mode:uint8, length:uint32 of the utf_8 text of all of them, then
+#     the text, joined by NUL (_STR_JOINED) or, if one of them has a NUL, cut
+#     by their lengths in characters packed by _pack_sizes() (_STR_CUT)
+#   int - struct format character, 'I' if they all fit in uint32, 'q' if
+#     not, then the integers
+#   float - doubles
+#   bytes - their lengths (see _pack_sizes()), then the bytes of all of them
+#   BlobReference - pairs of uint64 offset and length
+_TYPE_STR = 0
+_TYPE_INT = 1
+_TYPE_FLOAT = 2
+_TYPE_BYTES = 3
+_TYPE_BLOBREF = 4
+_TYPE_MIXED = 0xFF
+
+_TypeCodes = {
+	str: _TYPE_STR,
+	int: _TYPE_INT,
+	float: _TYPE_FLOAT,
+	bytes: _TYPE_BYTES,
+	bytearray: _TYPE_BYTES,
+	memoryview: _TYPE_BYTES,
+	BlobReference: _TYPE_BLOBREF
+}
+
+_IntSizes = {'I':4, 'q':8}
+
+_SIZES_HEADER = Struct('<IB')
+_COUNT = Struct('<I')
+
+# Modes of str columns, see _pack_strs(), and their header: mode:uint8, length:uint32 of the text
+_STR_JOINED = 0
+_STR_CUT = 1
+_STR_COLUMN = Struct('<BI')
+
+def _type_code(value) -> int:
+	# Type code of a value of a subclass of the types in _TypeCodes, e.g. bool
+	for (value_type, code) in _TypeCodes.items():
+		if isinstance(value, value_type):
+			return code
+	raise ValueError('Cannot pack a value of type ' + type(value).__name__)
+
+def _type_codes(values:list) -> bytes:
+	try:
+		return bytes(map(_TypeCodes.__getitem__, map(type, values)))
+	except KeyError:
+		return bytes(map(_type_code, values))
+
+def _pack_codes(codes:bytes) -> bytes:
+	# The code shared by all the values, or _TYPE_MIXED followed by the code of every value
+	if len(codes) > 0 and codes.count(codes[0]) == len(codes):
+		return codes[:1]
+	return bytes((_TYPE_MIXED, )) + codes
+
+def _unpack_codes(data:bytes, offset:int, count:int, limit:int = None) -> tuple:
+	# Returns (codes of count values, offset right after them). Every value
+	# but one takes a byte at least, so there can be no more than limit + 1
+	# values whose columns take limit bytes, the rest of data by default.
+	if count > (len(data) - offset if limit is None else limit) + 1:
+		raise ValueError('Corrupt mediameta record')
+	code = data[offset]
+	if code != _TYPE_MIXED:
+		return (bytes((code, )) * count, offset + 1)
+	codes = bytes(data[offset+1:offset+1+count])
+	if len(codes) != count:
+		raise ValueError('Corrupt mediameta record')
+	return (codes, offset + 1 + count)
+
+def _pack_sizes(sizes) -> bytes:
+	# Non-negative integers: count:uint32, width:uint8, then the integers as
+	# uint8 if they all fit, as uint32 if not
+	if max(sizes, default=0) < 0x100:
+		return _SIZES_HEADER.pack(len(sizes), 1) + bytes(sizes)
+	return _SIZES_HEADER.pack(len(sizes), 4) + pack('<%dI' % len(sizes), *sizes)
+
+def _unpack_sizes(data:bytes, offset:int) -> tuple:
+	# Returns (a sequence of the integers packed by _pack_sizes(), offset right after them)
+	(count, width) = _SIZES_HEADER.unpack_from(data, offset)
+	offset += _SIZES_HEADER.size
+	match width:
+		case 1:
+			sizes = bytes(data[offset:offset+count])
+			if len(sizes) != count:
+				raise ValueError('Corrupt mediameta record')
+		case 4:
+			sizes = unpack_from('<%dI' % count, data, offset)
+		case _:
+			raise ValueError('Corrupt mediameta record')
+	return (sizes, offset + width * count)
+
+def _pack_strs(column) -> bytes:
+	# Joined by NUL unless one of them has a NUL, then cut by their lengths
+	text = '\x00'.join(column)
+	if text.count('\x00') == len(column) - 1:
+		text = text.encode('utf_8', errors='surrogatepass')
+		return b''.join((_STR_COLUMN.pack(_STR_JOINED, len(text)), text))
+	text = ''.join(column).encode('utf_8', errors='surrogatepass')
+	return b''.join((_STR_COLUMN.pack(_STR_CUT, len(text)), _pack_sizes(list(map(len, column))), text))
+
+def _unpack_strs(data:bytes, offset:int, count:int) -> tuple:
+	(mode, size) = _STR_COLUMN.unpack_from(data, offset)
+	offset += _STR_COLUMN.size
+	if mode == _STR_JOINED:
+		column = str(data[offset:offset+size], 'utf_8', 'surrogatepass').split('\x00')
+	else:
+		(lengths, offset) = _unpack_sizes(data, offset)
+		text = str(data[offset:offset+size], 'utf_8', 'surrogatepass')
+		ends = list(accumulate(lengths))
+		if (ends[-1] if ends else 0) != len(text):
+			raise ValueError('Corrupt mediameta record')
+		column = list(map(text.__getitem__, map(slice, [0] + ends[:-1], ends)))
+	if len(column) != count:
+		raise ValueError('Corrupt mediameta record')
+	return (column, offset + size)
+
+def _pack_ints(column) -> bytes:
+	if min(column) >= 0 and max(column) <= 0xFFFFFFFF:
+		return pack('<c%dI' % len(column), b'I', *column)
+	return pack('<c%dq' % len(column), b'q', *column)
+
+def _unpack_ints(data:bytes, offset:int, count:int) -> tuple:
+	fmt = chr(data[offset])
+	if fmt not in _IntSizes:
+		raise ValueError('Corrupt mediameta record')
+	return (list(unpack_from('<%d%s' % (count, fmt), data, offset + 1)), offset + 1 + count * _IntSizes[fmt])
+
+def _pack_floats(column) -> bytes:
+	return pack('<%dd' % len(column), *column)
+
+def _unpack_floats(data:bytes, offset:int, count:int) -> tuple:
+	return (list(unpack_from('<%dd' % count, data, offset)), offset + 8 * count)
+
+def _pack_bytes(column) -> bytes:
+	return _pack_sizes(list(map(len, column))) + b''.join(column)
+
+def _unpack_bytes(data:bytes, offset:int, count:int) -> tuple:
+	(lengths, offset) = _unpack_sizes(data, offset)
+	if len(lengths) != count:
+		raise ValueError('Corrupt mediameta record')
+	return (list(unpack_from('<' + ''.join(map('%ds'.__mod__, lengths)), data, offset)), offset + sum(lengths))
+
+def _pack_blobrefs(column) -> bytes:
+	return pack('<%dQ' % (2 * len(column)), *chain.from_iterable((v.offset, v.length) for v in column))
+
+def _unpack_blobrefs(data:bytes, offset:int, count:int) -> tuple:
+	numbers = iter(unpack_from('<%dQ' % (2 * count), data, offset))
+	return ([BlobReference(*pair) for pair in zip(numbers, numbers)], offset + 16 * count)
+
+# Column packers and unpackers by type code
+_ColumnPackers = (_pack_strs, _pack_ints, _pack_floats, _pack_bytes, _pack_blobrefs)
+_ColumnUnpackers = (_unpack_strs, _unpack_ints, _unpack_floats, _unpack_bytes, _unpack_blobrefs)
+
+# {type codes: [(column packer, getter of the values of its type)]}, see
+# _pack_columns(), emptied when it reaches _MAX_COLUMN_PLANS
+_ColumnPlans = {}
+_MAX_COLUMN_PLANS = 1024
+
+def _column_plan(codes:bytes) -> list:
+	plan = _ColumnPlans.get(codes)
+	if plan is None:
+		plan = [(_ColumnPackers[code], _getter(list(compress(range(len(codes)), map(code.__eq__, codes)))))
+			for code in sorted(set(codes))]
+		if len(_ColumnPlans) >= _MAX_COLUMN_PLANS:
+			_ColumnPlans.clear()
+		_ColumnPlans[codes] = plan
+	return plan
+
+def _pack_columns(values:list, codes:bytes) -> bytes:
+	# The columns of values whose type codes are codes
+	if len(codes) > 0 and codes.count(codes[0]) == len(codes):
+		return _ColumnPackers[codes[0]](values)
+	return b''.join([packer(getter(values)) for (packer, getter) in _column_plan(codes)])
+
+def _unpack_columns(data:bytes, offset:int, codes:bytes) -> tuple:
+	# Returns (the values of the columns in the order of codes, offset right after them)
+	types = sorted(set(codes))
+	if len(types) == 1:
+		return _ColumnUnpackers[types[0]](data, offset, len(codes))
+	columns = [None] * len(_ColumnUnpackers)
+	for code in types:
+		(column, offset) = _ColumnUnpackers[code](data, offset, codes.count(code))
+		columns[code] = iter(column)
+	return (list(map(next, map(columns.__getitem__, codes))), offset)
+
+def _pack_values(values:list) -> bytes:
+	# A list of values of the types in _TypeCodes, see the layout above _TYPE_STR
+	codes = _type_codes(values)
+	return _pack_codes(codes) + _pack_columns(values, codes)
+
+def _unpack_values(data:bytes, offset:int, count:int) -> tuple:
+	# Returns (count values packed by _pack_values(), offset right after them)
+	(codes, offset) = _unpack_codes(data, offset, count)
+	if count == 0:
+		return ([], offset)
+	return _unpack_columns(data, offset, codes)
+
+# _pack_values() of an empty list
+_NO_VALUES = bytes((_TYPE_MIXED, ))
+
+def _pack_keys(keys:list) -> bytes:
+	# Same as _pack_values(), in one call for the integer keys of TIFF/EXIF tags
+	if len(keys) == 0:
+		return _NO_VALUES
+	if type(keys[0]) is int:
+		try:
+			if min(keys) >= 0 and max(keys) <= 0xFFFFFFFF:
+				return pack('<Bc%dI' % len(keys), _TYPE_INT, b'I', *keys)
+		except (TypeError, struct_error):
+			# Not all of them are integers
+			pass
+	return _pack_values(keys)
+
+def _getter(items:list):
+	# itemgetter() returning a tuple whatever the number of items
+	if len(items) == 1:
+		return lambda sequence, item=items[0]: (sequence[item], )
+	if len(items) == 0:
+		return lambda sequence: ()
+	return itemgetter(*items)
+
+class _RecordLayout:
+	# Keys, non-printable keys, number of values of every tag and types of the
+	# values of a record, and how to put the values of its columns back into
+	# lists of tags. Files of the same camera share it, get() works it out
+	# once for all their records.
+
+	__slots__ = ('keys', 'nonprintable', 'codes', 'columns', 'order', 'split')
+
+	# {layout bytes: _RecordLayout}, emptied when it reaches _MAX_LAYOUTS
+	_cache = {}
+	_MAX_LAYOUTS = 1024
+
+	@classmethod
+	def get(cls, data:bytes, tag_count:int, limit:int):
+		# limit is the most bytes the values of the tags can take
+		layout = cls._cache.get(data)
+		if layout is None:
+			layout = cls(data, tag_count, limit)
+			if len(cls._cache) >= cls._MAX_LAYOUTS:
+				cls._cache.clear()
+			cls._cache[data] = layout
+		return layout
+
+	def __init__(self, data:bytes, tag_count:int, limit:int):
+		(self.keys, offset) = _unpack_values(data, 0, tag_count)
+		(nonprintable, offset) = _unpack_values(data, offset + _COUNT.size, _COUNT.unpack_from(data, offset)[0])
+		self.nonprintable = frozenset(nonprintable)
+		(counts, offset) = _unpack_sizes(data, offset)
+		if len(counts) != tag_count:
+			raise ValueError('Corrupt mediameta record')
+		ends = list(accumulate(counts))
+		(self.codes, offset) = _unpack_codes(data, offset, ends[-1] if tag_count > 0 else 0, limit)
+		if offset != len(data):
+			raise ValueError('Corrupt mediameta record')
+
+		# Columns come in the order of type codes, order puts their values back in the order of the tags
+		types = sorted(set(self.codes))
+		self.columns = [(code, self.codes.count(code)) for code in types]
+		self.order = None
+		if len(types) > 1:
+			positions = sorted(range(len(self.codes)), key=self.codes.__getitem__)
+			self.order = _getter(sorted(range(len(positions)), key=positions.__getitem__))
+		self.split = _getter(list(map(slice, [0] + ends[:-1], ends)))
+
+	def unpack_tags(self, data:bytes, offset:int) -> tuple:
+		# Returns (_tags of the record whose columns start at offset, offset right after them)
+		values = []
+		for (code, count) in self.columns:
+			(column, offset) = _ColumnUnpackers[code](data, offset, count)
+			values += column
+		if self.order is not None:
+			values = list(self.order(values))
+		return (dict(zip(self.keys, self.split(values))), offset)
+
+	pass
+
+# Modules of the classes from_bytes() may have to restore, {class name: module}
+_MetadataClasses = {
+	'ImageMetadata': 'imagemetadata',
+	'VideoMetadata': 'videometadata'
+}
+
+# Batch layout: magic 'MMDB', version:uint8, record count:uint32,
+# then every record made by to_bytes() prefixed by its length:uint32
+_BATCH_MAGIC = b'MMDB'
+_BATCH_VERSION = 1
+_BATCH_HEADER = '<4sBI'
+
+def dump_batch(items:list) -> bytes:
+	'''
+		Packs many MediaMetadata objects into one buffer, e.g. to send results
+		of a worker process back in one go or to write them to a cache file.
+	'''
+	records = [meta.to_bytes() for meta in items]
+	return pack(_BATCH_HEADER, _BATCH_MAGIC, _BATCH_VERSION, len(records)) + \
+		b''.join(pack('<I', len(record)) + record for record in records)
+
+def dump_batch_into(buffer, items:list, offset:int = 0) -> int:
+	'''
+		Same as dump_batch() but writes into a writable buffer, e.g. the buf of
+		a multiprocessing.shared_memory.SharedMemory or an mmap, starting at
+		offset. Returns the number of bytes written. Raises ValueError if the
+		buffer is too small.
+	'''
+	records = [meta.to_bytes() for meta in items]
+	size = calcsize(_BATCH_HEADER) + sum(4 + len(record) for record in records)
+	if offset + size > len(buffer):
+		raise ValueError('Buffer is too small for the batch')
+
+	pack_into(_BATCH_HEADER, buffer, offset, _BATCH_MAGIC, _BATCH_VERSION, len(records))
+	position = offset + calcsize(_BATCH_HEADER)
+	for record in records:
+		pack_into('<I', buffer, position, len(record))
+		buffer[position+4:position+4+len(record)] = record
+		position += 4 + len(record)
+
+	return size
+
+def load_batch(buffer, offset:int = 0) -> list:
+	'''
+		Restores the objects packed by dump_batch() or dump_batch_into().
+		buffer can be bytes, a memoryview, an mmap etc.
+	'''
+	magic, version, count = unpack_from(_BATCH_HEADER, buffer, offset)
+	if magic != _BATCH_MAGIC or version != _BATCH_VERSION:
+		raise ValueError('Not a mediameta batch')
+	position = offset + calcsize(_BATCH_HEADER)
+
+	items = []
+	for _ in range(count):
+		length = unpack_from('<I', buffer, position)[0]
+		meta, end = MediaMetadata._unpack(buffer, position + 4)
+		if end != position + 4 + length:
+			raise ValueError('Corrupt mediameta batch')
+		items.append(meta)
+		position += 4 + length
+
+	return items
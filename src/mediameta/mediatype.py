@@ -0,0 +1,105 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+import os
+import builtins
+
+from .mediametadata import UnsupportedMediaFile
+from .mediametadata import MediaMetadata
+from .iohints import _open_for_scan
+
+# How much of a file open() reads to tell its format. The block is handed
+# over to the parser, which reads it from memory rather than from the file.
+_HEADER_SIZE = 4096
+
+# ISO base media file format brands (the major brand of the ftyp box)
+_FtypBrands = {
+	b'qt  ': '.MOV',
+	b'heic': '.HEIC', b'heix': '.HEIC', b'hevc': '.HEIC', b'hevx': '.HEIC',
+	b'heim': '.HEIC', b'heis': '.HEIC', b'mif1': '.HEIF', b'msf1': '.HEIF',
+	b'avif': '.AVIF', b'avis': '.AVIF',
+	b'crx ': '.CR3',
+	b'isom': '.MP4', b'iso2': '.MP4', b'mp41': '.MP4', b'mp42': '.MP4', b'M4V ': '.MP4'
+}
+
+_VideoTypes = ['.MOV', '.MP4']
+
+def sniff(header:bytes) -> (str | None):
+	'''
+		Tells the format of a file from its first bytes (16 are enough) by
+		their magic numbers. Returns the extension mediameta uses for the
+		format, e.g. '.JPG' or '.HEIC', or None if the format is not known.
+	'''
+	if header.startswith(b'\xFF\xD8\xFF'):
+		return '.JPG'
+	if header.startswith(b'\x89PNG\r\n\x1a\n'):
+		return '.PNG'
+	if header.startswith(b'RIFF') and header[8:12] == b'WEBP':
+		return '.WEBP'
+	if header.startswith(b'\x00\x00\x00\x0cJXL \r\n\x87\n') or header.startswith(b'\xFF\x0A'):
+		return '.JXL'
+	if header[4:8] == b'ftyp':
+		brand = header[8:12]
+		if brand in _FtypBrands:
+			return _FtypBrands[brand]
+		# Compatible brands follow the minor version
+		ftyp_end = min(int.from_bytes(header[0:4], 'big'), len(header))
+		for i in range(16, ftyp_end - 3, 4):
+			if header[i:i+4] in _FtypBrands:
+				return _FtypBrands[header[i:i+4]]
+		return None
+	match header[0:4]:
+		case b'II*\x00' | b'MM\x00*':
+			return '.CR2' if header[8:10] == b'CR' else '.TIFF'
+		case b'IIRO' | b'IIRS' | b'MMOR':
+			return '.ORF'
+		case b'IIU\x00':
+			return '.RW2'
+		case _:
+			return None
+
+def open(source, encoding:str = 'utf_8', read_budget:int = None, time_budget:float = None, **options) -> MediaMetadata:
+	'''
+		Opens a media file whatever its name says, returns ImageMetadata or
+		VideoMetadata depending on what the file is. source is a path. Only
+		one small block is read to tell the format and the parser gets that
+		same block, so nothing is read twice. options are passed on to the
+		constructor, e.g. keep_blobs for images. Raises UnsupportedMediaFile
+		if the format is not known.
+	'''
+	file_name = os.fspath(source)
+	with (_open_for_scan(file_name) if MediaMetadata.bulk_scan else builtins.open(file_name, 'rb')) as f:
+		header = f.read(_HEADER_SIZE)
+
+	return _from_header(file_name, header, encoding, read_budget, time_budget, **options)
+
+def _from_header(file_name:str, header:bytes, encoding:str, read_budget:int, time_budget:float, **options) -> MediaMetadata:
+	# Picks the class by the first bytes of the file and hands them over to it
+	file_type = sniff(header)
+	if file_type is None:
+		raise UnsupportedMediaFile('Unknown format of ' + file_name)
+
+	if file_type in _VideoTypes:
+		# Options of images are given for whole batches, videos have no blobs to keep
+		options.pop('keep_blobs', None)
+		from .videometadata import VideoMetadata
+		return VideoMetadata(file_name, encoding, read_budget, time_budget, file_type=file_type, header=header, **options)
+
+	from .imagemetadata import ImageMetadata
+	return ImageMetadata(file_name, encoding, read_budget, time_budget, file_type=file_type, header=header, **options)
@@ -0,0 +1,69 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+from collections import namedtuple
+
+from .dataroutines import uint_32
+from .dataroutines import uint_16
+
+# Tags of the MP Index IFD of the APP2 MPF segment (CIPA DC-007)
+_MPF_VERSION = 0xB000
+_MPF_NUMBER_OF_IMAGES = 0xB001
+_MPF_ENTRY = 0xB002
+
+# Tags of MP Index IFDs are kept apart from the tags of the image
+_MPF_NAMESPACE = 0x70000
+
+_MP_ENTRY_SIZE = 16
+
+# Type codes of MP entries, the lower 24 bits of the image attribute
+_MPImageTypes = {
+	0x000000: 'Undefined',
+	0x010001: 'Large Thumbnail (VGA)',
+	0x010002: 'Large Thumbnail (Full HD)',
+	0x010003: 'Large Thumbnail (4K)',
+	0x010004: 'Large Thumbnail (8K)',
+	0x010005: 'Large Thumbnail (16K)',
+	0x020001: 'Multi-frame Panorama',
+	0x020002: 'Multi-frame Disparity',
+	0x020003: 'Multi-angle',
+	0x030000: 'Baseline MP Primary Image',
+	0x040000: 'Original Preservation Image',
+	0x050000: 'Gain Map Image'
+}
+
+# An image of a Multi-Picture file. offset and size are in bytes from the start
+# of the file, dependents are the numbers (from 1) of the images this one needs.
+MPImage = namedtuple('MPImage', ['type', 'offset', 'size', 'dependents'])
+
+def _mp_entries(entries:bytes, byte_order:str, base:int) -> list:
+	# Decodes the MPEntry value of an MP Index IFD. Offsets count from the TIFF
+	# header of the MPF segment at base in the file, except that of the first
+	# image, which is 0 as it starts the file.
+	images = []
+	for i in range(len(entries) // _MP_ENTRY_SIZE):
+		entry = i * _MP_ENTRY_SIZE
+		attribute = uint_32(entries, entry, byte_order)
+		size = uint_32(entries, entry + 4, byte_order)
+		offset = uint_32(entries, entry + 8, byte_order)
+		dependents = [uint_16(entries, entry + 12, byte_order), uint_16(entries, entry + 14, byte_order)]
+		image_type = attribute & 0xFFFFFF
+		images.append(MPImage(_MPImageTypes.get(image_type, '0x{0:06X}'.format(image_type)),
+			offset + base if offset != 0 else 0, size, [d for d in dependents if d != 0]))
+	return images
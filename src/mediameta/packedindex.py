@@ -0,0 +1,74 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+from array import array
+from struct import pack, unpack_from, calcsize
+
+class _PackedIndex:
+	# Saving and loading of indexes kept in packed arrays, GeoIndex and TimeIndex.
+	# Layout: magic, version, number of entries, then every column of _COLUMNS
+	# as packed values of its array type code, then file names as length-prefixed
+	# utf-8 strings. Descendants set _MAGIC and list their arrays in _COLUMNS as
+	# (attribute name, type code) tuples, keep file names in _names and sort
+	# their entries in build().
+	_MAGIC = b''
+	_VERSION = 1
+	_HEADER = '<4sHI'
+	_COLUMNS = ()
+
+	def build(self):
+		pass
+
+	def to_bytes(self) -> bytes:
+		self.build()
+		names = [name.encode('utf_8') for name in self._names]
+		return b''.join(
+			[pack(self._HEADER, self._MAGIC, self._VERSION, len(names))] +
+			[pack('<%d%s' % (len(names), code), *getattr(self, column)) for (column, code) in self._COLUMNS] +
+			[b''.join(pack('<H', len(name)) + name for name in names)]
+		)
+
+	@classmethod
+	def from_bytes(cls, data:bytes):
+		magic, version, count = unpack_from(cls._HEADER, data, 0)
+		if magic != cls._MAGIC or version != cls._VERSION:
+			raise ValueError('Not a mediameta ' + cls.__name__)
+		offset = calcsize(cls._HEADER)
+		index = cls()
+		for (column, code) in cls._COLUMNS:
+			setattr(index, column, array(code, unpack_from('<%d%s' % (count, code), data, offset)))
+			offset += calcsize('<' + code) * count
+		for _ in range(count):
+			length = unpack_from('<H', data, offset)[0]
+			offset += 2
+			index._names.append(bytes(data[offset:offset+length]).decode('utf_8'))
+			offset += length
+		index._sorted = True
+		return index
+
+	def save(self, file_name:str):
+		with open(file_name, 'wb') as f:
+			f.write(self.to_bytes())
+
+	@classmethod
+	def load(cls, file_name:str):
+		with open(file_name, 'rb') as f:
+			return cls.from_bytes(f.read())
+
+	pass
@@ -0,0 +1,238 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+import os
+import json
+import time
+import socket
+import sqlite3
+from abc import ABC
+from abc import abstractmethod
+
+from .mediametadata import UnsupportedMediaFile
+from .mediametadata import dump_batch
+from .mediametadata import load_batch
+from .iohints import prefetched
+from .iohints import physical_order
+
+# Results of a shard are written to <output directory>/<shard id>.mmb
+_SHARD_SUFFIX = '.mmb'
+
+class ShardQueue(ABC):
+	'''
+		Hands out shards, lists of file paths, to workers. A worker claims a
+		shard for a lease period, renews the lease while it works and marks the
+		shard complete when its results are saved. A shard whose lease expires,
+		because its worker crashed or was pre-empted, is handed out again.
+
+		Subclass it to put the queue into any shared service, implementing
+		all of its methods. SQLiteShardQueue needs nothing but a file.
+	'''
+
+	@abstractmethod
+	def add(self, shard_id:str, paths:list) -> bool:
+		'''
+			Adds a shard unless there is one with the same ID. Returns True if added.
+		'''
+		raise NotImplementedError
+
+	@abstractmethod
+	def claim(self, worker:str, lease:float) -> (tuple | None):
+		'''
+			Returns (shard ID, paths) of a shard nobody works on, or None if there is none.
+		'''
+		raise NotImplementedError
+
+	@abstractmethod
+	def renew(self, shard_id:str, worker:str, lease:float) -> bool:
+		'''
+			Extends the lease. Returns False if the shard is no longer the worker's.
+		'''
+		raise NotImplementedError
+
+	@abstractmethod
+	def complete(self, shard_id:str, worker:str, failed:list):
+		'''
+			Marks the shard done, failed is the list of paths that could not be read.
+		'''
+		raise NotImplementedError
+
+	@abstractmethod
+	def progress(self) -> dict:
+		'''
+			Returns the number of shards by state: 'pending', 'claimed' and 'done'.
+		'''
+		raise NotImplementedError
+
+	pass
+
+class SQLiteShardQueue(ShardQueue):
+	'''
+		ShardQueue in an SQLite database file. Workers of one machine, or of
+		several machines sharing a file system with working file locks, can
+		use the same file. Claims are made in exclusive transactions, so a
+		shard is never handed to two workers at once.
+	'''
+
+	def __init__(self, file_name:str, timeout:float = 60.0):
+		self._connection = sqlite3.connect(file_name, timeout=timeout, isolation_level=None)
+		self._connection.execute('CREATE TABLE IF NOT EXISTS shards ('
+			'id TEXT PRIMARY KEY, paths TEXT NOT NULL, state TEXT NOT NULL DEFAULT \'pending\', '
+			'worker TEXT, lease_end REAL, failed TEXT)')
+
+	def close(self):
+		self._connection.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def add(self, shard_id:str, paths:list) -> bool:
+		cursor = self._connection.execute('INSERT OR IGNORE INTO shards (id, paths) VALUES (?, ?)',
+			(shard_id, json.dumps(paths)))
+		return cursor.rowcount == 1
+
+	def claim(self, worker:str, lease:float) -> (tuple | None):
+		now = time.time()
+		self._connection.execute('BEGIN IMMEDIATE')
+		try:
+			row = self._connection.execute('SELECT id, paths FROM shards WHERE state = \'pending\' '
+				'OR (state = \'claimed\' AND lease_end < ?) ORDER BY id LIMIT 1', (now, )).fetchone()
+			if row is not None:
+				self._connection.execute('UPDATE shards SET state = \'claimed\', worker = ?, lease_end = ? WHERE id = ?',
+					(worker, now + lease, row[0]))
+			self._connection.execute('COMMIT')
+		except BaseException:
+			self._connection.execute('ROLLBACK')
+			raise
+		return (row[0], json.loads(row[1])) if row is not None else None
+
+	def renew(self, shard_id:str, worker:str, lease:float) -> bool:
+		cursor = self._connection.execute('UPDATE shards SET lease_end = ? WHERE id = ? AND worker = ? AND state = \'claimed\'',
+			(time.time() + lease, shard_id, worker))
+		return cursor.rowcount == 1
+
+	def complete(self, shard_id:str, worker:str, failed:list):
+		# A worker whose lease expired may still finish first, the results are the same
+		self._connection.execute('UPDATE shards SET state = \'done\', worker = ?, lease_end = NULL, failed = ? WHERE id = ?',
+			(worker, json.dumps(failed), shard_id))
+
+	def progress(self) -> dict:
+		counts = {'pending': 0, 'claimed': 0, 'done': 0}
+		for (state, count) in self._connection.execute('SELECT state, COUNT(*) FROM shards GROUP BY state'):
+			counts[state] = count
+		return counts
+
+	def failed(self) -> list:
+		'''
+			Returns the paths of all done shards that could not be read.
+		'''
+		paths = []
+		for (failed, ) in self._connection.execute('SELECT failed FROM shards WHERE state = \'done\' ORDER BY id'):
+			paths += json.loads(failed) if failed else []
+		return paths
+
+	pass
+
+def enqueue(queue:ShardQueue, paths, shard_size:int = 1000) -> int:
+	'''
+		Splits paths, an iterable such as the lines of a manifest file, into
+		shards of shard_size and adds them to queue. Shard IDs follow the order
+		of the paths, so enqueueing the same manifest again adds nothing.
+		Returns the number of shards added.
+	'''
+	added = 0
+	shard = []
+	index = 0
+	for path in paths:
+		path = path.rstrip('\r\n') if isinstance(path, str) else os.fspath(path)
+		if len(path) == 0:
+			continue
+		shard.append(path)
+		if len(shard) == shard_size:
+			added += queue.add('%010d' % index, shard)
+			index += 1
+			shard = []
+	if len(shard) > 0:
+		added += queue.add('%010d' % index, shard)
+	return added
+
+def scan_shards(queue:ShardQueue, output_dir:str, worker:str = None, lease:float = 600.0, max_shards:int = None,
+	ordered:bool = False, **options) -> int:
+	'''
+		Worker loop. Claims shards from queue until there are none left, or
+		max_shards are done, reads the metadata of their files with open() and
+		saves the results of every shard as a batch file in output_dir. A shard
+		is marked complete only after its file is saved, which is the checkpoint
+		a restarted run resumes from. ordered reads the files of a shard in
+		physical_order(), for hard disks. options are passed on to open().
+		Returns the number of shards completed.
+	'''
+	from .mediatype import open as open_media
+
+	if worker is None:
+		worker = socket.gethostname() + ':' + str(os.getpid())
+	os.makedirs(output_dir, exist_ok=True)
+
+	completed = 0
+	while max_shards is None or completed < max_shards:
+		claimed = queue.claim(worker, lease)
+		if claimed is None:
+			break
+		(shard_id, paths) = claimed
+		if ordered:
+			paths = physical_order(paths)
+
+		results = []
+		failed = []
+		renewed = time.monotonic()
+		for path in prefetched(paths):
+			try:
+				results.append(open_media(path, **options))
+			except (UnsupportedMediaFile, OSError):
+				failed.append(path)
+			# Keep the shard while working on it
+			if time.monotonic() - renewed > lease / 2:
+				renewed = time.monotonic()
+				queue.renew(shard_id, worker, lease)
+
+		# The batch file is renamed into place so a crash never leaves half of it
+		file_name = os.path.join(output_dir, shard_id + _SHARD_SUFFIX)
+		temp_name = file_name + '.' + str(os.getpid()) + '.tmp'
+		with open(temp_name, 'wb') as f:
+			f.write(dump_batch(results))
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(temp_name, file_name)
+
+		queue.complete(shard_id, worker, failed)
+		completed += 1
+
+	return completed
+
+def load_shards(output_dir:str):
+	'''
+		Yields the metadata objects saved by scan_shards() in output_dir, shard by shard.
+	'''
+	for name in sorted(os.listdir(output_dir)):
+		if name.endswith(_SHARD_SUFFIX):
+			with open(os.path.join(output_dir, name), 'rb') as f:
+				yield from load_batch(f.read())
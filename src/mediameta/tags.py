@@ -188,3 +188,266 @@ _GPSTags = {
 	0x001F: 'GPSHPositioningError'
 }
 
+# IPTC-IIM datasets, the key is record number << 8 | dataset number
+_IPTCTags = {
+	0x0100: 'ModelVersion',
+	0x0105: 'Destination',
+	0x0114: 'FileFormat',
+	0x0116: 'FileVersion',
+	0x011E: 'ServiceIdentifier',
+	0x0128: 'EnvelopeNumber',
+	0x0132: 'ProductID',
+	0x013C: 'EnvelopePriority',
+	0x0146: 'DateSent',
+	0x0150: 'TimeSent',
+	0x015A: 'CodedCharacterSet',
+	0x0164: 'UniqueObjectName',
+
+	0x0200: 'ApplicationRecordVersion',
+	0x0203: 'ObjectTypeReference',
+	0x0204: 'ObjectAttributeReference',
+	0x0205: 'ObjectName',
+	0x0207: 'EditStatus',
+	0x020A: 'Urgency',
+	0x020C: 'SubjectReference',
+	0x020F: 'Category',
+	0x0214: 'SupplementalCategories',
+	0x0216: 'FixtureIdentifier',
+	0x0219: 'Keywords',
+	0x021A: 'ContentLocationCode',
+	0x021B: 'ContentLocationName',
+	0x021E: 'ReleaseDate',
+	0x0223: 'ReleaseTime',
+	0x0225: 'ExpirationDate',
+	0x0226: 'ExpirationTime',
+	0x0228: 'SpecialInstructions',
+	0x022A: 'ActionAdvised',
+	0x022D: 'ReferenceService',
+	0x022F: 'ReferenceDate',
+	0x0232: 'ReferenceNumber',
+	0x0237: 'DateCreated',
+	0x023C: 'TimeCreated',
+	0x023E: 'DigitalCreationDate',
+	0x023F: 'DigitalCreationTime',
+	0x0241: 'OriginatingProgram',
+	0x0246: 'ProgramVersion',
+	0x024B: 'ObjectCycle',
+	0x0250: 'By-line',
+	0x0255: 'By-lineTitle',
+	0x025A: 'City',
+	0x025C: 'Sub-location',
+	0x025F: 'Province-State',
+	0x0264: 'Country-PrimaryLocationCode',
+	0x0265: 'Country-PrimaryLocationName',
+	0x0267: 'OriginalTransmissionReference',
+	0x0269: 'Headline',
+	0x026E: 'Credit',
+	0x0273: 'Source',
+	0x0274: 'CopyrightNotice',
+	0x0276: 'Contact',
+	0x0278: 'Caption-Abstract',
+	0x027A: 'Writer-Editor',
+	0x0282: 'ImageType',
+	0x0283: 'ImageOrientation',
+	0x0287: 'LanguageIdentifier'
+}
+
+# IPTC-IIM datasets holding binary numbers rather than text
+_IPTCNumericTags = [0x0100, 0x0114, 0x0116, 0x0200]
+
+# Photoshop image resource blocks (8BIM) of interest
+_ImageResourceTags = {
+	0x03ED: 'ResolutionInfo',
+	0x0404: 'IPTCNAA',
+	0x0406: 'JPEG_Quality',
+	0x040C: 'PhotoshopThumbnail',
+	0x040F: 'ICC_Profile',
+	0x0421: 'VersionInfo',
+	0x0422: 'EXIFInfo',
+	0x0424: 'XMP',
+	0x0425: 'IPTCDigest'
+}
+
+
+# MakerNote tags of the vendors whose MakerNotes can be decoded
+_AppleMakerNoteTags = {
+	0x0001: 'MakerNoteVersion',
+	0x0004: 'AEStable',
+	0x0005: 'AETarget',
+	0x0006: 'AEAverage',
+	0x0007: 'AFStable',
+	0x0008: 'AccelerationVector',
+	0x000A: 'HDRImageType',
+	0x000B: 'BurstUUID',
+	0x000C: 'FocusDistanceRange',
+	0x000F: 'OISMode',
+	0x0011: 'ContentIdentifier',
+	0x0014: 'ImageCaptureType',
+	0x0015: 'ImageUniqueID',
+	0x0017: 'LivePhotoVideoIndex',
+	0x001F: 'PhotosAppFeatureFlags',
+	0x002B: 'PhotoIdentifier'
+}
+
+_CanonMakerNoteTags = {
+	0x0001: 'CanonCameraSettings',
+	0x0004: 'CanonShotInfo',
+	0x0006: 'CanonImageType',
+	0x0007: 'CanonFirmwareVersion',
+	0x0008: 'FileNumber',
+	0x0009: 'OwnerName',
+	0x000C: 'SerialNumber',
+	0x0010: 'CanonModelID',
+	0x0095: 'LensModel',
+	0x0096: 'InternalSerialNumber'
+}
+
+_NikonMakerNoteTags = {
+	0x0001: 'MakerNoteVersion',
+	0x0002: 'ISO',
+	0x0004: 'Quality',
+	0x0005: 'WhiteBalance',
+	0x0007: 'FocusMode',
+	0x001D: 'SerialNumber',
+	0x0083: 'LensType',
+	0x0084: 'Lens',
+	0x00A7: 'ShutterCount'
+}
+
+_SonyMakerNoteTags = {
+	0x0102: 'Quality',
+	0x0104: 'FlashExposureComp',
+	0x0105: 'Teleconverter',
+	0x0112: 'WhiteBalanceFineTune',
+	0x0115: 'WhiteBalance',
+	0xB000: 'FileFormat',
+	0xB001: 'SonyModelID',
+	0xB020: 'CreativeStyle',
+	0xB027: 'LensType',
+	0xB047: 'JPEGQuality'
+}
+
+_FujifilmMakerNoteTags = {
+	0x0000: 'MakerNoteVersion',
+	0x0010: 'InternalSerialNumber',
+	0x1000: 'Quality',
+	0x1001: 'Sharpness',
+	0x1002: 'WhiteBalance',
+	0x1401: 'FilmMode',
+	0x1404: 'MinFocalLength',
+	0x1405: 'MaxFocalLength',
+	0x1438: 'ImageCount'
+}
+
+# Tag registry.
+# ImageMetadata stores values under integer keys rather than names. The key of a
+# tag from TIFF, EXIF and Interoperability IFDs is its tag ID, the key of a GPS IFD
+# tag is its tag ID moved out of the way by _GPS_NAMESPACE. The registry below is
+# built once at import and maps these keys to what the parser needs to know about
+# a tag. Names are only looked up when someone asks for them.
+_GPS_NAMESPACE = 0x10000
+
+class _TagInfo:
+	__slots__ = ('key', 'name', 'printable', 'decoding')
+
+	def __init__(self, key:int, name:str, printable:(bool | None), decoding:(str | None)):
+		self.key = key
+		self.name = name
+		self.printable = printable      # None - not printable if stored as UNDEFINED (type 7) in the file
+		self.decoding = decoding        # None - decode as per the type found in the file, otherwise 'ascii', 'utf_16' or 'bytes'
+
+# Tags typically holding binary data or long outputs, not shown by __str__()
+_NonprintableTags = [
+	'XMLPacket', 'MakerNote', 'UserComment',
+	'ImageResources', 'ImageDescription',
+	'IPTCNAA', 'StripByteCounts', 'StripOffsets',
+	'InterColorProfile', 'JPEGTables', 'OECF',
+	'SpatialFrequencyResponse', 'CFAPattern',
+	'DeviceSettingDescription', 'ExifIFDPointer',
+	'GPSInfoIFDPointer', 'InteroperabilityIFDPointer'
+]
+
+# UNDEFINED tags which are printable nevertheless
+_PrintableTags = ['ExifVersion', 'FlashpixVersion', 'InteroperabilityVersion']
+
+_TagDecodings = {
+	'XMLPacket': 'bytes',   # XMP data might often be stored as bytes, not ascii, xmp() parses it
+	'XPTitle': 'utf_16',    # windows tags all in utf_16
+	'XPComment': 'utf_16',
+	'XPAuthor': 'utf_16',
+	'XPKeywords': 'utf_16',
+	'XPSubject': 'utf_16',
+	'IPTCNAA': 'bytes',     # kept as is for the IPTC index, often stored as LONG
+	'ImageResources': 'bytes'
+}
+
+def _tag_info(key:int, name:str) -> _TagInfo:
+	printable = False if name in _NonprintableTags else True if name in _PrintableTags else None
+	return _TagInfo(key, name, printable, _TagDecodings.get(name))
+
+_TagRegistry = {tag_id:_tag_info(tag_id, name) for (tag_id, name) in (_TiffTags | _ExifTags).items()} | \
+	{_GPS_NAMESPACE | tag_id:_tag_info(_GPS_NAMESPACE | tag_id, name) for (tag_id, name) in _GPSTags.items()}
+
+_TagKeys = {info.name:key for (key, info) in _TagRegistry.items()}
+
+# Decoded MakerNote tags are named 'MakerNote:' + vendor tag name and are kept
+# in a namespace of their vendor. Vendors share names, so a name stands for as
+# many keys as there are vendors using it.
+_MAKERNOTE_PREFIX = 'MakerNote:'
+
+_MakerNoteNamespaces = {
+	'Apple': 0x20000,
+	'Canon': 0x30000,
+	'Nikon': 0x40000,
+	'Sony': 0x50000,
+	'Fujifilm': 0x60000
+}
+
+_MakerNoteTags = {
+	'Apple': _AppleMakerNoteTags,
+	'Canon': _CanonMakerNoteTags,
+	'Nikon': _NikonMakerNoteTags,
+	'Sony': _SonyMakerNoteTags,
+	'Fujifilm': _FujifilmMakerNoteTags
+}
+
+_TagRegistry |= {_MakerNoteNamespaces[vendor] | tag_id:_tag_info(_MakerNoteNamespaces[vendor] | tag_id, _MAKERNOTE_PREFIX + name)
+	for (vendor, tags) in _MakerNoteTags.items() for (tag_id, name) in tags.items()}
+
+_MakerNoteKeys = {_MAKERNOTE_PREFIX + name:tuple(_MakerNoteNamespaces[vendor] | tag_id
+	for (vendor, vendor_tags) in _MakerNoteTags.items() for (tag_id, tag_name) in vendor_tags.items() if tag_name == name)
+	for tags in _MakerNoteTags.values() for name in tags.values()}
+
+_UnknownTagNames = {}
+
+def _tag_name(key:int) -> str:
+	if key in _TagRegistry:
+		return _TagRegistry[key].name
+	if key not in _UnknownTagNames:
+		tag_id = key & 0xFFFF
+		prefix = _MAKERNOTE_PREFIX if key >= _MakerNoteNamespaces['Apple'] else ''
+		_UnknownTagNames[key] = prefix + 'Tag 0x{0:04X} ({1:05})'.format(tag_id, tag_id)
+	return _UnknownTagNames[key]
+
+def _tag_keys(name:str) -> tuple:
+	# Returns the keys a tag name can stand for. A known name stands for one key,
+	# an unknown tag looks the same whether it came from a GPS IFD or not.
+	if name in _TagKeys:
+		return (_TagKeys[name], )
+	if name in _MakerNoteKeys:
+		return _MakerNoteKeys[name]
+	if name.startswith(_MAKERNOTE_PREFIX):
+		namespaces = _MakerNoteNamespaces.values()
+		name = name[len(_MAKERNOTE_PREFIX):]
+	else:
+		namespaces = (0, _GPS_NAMESPACE)
+	# 'Tag 0xXXXX (DDDDD)'
+	if len(name) != 18 or not name.startswith('Tag 0x') or name[10:12] != ' (' or name[17] != ')':
+		return ()
+	try:
+		tag_id = int(name[6:10], 16)
+	except ValueError:
+		return ()
+	if name[12:17] != '{0:05}'.format(tag_id):
+		return ()
+	return tuple(key for key in (namespace | tag_id for namespace in namespaces) if key not in _TagRegistry)
@@ -0,0 +1,228 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+import os
+import shutil
+import tempfile
+from zlib import crc32
+from fractions import Fraction
+from struct import pack
+
+from .dataroutines import uint_32
+from .dataroutines import uint_16
+
+from .imagemetadata import _TypeSizes
+
+# Formats whose TIFF offsets count from the start of the file, values that
+# grow are appended to the file
+_TiffFiles = ['.TIF', '.TIFF', '.DNG', '.CR2', '.NEF', '.ARW', '.ORF', '.RW2']
+
+# Formats whose TIFF/EXIF data sits in an APP1 segment, values that grow
+# are appended to the segment and the segment alone is rewritten
+_JpegFiles = ['.JPG', '.JPEG']
+
+_APP1_HEADER_LENGTH = 10    # marker, length, 'Exif\x00\x00'
+_MAX_SEGMENT_LENGTH = 0xFFFF
+
+# struct formats of integer TIFF field types
+_IntegerFormats = {1: 'B', 3: 'H', 4: 'I', 6: 'b', 8: 'h', 9: 'i'}
+
+_COPY_CHUNK = 1024 * 1024
+
+def _rational(value, signed:bool) -> tuple:
+	# 'numerator/denominator' as mediameta stores rationals, or a number
+	if isinstance(value, str):
+		numerator, _, denominator = value.partition('/')
+		return (int(numerator), int(denominator) if denominator else 1)
+	fraction = Fraction(value).limit_denominator(0x7FFFFFFF if signed else 0xFFFFFFFF)
+	return (fraction.numerator, fraction.denominator)
+
+def _encode(tag_type:int, values, byte_order:str, encoding:str) -> tuple:
+	# Returns (value bytes, count, values as mediameta stores them) for a field of tag_type
+	if not isinstance(values, (list, tuple)):
+		values = [values]
+	order = '<' if byte_order == 'little' else '>'
+	match tag_type:
+		case 2:
+			text = values[0] if isinstance(values[0], str) else str(values[0])
+			data = text.encode(encoding) + b'\x00'
+			return (data, len(data), [text])
+		case 7 | 1 if len(values) == 1 and isinstance(values[0], (bytes, bytearray, memoryview)):
+			data = bytes(values[0])
+			return (data, len(data), [data] if tag_type == 7 else list(data))
+		case 1 | 3 | 4 | 6 | 8 | 9:
+			numbers = [int(v) for v in values]
+			return (pack(order + str(len(numbers)) + _IntegerFormats[tag_type], *numbers), len(numbers), numbers)
+		case 7:
+			data = bytes(int(v) for v in values)
+			return (data, len(data), [data])
+		case 5 | 10:
+			rationals = [_rational(v, tag_type == 10) for v in values]
+			fmt = order + ('ii' if tag_type == 10 else 'II') * len(rationals)
+			data = pack(fmt, *[n for pair in rationals for n in pair])
+			return (data, len(rationals), [str(n) + '/' + str(d) for (n, d) in rationals])
+		case _:
+			raise ValueError('Writing TIFF field type ' + str(tag_type) + ' is not supported')
+
+def _read(f, offset:int, length:int) -> bytes:
+	f.seek(offset)
+	data = f.read(length)
+	if len(data) != length:
+		raise ValueError('Unexpected end of file')
+	return data
+
+def _plan(meta, changes:dict) -> tuple:
+	# Works out the patches, (file offset, length replaced, new bytes), that make
+	# the changes. Returns (patches, values as mediameta stores them by key, new
+	# length of the TIFF data).
+	if meta._source is not None:
+		raise ValueError('Members of archives cannot be updated, ' + meta._file_name)
+	entry_offsets = meta._ifd_entries()
+	if meta._exif_location is None or len(entry_offsets) == 0:
+		raise ValueError('No TIFF/EXIF data to update in ' + meta._file_name)
+	(base, tiff_length) = meta._exif_location
+	byte_order = meta._byte_order
+	order = '<' if byte_order == 'little' else '>'
+	file_type = meta._file_extension
+	file_size = os.path.getsize(meta._file_name)
+
+	patches = []    # in TIFF coordinates, relative to base
+	grown = bytearray()
+	stored = {}
+
+	with open(meta._file_name, 'rb') as f:
+		for (name, values) in changes.items():
+			keys = [key for key in meta._tag_keys(name) if key in entry_offsets]
+			if len(keys) == 0:
+				raise KeyError('No ' + name + ' tag to update in ' + meta._file_name)
+			key = keys[0]
+			entry_offset = entry_offsets[key]
+
+			# The entry is read again, a file changed since it was parsed is not patched blindly
+			entry = _read(f, base + entry_offset, 12)
+			if uint_16(entry, 0, byte_order) != key & 0xFFFF:
+				raise ValueError('The IFD entry of ' + name + ' has moved in ' + meta._file_name)
+			tag_type = uint_16(entry, 2, byte_order)
+			old_count = uint_32(entry, 4, byte_order)
+			old_size = old_count * _TypeSizes.get(tag_type, 1)
+
+			(data, count, stored[key]) = _encode(tag_type, values, byte_order, meta._international_encoding)
+
+			if len(data) <= 4:
+				# Fits into the entry itself
+				patches.append((entry_offset + 4, 8, pack(order + 'I', count) + data.ljust(4, b'\x00')))
+			elif old_size > 4 and len(data) <= old_size:
+				# Fits where the old value was
+				value_offset = uint_32(entry, 8, byte_order)
+				patches.append((entry_offset + 4, 4, pack(order + 'I', count)))
+				patches.append((value_offset, old_size, data.ljust(old_size, b'\x00')))
+			elif file_type in _TiffFiles or file_type in _JpegFiles:
+				# Appended after the TIFF data at a word boundary
+				grown += b'\x00' * ((tiff_length + len(grown)) & 1)
+				value_offset = tiff_length + len(grown)
+				grown += data
+				patches.append((entry_offset + 4, 8, pack(order + 'II', count, value_offset)))
+			else:
+				raise ValueError('The new value of ' + name + ' does not fit in place in ' + meta._file_name)
+
+		for (offset, length, _) in patches:
+			if offset < 0 or offset + length > tiff_length:
+				raise ValueError('The value of a tag lies outside the TIFF data of ' + meta._file_name)
+
+		if len(grown) > 0 and file_type in _JpegFiles:
+			# The APP1 segment is rebuilt with the values appended and replaces the old one
+			segment_offset = base - _APP1_HEADER_LENGTH
+			segment = bytearray(_read(f, segment_offset, _APP1_HEADER_LENGTH + tiff_length))
+			if uint_16(segment, 0, 'big') != 0xFFE1 or segment[4:10] != b'Exif\x00\x00':
+				raise ValueError('No APP1 segment where the EXIF data was in ' + meta._file_name)
+			for (offset, length, data) in patches:
+				segment[_APP1_HEADER_LENGTH + offset:_APP1_HEADER_LENGTH + offset + length] = data
+			segment += grown
+			if len(segment) - 2 > _MAX_SEGMENT_LENGTH:
+				raise ValueError('The EXIF data would not fit into one APP1 segment in ' + meta._file_name)
+			segment[2:4] = pack('>H', len(segment) - 2)
+			return ([(segment_offset, _APP1_HEADER_LENGTH + tiff_length, bytes(segment))], stored, len(segment) - _APP1_HEADER_LENGTH)
+
+		patches = [(base + offset, length, data) for (offset, length, data) in patches]
+		if len(grown) > 0:
+			# TIFF offsets count from the start of the file, it ends with the new values
+			patches.append((file_size, 0, bytes(grown)))
+
+		if file_type == '.PNG':
+			# The eXIf chunk is followed by its CRC, which covers the chunk type and data
+			chunk = bytearray(_read(f, base - 4, 4 + tiff_length))
+			for (offset, length, data) in patches:
+				chunk[4 + offset - base:4 + offset - base + length] = data
+			patches.append((base + tiff_length, 4, pack('>I', crc32(chunk))))
+
+	return (patches, stored, tiff_length + len(grown))
+
+def _apply_in_place(file_name:str, patches:list):
+	# Positioned writes into the file itself, nothing else is touched
+	fd = os.open(file_name, os.O_WRONLY)
+	try:
+		for (offset, _, data) in patches:
+			if hasattr(os, 'pwrite'):
+				os.pwrite(fd, data, offset)
+			else:
+				os.lseek(fd, offset, os.SEEK_SET)
+				os.write(fd, data)
+		os.fsync(fd)
+	finally:
+		os.close(fd)
+
+def _apply_by_copy(file_name:str, patches:list):
+	# Writes a patched copy next to the file and renames it over the file,
+	# so the file is either the old one or the new one whatever happens
+	directory = os.path.dirname(os.path.abspath(file_name))
+	(fd, temp_name) = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(file_name) + '.')
+	try:
+		with open(file_name, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+			position = 0
+			for (offset, length, data) in sorted(patches, key=lambda p:p[0]):
+				_copy(src, dst, offset - position)
+				dst.write(data)
+				position = offset + length
+				src.seek(position)
+			shutil.copyfileobj(src, dst, _COPY_CHUNK)
+			dst.flush()
+			os.fsync(dst.fileno())
+		shutil.copymode(file_name, temp_name)
+		os.replace(temp_name, file_name)
+	except BaseException:
+		os.unlink(temp_name)
+		raise
+
+def _copy(src, dst, length:int):
+	while length > 0:
+		chunk = src.read(min(length, _COPY_CHUNK))
+		if len(chunk) == 0:
+			break
+		dst.write(chunk)
+		length -= len(chunk)
+
+def _update(meta, changes:dict, dry_run:bool, atomic:bool) -> tuple:
+	(patches, stored, tiff_length) = _plan(meta, changes)
+	if not dry_run:
+		resized = any(length != len(data) for (_, length, data) in patches if length > 0)
+		if atomic or resized:
+			_apply_by_copy(meta._file_name, patches)
+		else:
+			_apply_in_place(meta._file_name, patches)
+	return (patches, stored, tiff_length)
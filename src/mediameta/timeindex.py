@@ -0,0 +1,222 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+import re
+from array import array
+from bisect import bisect_left
+from calendar import timegm
+
+from .mediametadata import MediaMetadata
+from .packedindex import _PackedIndex
+
+_SECONDS_PER_DAY = 86400
+
+# EXIF DateTime* tags: 'YYYY:MM:DD HH:MM:SS', some software writes '-' as the date separator
+_EXIF_DATETIME = re.compile(r'^\s*(\d{4})[:-](\d{2})[:-](\d{2})[ T](\d{2}):(\d{2}):(\d{2})')
+# EXIF OffsetTime* tags: '+03:00'
+_EXIF_OFFSET = re.compile(r'^\s*([+-])(\d{2}):?(\d{2})')
+# QuickTime creationdate: '2022-08-14T12:34:56+0300', the offset can also be '+03:00' or 'Z'
+_ISO8601 = re.compile(r'^\s*(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,]\d+)?\s*(Z|[+-]\d{2}:?\d{2})?')
+
+def offset_to_seconds(offset:str) -> (int | None):
+	'''
+		Converts a '+HH:MM' (or '+HHMM', or 'Z') UTC offset to seconds.
+		Returns None if the offset cannot be understood.
+	'''
+	# Malformed files store offsets with any type
+	if not isinstance(offset, str):
+		return None
+	if offset.strip() == 'Z':
+		return 0
+	m = _EXIF_OFFSET.match(offset)
+	if m is None:
+		return None
+	seconds = int(m.group(2)) * 3600 + int(m.group(3)) * 60
+	return -seconds if m.group(1) == '-' else seconds
+
+def EXIF_to_epoch(date_time:str, offset:(str | None) = None, default_offset:int = 0) -> (int | None):
+	'''
+		Converts an EXIF 'YYYY:MM:DD HH:MM:SS' date and time to a UTC epoch
+		timestamp. offset is the value of the matching OffsetTime* tag, if there
+		is one. EXIF dates carry no time zone by themselves, so without an offset
+		default_offset (in seconds east of UTC) is assumed.
+		Returns None if the date cannot be understood.
+	'''
+	if not isinstance(date_time, str):
+		return None
+	m = _EXIF_DATETIME.match(date_time)
+	if m is None:
+		return None
+
+	shift = offset_to_seconds(offset) if offset else None
+	if shift is None:
+		shift = default_offset
+
+	try:
+		return timegm(tuple(map(int, m.groups())) + (0, 0, 0)) - shift
+	except (ValueError, OverflowError):
+		return None
+
+def ISO8601_to_epoch(date_time:str, default_offset:int = 0) -> (int | None):
+	'''
+		Converts an ISO 8601 date and time, e.g. '2022-08-14T12:34:56+0300', to
+		a UTC epoch timestamp. Without an explicit offset default_offset (in
+		seconds east of UTC) is assumed. Returns None if the date cannot be
+		understood.
+	'''
+	if not isinstance(date_time, str):
+		return None
+	m = _ISO8601.match(date_time)
+	if m is None:
+		return None
+
+	shift = offset_to_seconds(m.group(7)) if m.group(7) else None
+	if shift is None:
+		shift = default_offset
+
+	try:
+		return timegm(tuple(map(int, m.groups()[:6])) + (0, 0, 0)) - shift
+	except (ValueError, OverflowError):
+		return None
+
+def capture_timestamp(meta:MediaMetadata, default_offset:int = 0) -> (int | None):
+	'''
+		Returns the capture date and time of an image or a video as a UTC epoch
+		timestamp, or None if the file does not record it.
+
+		Images use DateTimeOriginal with OffsetTimeOriginal, falling back to
+		DateTimeDigitized/OffsetTimeDigitized and DateTime/OffsetTime. Videos use
+		com.apple.quicktime.creationdate. Raw (not interpreted) values are used.
+	'''
+	for (date_key, offset_key) in [
+		('DateTimeOriginal', 'OffsetTimeOriginal'),
+		('DateTimeDigitized', 'OffsetTimeDigitized'),
+		('DateTime', 'OffsetTime')]:
+		date_time = meta._raw(date_key)
+		if len(date_time) > 0:
+			offset = meta._raw(offset_key)
+			ts = EXIF_to_epoch(date_time[0], offset[0] if len(offset) > 0 else None, default_offset)
+			if ts is not None:
+				return ts
+
+	creation_date = meta._raw('com.apple.quicktime.creationdate')
+	if len(creation_date) > 0:
+		return ISO8601_to_epoch(creation_date[0], default_offset)
+
+	return None
+
+class TimeIndex(_PackedIndex):
+	'''
+		Time-range index over the capture timestamps of a batch of media files.
+
+		Timestamps are kept in a packed array of 64-bit integers sorted in
+		ascending order, so range queries and per-day counts are answered by
+		bisection without touching the individual entries.
+	'''
+	# Serialisation layout: magic, version, number of entries, then timestamps as packed
+	# 64-bit integers, then file names as length-prefixed utf-8 strings.
+	_MAGIC = b'MMTI'
+	_COLUMNS = (('_ts', 'q'), )
+
+	def __init__(self):
+		self._ts = array('q')
+		self._names = []
+		self._sorted = True
+
+	def __len__(self):
+		return len(self._names)
+
+	def add(self, file_name:str, timestamp:int):
+		self._ts.append(timestamp)
+		self._names.append(file_name)
+		self._sorted = False
+
+	def add_metadata(self, meta:MediaMetadata, default_offset:int = 0) -> bool:
+		'''
+			Adds the capture timestamp of meta to the index. Returns False if meta
+			does not record when it was captured.
+		'''
+		ts = capture_timestamp(meta, default_offset)
+		if ts is None:
+			return False
+		self.add(meta.file_name(), ts)
+		return True
+
+	def build(self):
+		'''
+			Sorts the entries by timestamp. Queries call it implicitly, call it
+			explicitly to pay the sorting cost up front.
+		'''
+		if self._sorted:
+			return
+		order = sorted(range(len(self._names)), key=self._ts.__getitem__)
+		self._ts = array('q', (self._ts[i] for i in order))
+		self._names = [self._names[i] for i in order]
+		self._sorted = True
+
+	def first(self) -> (int | None):
+		self.build()
+		return self._ts[0] if len(self._ts) > 0 else None
+
+	def last(self) -> (int | None):
+		self.build()
+		return self._ts[-1] if len(self._ts) > 0 else None
+
+	def count(self, start:int, end:int) -> int:
+		'''
+			Number of files captured in [start, end).
+		'''
+		self.build()
+		return max(0, bisect_left(self._ts, end) - bisect_left(self._ts, start))
+
+	def range(self, start:int, end:int) -> list:
+		'''
+			Returns a list of (timestamp, file_name) tuples captured in
+			[start, end), oldest first.
+		'''
+		self.build()
+		lo = bisect_left(self._ts, start)
+		hi = bisect_left(self._ts, end)
+		return list(zip(self._ts[lo:hi], self._names[lo:hi]))
+
+	def per_day(self, start:(int | None) = None, end:(int | None) = None, utc_offset:int = 0) -> list:
+		'''
+			Returns a list of (day_start, count) tuples for every day in [start, end)
+			that has at least one file. Days begin at midnight in the time zone
+			utc_offset seconds east of UTC, day_start is the UTC timestamp of that
+			midnight. start and end default to the whole index.
+		'''
+		self.build()
+		if len(self._ts) == 0:
+			return []
+
+		lo = bisect_left(self._ts, start) if start is not None else 0
+		hi = bisect_left(self._ts, end) if end is not None else len(self._ts)
+
+		buckets = []
+		while lo < hi:
+			local = self._ts[lo] + utc_offset
+			day_start = local - local % _SECONDS_PER_DAY - utc_offset
+			next_lo = min(hi, bisect_left(self._ts, day_start + _SECONDS_PER_DAY, lo, hi))
+			buckets.append((day_start, next_lo - lo))
+			lo = next_lo
+
+		return buckets
+
+	pass
@@ -18,8 +18,6 @@
 	SPDX-License-Identifier: MIT
 '''
 
-import os
-
 from .dataroutines import str_b
 
 from .mediametadata import UnsupportedMediaFile
@@ -27,156 +25,144 @@ from .mediametadata import MediaMetadata
 
 class VideoMetadata(MediaMetadata):
 
-	def __init__(self, file_name:str, encoding:str = 'utf_8'):
-		super().__init__(file_name, encoding)
-
-		match self._file_extension:
-			case '.MOV':
-				tags_list = self.__find_meta_mov(file_name)
-			case _: # UPNEXT: mp4
-				raise UnsupportedMediaFile
+	def __init__(self, file_name:str, encoding:str = 'utf_8', read_budget:int = None, time_budget:float = None,
+		file_type:str = None, header:bytes = None, source = None):
+		super().__init__(file_name, encoding, read_budget, time_budget, file_type, header, source)
+
+		try:
+			match self._file_extension:
+				case '.MOV':
+					tags_list = self.__find_meta_mov(file_name)
+				case _: # UPNEXT: mp4
+					raise UnsupportedMediaFile
+		finally:
+			self._parsed()
 		
 		if tags_list is None:
 			raise UnsupportedMediaFile
 
-		for i in range(len(tags_list)):
-			key = str_b(tags_list[i][0], 0, len(tags_list[i][0]), encoding)
-			value = str_b(tags_list[i][1], 0, len(tags_list[i][1]), encoding)
+		for (key_name, key_value) in tags_list.values():
+			# ilst may refer to keys that are not there in a broken file
+			if len(key_name) == 0:
+				continue
+			key = str_b(key_name, 0, len(key_name), encoding)
+			value = str_b(key_value, 0, len(key_value), encoding)
 			self._tags[key] = [value]
 
-	def __find_meta_mov(self, file_name:str):
-		# Sanity check
-		file_size = os.path.getsize(file_name)
-		if file_size < 8:
-			return None
+	def __read_atoms(self, f, offset:int, end:int) -> dict:
+		# Reads the headers of atoms found between offset and end.
+		# Returns {atom_name:[atom_size, offset]}. Reading stops at the
+		# first atom that does not add up as the rest cannot be trusted.
+		atoms = {}
 
-		f = open(file_name, 'rb')
-
-		# Read the top level atoms.
-		# We assume to find the 'moov' atom among them.
-		offset = 0
-		moov_atom_offset = -1
-		moov_atom_size = -1
-
-		qt_atoms = {}
-		qt_atom_index = 0
-
-		while offset < file_size:
+		while offset + 8 <= end:
+			self._charge(8)
 			f.seek(offset)
 			atom_size = int.from_bytes(f.read(4), 'big')
 			atom_name = f.read(4)
+			header_size = 8
 
 			if atom_size == 0:
-				atom_size = file_size - offset
+				atom_size = end - offset
 			elif atom_size == 1:
+				self._charge(8)
 				atom_size = int.from_bytes(f.read(8), 'big')
+				header_size = 16
 
-			qt_atoms[qt_atom_index] = [atom_name, atom_size, offset]
+			# An atom must at least hold its own header and must not run
+			# past its parent, otherwise we could loop or jump anywhere
+			if atom_size < header_size or offset + atom_size > end:
+				break
 
-			if atom_name == b'moov':
-				moov_atom_offset = offset
-				moov_atom_size = atom_size
-				#break - if we do not wish to read all atom names at the current level
+			if atom_name not in atoms:
+				atoms[atom_name] = [atom_size, offset]
 
-			qt_atom_index += 1
 			offset += atom_size
 
-		if moov_atom_offset == -1:
-			return None
-
-		# Now dive into the 'moov' atom looking for 'meta' subatom.
-		offset = moov_atom_offset + 4 + 4       # 4 bytes - size, 4 bytes = 'moov', then the first subatom of 'moov' atom starts
-		meta_atom_offset = -1
-		meta_atom_size = -1
-		qt_moov_atoms = {}
-		qt_atom_index = 0
-
-		while offset < moov_atom_offset + moov_atom_size:
-			f.seek(offset)
-			atom_size = int.from_bytes(f.read(4), 'big')
-			atom_name = f.read(4)
-
-			if atom_size == 0:
-				atom_size = file_size - offset
-			elif atom_size == 1:
-				atom_size = int.from_bytes(f.read(8), 'big')
-
-			qt_moov_atoms[qt_atom_index] = [atom_name, atom_size, offset]
-
-			if atom_name == b'meta':
-				meta_atom_offset = offset
-				meta_atom_size = atom_size
-				#break - if we do not wish to read all atom names at the current level
+		return atoms
 
-			qt_atom_index += 1
-			offset += atom_size
-
-		if meta_atom_offset == -1:
+	def __find_meta_mov(self, file_name:str):
+		# Sanity check
+		file_size = self._size()
+		if file_size < 8:
 			return None
 
-		# 'meta' atom found. We need to read its 'keys' and 'ilst' subatoms
-		# to get the metadata. Hopefully it will contain the date and time information.
-		offset = meta_atom_offset + 4 + 4       # 4 bytes - size, 4 bytes = 'meta', then the first subatom of 'meta' atom starts
-
-		qt_meta_atoms = {}
-		qt_atom_index = 0
-
-		while offset < meta_atom_offset + meta_atom_size:
-			f.seek(offset)
-			atom_size = int.from_bytes(f.read(4), 'big')
-			atom_name = f.read(4)
-
-			if atom_size == 0:
-				atom_size = file_size - offset
-			elif atom_size == 1:
-				atom_size = int.from_bytes(f.read(8), 'big')
-
-			qt_meta_atoms[atom_name] = [atom_size, offset]
-
-			qt_atom_index += 1
-			offset += atom_size
-
-		# 'keys' and 'ilst' subatoms found. Read them. 
-		if b'keys' in qt_meta_atoms and b'ilst' in qt_meta_atoms:
-			qt_meta_keys = {0:[b'',b'']}
-
-			keys_offset = qt_meta_atoms[b'keys'][1] + 4 + 4 + 4  # Skip size, type and 4 zero bytes of 'keys' atom 
-			ilst_offset = qt_meta_atoms[b'ilst'][1] + 4 + 4      # Skip size, type of 'ilst' atom
-			
-			f.seek(keys_offset)
-			entry_count = int.from_bytes(f.read(4), 'big')
-			keys_offset += 4
-
-			for i in range(entry_count):
-				# each entry in 'keys' has the following format: 
-				# key_size:unit32, namespace:unit32, key_name:array of bytes with sizeof(key_name) = key_size - 8
+		with self._open() as f:
+			# Read the top level atoms.
+			# We assume to find the 'moov' atom among them.
+			qt_atoms = self.__read_atoms(f, 0, file_size)
+			if b'moov' not in qt_atoms:
+				return None
+			moov_atom_size, moov_atom_offset = qt_atoms[b'moov']
+
+			# Now dive into the 'moov' atom looking for 'meta' subatom.
+			# 4 bytes - size, 4 bytes = 'moov', then the first subatom of 'moov' atom starts
+			qt_moov_atoms = self.__read_atoms(f, moov_atom_offset + 4 + 4, moov_atom_offset + moov_atom_size)
+			if b'meta' not in qt_moov_atoms:
+				return None
+			meta_atom_size, meta_atom_offset = qt_moov_atoms[b'meta']
+
+			# 'meta' atom found. We need to read its 'keys' and 'ilst' subatoms
+			# to get the metadata. Hopefully it will contain the date and time information.
+			# 4 bytes - size, 4 bytes = 'meta', then the first subatom of 'meta' atom starts
+			qt_meta_atoms = self.__read_atoms(f, meta_atom_offset + 4 + 4, meta_atom_offset + meta_atom_size)
+
+			# 'keys' and 'ilst' subatoms found. Read them. 
+			if b'keys' in qt_meta_atoms and b'ilst' in qt_meta_atoms:
+				qt_meta_keys = {0:[b'',b'']}
+
+				keys_offset = qt_meta_atoms[b'keys'][1] + 4 + 4 + 4  # Skip size, type and 4 zero bytes of 'keys' atom 
+				ilst_offset = qt_meta_atoms[b'ilst'][1] + 4 + 4      # Skip size, type of 'ilst' atom
+				keys_end = qt_meta_atoms[b'keys'][1] + qt_meta_atoms[b'keys'][0]
+				ilst_end = qt_meta_atoms[b'ilst'][1] + qt_meta_atoms[b'ilst'][0]
+				
+				self._charge(4)
 				f.seek(keys_offset)
-				key_size = int.from_bytes(f.read(4), 'big')
-				f.seek(keys_offset + 4 + 4)
-				key_name = f.read(key_size - 8)
-				keys_offset += 4 + 4 + key_size - 8
-
-				# each entry in 'ilst' has the following format: 
-				# record_size:uint32, key_index:unit32, record_size1:unit32, 'data' (or other 4-byte literals), type:unit32, locale:unit32, key_value:array of bytes with sizeof(key_value) = record_size1 - 16
-				# record_size1 = record_size - 8, so record_size is superfluous
-				f.seek(ilst_offset + 4) # skip record_size as superfluous
-				j = int.from_bytes(f.read(4), 'big') - 1
-				value_size = int.from_bytes(f.read(4), 'big') - 4 - 4 - 4 - 4
-				f.seek(ilst_offset + 4 + 4 + 4 + 4 + 4 + 4)
-				key_value = f.read(value_size)
-				ilst_offset += 4 + 4 + 4 + 4 + 4 + 4 + value_size
-
-				# Values in 'ilst' do not necessarily go in the order of 'keys'.
-				# So we intiate a record here and its key name/value pair gets filled out asyncroniously.
-				if i not in qt_meta_keys:
-					qt_meta_keys[i] = [b'',b'']
-				if j not in qt_meta_keys:
-					qt_meta_keys[j] = [b'',b'']
-
-				qt_meta_keys[i][0] = key_name
-				qt_meta_keys[j][1] = key_value
-		else:
-			return None
+				entry_count = int.from_bytes(f.read(4), 'big')
+				keys_offset += 4
+
+				for i in range(entry_count):
+					# Both atoms must still have room for one more entry
+					if keys_offset + 8 > keys_end or ilst_offset + 24 > ilst_end:
+						break
+
+					# each entry in 'keys' has the following format: 
+					# key_size:unit32, namespace:unit32, key_name:array of bytes with sizeof(key_name) = key_size - 8
+					self._charge(4)
+					f.seek(keys_offset)
+					key_size = int.from_bytes(f.read(4), 'big')
+					if key_size < 8 or keys_offset + key_size > keys_end:
+						break
+					self._charge(key_size - 8)
+					f.seek(keys_offset + 4 + 4)
+					key_name = f.read(key_size - 8)
+					keys_offset += 4 + 4 + key_size - 8
+
+					# each entry in 'ilst' has the following format: 
+					# record_size:uint32, key_index:unit32, record_size1:unit32, 'data' (or other 4-byte literals), type:unit32, locale:unit32, key_value:array of bytes with sizeof(key_value) = record_size1 - 16
+					# record_size1 = record_size - 8, so record_size is superfluous
+					self._charge(8)
+					f.seek(ilst_offset + 4) # skip record_size as superfluous
+					j = int.from_bytes(f.read(4), 'big') - 1
+					value_size = int.from_bytes(f.read(4), 'big') - 4 - 4 - 4 - 4
+					if value_size < 0 or ilst_offset + 24 + value_size > ilst_end:
+						break
+					self._charge(value_size)
+					f.seek(ilst_offset + 4 + 4 + 4 + 4 + 4 + 4)
+					key_value = f.read(value_size)
+					ilst_offset += 4 + 4 + 4 + 4 + 4 + 4 + value_size
+
+					# Values in 'ilst' do not necessarily go in the order of 'keys'.
+					# So we intiate a record here and its key name/value pair gets filled out asyncroniously.
+					if i not in qt_meta_keys:
+						qt_meta_keys[i] = [b'',b'']
+					if j not in qt_meta_keys:
+						qt_meta_keys[j] = [b'',b'']
+
+					qt_meta_keys[i][0] = key_name
+					qt_meta_keys[j][1] = key_value
+			else:
+				return None
 
 		return qt_meta_keys
 
@@ -0,0 +1,222 @@
+'''
+	This file is part of mediameta Python package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+
+	mediameta was inspired and partially based on:
+	1. exiftool (https://github.com/exiftool/exiftool) by Phil Harvey
+	2. exif-heic-js (https://github.com/exif-heic-js/exif-heic-js), Copyright (c) 2019 Jim Liu
+
+	mediameta is free software; you can redistribute it and/or modify
+	it under the terms of the MIT License.
+
+	mediameta is distributed in the hope that it will be useful, but
+	WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+	See the MIT License for more details.
+
+	SPDX-License-Identifier: MIT
+'''
+from xml.parsers import expat
+
+# Well known XMP namespaces. Properties are requested as 'prefix:name', the
+# prefixes below are understood even if a packet declares them differently.
+_XMPNamespaces = {
+	'x': 'adobe:ns:meta/',
+	'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+	'xml': 'http://www.w3.org/XML/1998/namespace',
+	'dc': 'http://purl.org/dc/elements/1.1/',
+	'xmp': 'http://ns.adobe.com/xap/1.0/',
+	'xmpMM': 'http://ns.adobe.com/xap/1.0/mm/',
+	'xmpRights': 'http://ns.adobe.com/xap/1.0/rights/',
+	'xmpNote': 'http://ns.adobe.com/xmp/note/',
+	'photoshop': 'http://ns.adobe.com/photoshop/1.0/',
+	'tiff': 'http://ns.adobe.com/tiff/1.0/',
+	'exif': 'http://ns.adobe.com/exif/1.0/',
+	'exifEX': 'http://cipa.jp/exif/1.0/',
+	'aux': 'http://ns.adobe.com/exif/1.0/aux/',
+	'crs': 'http://ns.adobe.com/camera-raw-settings/1.0/',
+	'lr': 'http://ns.adobe.com/lightroom/1.0/',
+	'Iptc4xmpCore': 'http://iptc.org/std/Iptc4xmpCore/1.0/xmlns/',
+	'Iptc4xmpExt': 'http://iptc.org/std/Iptc4xmpExt/2008-02-29/',
+	'GPano': 'http://ns.google.com/photos/1.0/panorama/',
+	'GCamera': 'http://ns.google.com/photos/1.0/camera/',
+	'hdrgm': 'http://ns.adobe.com/hdr-gain-map/1.0/',
+	'apdi': 'http://ns.apple.com/pixeldatainfo/1.0/',
+	'MicrosoftPhoto': 'http://ns.microsoft.com/photo/1.0/'
+}
+
+_RDF = _XMPNamespaces['rdf']
+_RDF_DESCRIPTION = _RDF + ' Description'
+_RDF_LI = _RDF + ' li'
+_RDF_CONTAINERS = [_RDF + ' Bag', _RDF + ' Seq', _RDF + ' Alt']
+
+class _XMPDone(Exception):
+	# Raised from inside the expat handlers to stop parsing early
+	pass
+
+class XMPReader:
+	'''
+		Incremental reader of XMP packets.
+
+		Feed it the packet in chunks of any size with feed(). It keeps no
+		document tree, only the values of the properties it was asked for,
+		and stops parsing as soon as all of them are found. feed() returns
+		True from then on and the rest of the packet need not be read at all.
+
+		properties is a list of 'prefix:name' strings, e.g. ['xmp:Rating',
+		'dc:subject']. Without it all top level properties are collected.
+		Simple properties come back as strings, arrays (rdf:Bag, rdf:Seq and
+		rdf:Alt) as lists of strings. Structures are not collected.
+	'''
+
+	def __init__(self, properties:list = None):
+		self.values = {}
+		self.done = False
+
+		self.__wanted = None
+		self.__unresolved = []
+		if properties is not None:
+			self.__wanted = {}
+			for prop in properties:
+				prefix, _, name = prop.partition(':')
+				if prefix in _XMPNamespaces:
+					self.__wanted[_XMPNamespaces[prefix] + ' ' + name] = prop
+				else:
+					self.__unresolved.append(prop)
+			if len(properties) == 0:
+				self.done = True
+
+		self.__prefixes = {}        # namespace URI -> prefix as declared in the packet
+		self.__depth = 0
+		self.__capture = None       # [property, depth, text parts, array items or None, structure?]
+		self.__li_text = None
+
+		self.__parser = expat.ParserCreate(namespace_separator=' ')
+		self.__parser.buffer_text = True
+		self.__parser.StartNamespaceDeclHandler = self.__start_namespace
+		self.__parser.StartElementHandler = self.__start_element
+		self.__parser.EndElementHandler = self.__end_element
+		self.__parser.CharacterDataHandler = self.__character_data
+
+	def feed(self, chunk:bytes, final:bool = False) -> bool:
+		'''
+			Parses the next chunk of the packet. Returns True when all requested
+			properties have been found and there is no need to feed any more.
+			Malformed XML stops the parsing, whatever was found by then is kept.
+		'''
+		if self.done:
+			return True
+		try:
+			self.__parser.Parse(chunk, final)
+		except _XMPDone:
+			self.done = True
+		except expat.ExpatError:
+			self.done = True
+		if final:
+			self.done = True
+		return self.done
+
+	def close(self) -> dict:
+		'''
+			Tells the reader there is nothing more to feed and returns the values found.
+		'''
+		self.feed(b'', True)
+		return self.values
+
+	def __property(self, name:str) -> (str | None):
+		# Returns how the caller refers to a namespaced name, None if not wanted
+		if self.__wanted is None:
+			uri, _, local = name.rpartition(' ')
+			if uri in (_RDF, _XMPNamespaces['x'], _XMPNamespaces['xml']):
+				return None
+			return self.__prefixes.get(uri, uri) + ':' + local
+		return self.__wanted.get(name)
+
+	def __found(self, prop:str, value):
+		if prop in self.values:
+			return
+		self.values[prop] = value
+		if self.__wanted is not None and len(self.__unresolved) == 0 and len(self.values) == len(self.__wanted):
+			raise _XMPDone
+
+	def __start_namespace(self, prefix:str, uri:str):
+		if prefix is None:
+			return
+		self.__prefixes.setdefault(uri, prefix)
+		# Properties with prefixes we did not know can be resolved now
+		for prop in list(self.__unresolved):
+			if prop.partition(':')[0] == prefix:
+				self.__wanted[uri + ' ' + prop.partition(':')[2]] = prop
+				self.__unresolved.remove(prop)
+
+	def __start_element(self, name:str, attrs:dict):
+		self.__depth += 1
+		capture = self.__capture
+
+		if capture is not None:
+			if name == _RDF_LI:
+				self.__li_text = []
+			elif name in _RDF_CONTAINERS:
+				if capture[3] is None:
+					capture[3] = []
+			elif self.__li_text is None and name != _RDF_DESCRIPTION:
+				capture[4] = True   # a structure, not collected
+			return
+
+		if name == _RDF_DESCRIPTION:
+			# Simple properties are often written as attributes of rdf:Description
+			for (attr, value) in attrs.items():
+				prop = self.__property(attr)
+				if prop is not None:
+					self.__found(prop, value)
+			return
+
+		prop = self.__property(name)
+		if prop is not None:
+			if _RDF + ' resource' in attrs:
+				self.__found(prop, attrs[_RDF + ' resource'])
+			else:
+				self.__capture = [prop, self.__depth, [], None, False]
+
+	def __end_element(self, name:str):
+		capture = self.__capture
+		self.__depth -= 1
+
+		if capture is None:
+			return
+
+		if name == _RDF_LI and self.__li_text is not None:
+			if capture[3] is not None:
+				capture[3].append(''.join(self.__li_text).strip())
+			self.__li_text = None
+		elif self.__depth < capture[1]:
+			self.__capture = None
+			if capture[3] is not None:
+				self.__found(capture[0], capture[3])
+			elif not capture[4]:
+				self.__found(capture[0], ''.join(capture[2]).strip())
+
+	def __character_data(self, data:str):
+		if self.__li_text is not None:
+			self.__li_text.append(data)
+		elif self.__capture is not None:
+			self.__capture[2].append(data)
+
+	pass
+
+def parse_xmp(chunks, properties:list = None) -> dict:
+	'''
+		Reads properties from an XMP packet given as bytes, str or an iterable
+		of bytes chunks. Stops reading the chunks as soon as all requested
+		properties are found. See XMPReader for details.
+	'''
+	reader = XMPReader(properties)
+	if isinstance(chunks, str):
+		chunks = [chunks.encode('utf_8')]
+	elif isinstance(chunks, (bytes, bytearray, memoryview)):
+		chunks = [chunks]
+	for chunk in chunks:
+		if reader.feed(chunk):
+			break
+	return reader.close()
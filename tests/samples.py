@@ -0,0 +1,230 @@
+'''
+	Sample files for the tests of mediameta, generated rather than shipped.
+
+	Every function returns the bytes of a file or of a part of one, tests
+	write them into their temporary directories.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import zlib
+import struct
+
+MAKE = 'Dandelion'
+MODEL = 'Sample'
+DATE_TIME = '2022:06:01 12:00:00'
+CONTENT_IDENTIFIER = 'AAAAAAAA-2222-3333-4444-555555555555'
+
+XMP_PACKET = (b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+	b'<rdf:Description xmlns:xmp="http://ns.adobe.com/xap/1.0/" xmp:Rating="4"/></rdf:RDF></x:xmpmeta>')
+
+def ifd(entries:list, offset:int, next_ifd:int = 0) -> bytes:
+	# A little endian IFD at offset from the TIFF header followed by the values
+	# that do not fit into the entries. entries are (tag, type, count, value bytes).
+	values_offset = offset + 2 + len(entries) * 12 + 4
+	table = struct.pack('<H', len(entries))
+	values = b''
+	for (tag, tag_type, count, value) in sorted(entries):
+		if len(value) <= 4:
+			table += struct.pack('<HHI', tag, tag_type, count) + value.ljust(4, b'\x00')
+		else:
+			table += struct.pack('<HHII', tag, tag_type, count, values_offset + len(values))
+			values += value + b'\x00' * (len(value) & 1)
+	return table + struct.pack('<I', next_ifd) + values
+
+def ascii(text:str) -> tuple:
+	value = text.encode('ascii') + b'\x00'
+	return (2, len(value), value)
+
+def short(*numbers) -> tuple:
+	return (3, len(numbers), struct.pack('<{0}H'.format(len(numbers)), *numbers))
+
+def long(*numbers) -> tuple:
+	return (4, len(numbers), struct.pack('<{0}I'.format(len(numbers)), *numbers))
+
+def rational(*pairs) -> tuple:
+	return (5, len(pairs), b''.join(struct.pack('<II', *pair) for pair in pairs))
+
+def undefined(value:bytes) -> tuple:
+	return (7, len(value), value)
+
+def tiff_block(exif:list = (), ifd0:list = (), gps:bool = True, signature:bytes = b'II*\x00', extra:bytes = b'',
+		make:str = MAKE) -> bytes:
+	# TIFF header, IFD0, EXIF and GPS IFDs. exif and ifd0 are extra entries, make the Make tag.
+	# RAW formats based on TIFF have their own signature, some have extra
+	# bytes between the header and IFD0.
+	exif_entries = [(0x9003, *ascii(DATE_TIME)), (0x829D, *rational((28, 10))), (0xA002, *long(4032)),
+		(0xA003, *long(3024))] + list(exif)
+	gps_entries = [(0x0001, *ascii('N')), (0x0002, *rational((59, 1), (56, 1), (1234, 100))),
+		(0x0003, *ascii('E')), (0x0004, *rational((30, 1), (18, 1), (5678, 100)))]
+	ifd0_entries = [(0x010F, *ascii(make)), (0x0110, *ascii(MODEL)), (0x0112, *short(1)),
+		(0x0132, *ascii(DATE_TIME)), (0x8769, *long(0))] + ([(0x8825, *long(0))] if gps else []) + list(ifd0)
+
+	ifd0_offset = 8 + len(extra)
+	exif_offset = ifd0_offset + len(ifd(ifd0_entries, ifd0_offset))
+	gps_offset = exif_offset + len(ifd(exif_entries, exif_offset))
+	ifd0_entries = [(0x8769, *long(exif_offset)) if entry[0] == 0x8769 else
+		(0x8825, *long(gps_offset)) if entry[0] == 0x8825 else entry for entry in ifd0_entries]
+	return signature + struct.pack('<I', ifd0_offset) + extra + ifd(ifd0_entries, ifd0_offset) + \
+		ifd(exif_entries, exif_offset) + (ifd(gps_entries, gps_offset) if gps else b'')
+
+def segment(marker:int, payload:bytes) -> bytes:
+	return struct.pack('>HH', marker, 2 + len(payload)) + payload
+
+def jpeg(tiff:bytes = None, segments:bytes = b'') -> bytes:
+	# JFIF, the EXIF segment with tiff, more segments, then a scan
+	app1 = segment(0xFFE1, b'Exif\x00\x00' + tiff) if tiff is not None else b''
+	return b'\xFF\xD8' + segment(0xFFE0, b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00') + app1 + segments + \
+		b'\xFF\xDA\x00\x08' + b'\x00' * 6 + b'\x11' * 1000 + b'\xFF\xD9'
+
+def xmp_segment(packet:bytes = XMP_PACKET) -> bytes:
+	return segment(0xFFE1, b'http://ns.adobe.com/xap/1.0/\x00' + packet)
+
+def extended_xmp_segments(guid:str, packet:bytes, parts:int = 2) -> bytes:
+	# The extended packet split into APP1 segments, written in reverse order.
+	# Each starts with the GUID, the full length and the offset of the part.
+	size = -(-len(packet) // parts)
+	chunks = [(i, packet[i:i+size]) for i in range(0, len(packet), size)]
+	return b''.join(segment(0xFFE1, b'http://ns.adobe.com/xmp/extension/\x00' + guid.encode('ascii') +
+		struct.pack('>II', len(packet), offset) + chunk) for (offset, chunk) in reversed(chunks))
+
+def icc_profile(description:str = 'Display P3', size:int = 300) -> bytes:
+	# A display profile with a desc tag
+	profile = bytearray(size)
+	profile[0:4] = struct.pack('>I', size)
+	profile[12:24] = b'mntrRGB XYZ '
+	profile[36:40] = b'acsp'
+	profile[128:144] = struct.pack('>I', 1) + b'desc' + struct.pack('>II', 144, 12 + len(description))
+	desc = b'desc' + b'\x00' * 4 + struct.pack('>I', len(description)) + description.encode('ascii')
+	profile[144:144+len(desc)] = desc
+	return bytes(profile)
+
+def icc_segments(profile:bytes, parts:int = 2) -> bytes:
+	# The profile split into APP2 segments, written in reverse order
+	size = -(-len(profile) // parts)
+	chunks = [profile[i:i+size] for i in range(0, len(profile), size)]
+	return b''.join(segment(0xFFE2, b'ICC_PROFILE\x00' + bytes((n + 1, len(chunks))) + chunk)
+		for (n, chunk) in reversed(list(enumerate(chunks))))
+
+def iptc_segment(datasets:list) -> bytes:
+	# An APP13 segment with one 8BIM IPTC-IIM block of datasets, (record, dataset, bytes)
+	iim = b''.join(struct.pack('>BBBH', 0x1C, record, dataset, len(value)) + value for (record, dataset, value) in datasets)
+	block = b'8BIM' + struct.pack('>H', 0x0404) + b'\x00\x00' + struct.pack('>I', len(iim)) + iim + b'\x00' * (len(iim) & 1)
+	return segment(0xFFED, b'Photoshop 3.0\x00' + block)
+
+def mpf_segment(images:list) -> bytes:
+	# An APP2 segment with the MP Index IFD of images, (attribute, size, offset, dependent,
+	# dependent). Offsets count from the TIFF header of the segment.
+	entries = b''.join(struct.pack('<IIIHH', *image) for image in images)
+	index = ifd([(0xB000, *undefined(b'0100')), (0xB001, *long(len(images))), (0xB002, *undefined(entries))], 8)
+	return segment(0xFFE2, b'MPF\x00' + b'II*\x00' + struct.pack('<I', 8) + index)
+
+def apple_makernote(content_identifier:str = CONTENT_IDENTIFIER, burst_uuid:str = None) -> bytes:
+	# A big endian IFD with the content identifier and the burst UUID, offsets count from the start of the note
+	values = ([(0x000B, burst_uuid.encode('ascii') + b'\x00')] if burst_uuid is not None else []) + \
+		[(0x0011, content_identifier.encode('ascii') + b'\x00')]
+	offset = 14 + 2 + 12 * len(values) + 4
+	entries = struct.pack('>H', len(values))
+	for (tag, value) in values:
+		entries += struct.pack('>HHII', tag, 2, len(value), offset)
+		offset += len(value)
+	return b'Apple iOS\x00\x00\x01MM' + entries + b'\x00' * 4 + b''.join(value for (_, value) in values) + b'\x00' * 64
+
+def box(box_type:bytes, data:bytes) -> bytes:
+	return struct.pack('>I', 8 + len(data)) + box_type + data
+
+def mov(items:dict = None) -> bytes:
+	# A QuickTime movie with the keys and values of items in moov/meta, no media data
+	if items is None:
+		items = {'com.apple.quicktime.make': MAKE, 'com.apple.quicktime.model': MODEL,
+			'com.apple.quicktime.creationdate': '2022-06-01T12:00:00+0300',
+			'com.apple.quicktime.content.identifier': CONTENT_IDENTIFIER}
+	keys = [key.encode('ascii') for key in items]
+	values = [value.encode('utf_8') for value in items.values()]
+	keys_data = b'\x00' * 4 + struct.pack('>I', len(keys)) + b''.join(struct.pack('>I', 8 + len(k)) + b'mdta' + k for k in keys)
+	ilst_data = b''.join(box(struct.pack('>I', i + 1), box(b'data', struct.pack('>II', 1, 0) + v)) for (i, v) in enumerate(values))
+	meta = box(b'meta', box(b'hdlr', b'\x00' * 8 + b'mdta' + b'\x00' * 13) + box(b'keys', keys_data) + box(b'ilst', ilst_data))
+	return box(b'ftyp', b'qt  ' + b'\x00' * 4 + b'qt  ') + box(b'moov', box(b'mvhd', b'\x00' * 100) + meta)
+
+def heif(tiff:bytes, method:int = 0, extents:int = 1, brand:bytes = b'heic', xmp:bytes = None, icc:bytes = None) -> bytes:
+	# An image with tiff in its Exif item, stored in mdat (method 0) or in the
+	# idat box of meta (method 1), in one or several extents. xmp becomes a
+	# mime item in mdat, icc the colr property of the image.
+	exif = struct.pack('>I', 0) + tiff
+	size = -(-len(exif) // extents)
+	pieces = [exif[i:i+size] for i in range(0, len(exif), size)]
+	items = [(1, b'Exif', b'', pieces, method), (2, b'hvc1', b'', [b'\x00' * 16], 0)]
+	if xmp is not None:
+		items.append((3, b'mime', b'application/rdf+xml\x00', [xmp], 0))
+
+	def meta_box(mdat_offset:int) -> bytes:
+		infe = b''.join(box(b'infe', b'\x02\x00\x00\x00' + struct.pack('>HH', item_id, 0) + item_type + b'\x00' + content_type)
+			for (item_id, item_type, content_type, _, _) in items)
+		locations = b''
+		(mdat_position, idat_position) = (mdat_offset, 0)
+		for (item_id, _, _, item_pieces, item_method) in items:
+			locations += struct.pack('>HHHH', item_id, item_method, 0, len(item_pieces))
+			for piece in item_pieces:
+				if item_method == 0:
+					locations += struct.pack('>II', mdat_position, len(piece))
+					mdat_position += len(piece)
+				else:
+					locations += struct.pack('>II', idat_position, len(piece))
+					idat_position += len(piece)
+		idat = b''.join(b''.join(p) for (_, _, _, p, m) in items if m == 1)
+		properties = box(b'iprp', box(b'ipco', box(b'colr', b'prof' + icc))) if icc is not None else b''
+		return box(b'meta', b'\x00' * 4 + box(b'hdlr', b'\x00' * 8 + b'pict' + b'\x00' * 13) +
+			box(b'pitm', b'\x00' * 4 + struct.pack('>H', 2)) + properties +
+			box(b'iinf', b'\x00' * 4 + struct.pack('>H', len(items)) + infe) +
+			box(b'iloc', b'\x01\x00\x00\x00' + b'\x44\x00' + struct.pack('>H', len(items)) + locations) +
+			(box(b'idat', idat) if len(idat) > 0 else b''))
+
+	ftyp = box(b'ftyp', brand + b'\x00' * 4 + b'mif1' + brand)
+	mdat_data = b''.join(b''.join(p) for (_, _, _, p, m) in items if m == 0)
+	head = ftyp + meta_box(0)
+	return ftyp + meta_box(len(head) + 8) + box(b'mdat', mdat_data)
+
+def png(tiff:bytes, xmp:bytes = None, icc:bytes = None, image_size:int = 1000) -> bytes:
+	# IHDR, iCCP with the zlib compressed icc, iTXt with xmp, eXIf with tiff,
+	# then image_size bytes of image data. The CRCs are not checked, so not written.
+	def chunk(chunk_type:bytes, data:bytes) -> bytes:
+		return struct.pack('>I', len(data)) + chunk_type + data + b'\x00' * 4
+	chunks = chunk(b'IHDR', struct.pack('>II', 4032, 3024) + b'\x08\x02\x00\x00\x00')
+	if icc is not None:
+		chunks += chunk(b'iCCP', b'Display P3\x00\x00' + zlib.compress(icc))
+	if xmp is not None:
+		chunks += chunk(b'iTXt', b'XML:com.adobe.xmp\x00\x00\x00\x00\x00' + xmp)
+	return b'\x89PNG\r\n\x1a\n' + chunks + chunk(b'eXIf', tiff) + chunk(b'IDAT', b'\x11' * image_size) + chunk(b'IEND', b'')
+
+def webp(tiff:bytes, xmp:bytes = None, icc:bytes = None, image_size:int = 1001, app1_prefix:bool = False) -> bytes:
+	# VP8X, ICCP, the image data, EXIF (with the JPEG APP1 prefix some writers
+	# leave in it) and XMP chunks. Odd sized chunks are padded.
+	def chunk(fourcc:bytes, data:bytes) -> bytes:
+		return fourcc + struct.pack('<I', len(data)) + data + b'\x00' * (len(data) & 1)
+	chunks = chunk(b'VP8X', b'\x2C' + b'\x00' * 9)
+	if icc is not None:
+		chunks += chunk(b'ICCP', icc)
+	chunks += chunk(b'VP8 ', b'\x11' * image_size) + chunk(b'EXIF', (b'Exif\x00\x00' if app1_prefix else b'') + tiff)
+	if xmp is not None:
+		chunks += chunk(b'XMP ', xmp)
+	return b'RIFF' + struct.pack('<I', 4 + len(chunks)) + b'WEBP' + chunks
+
+def jxl(tiff:bytes, xmp:bytes = None, image_size:int = 1000) -> bytes:
+	# The JPEG XL container: signature, ftyp, the codestream, Exif and xml boxes.
+	# The last box is written with size 0, it runs to the end of the file.
+	boxes = box(b'ftyp', b'jxl \x00\x00\x00\x00jxl ') + box(b'jxlc', b'\xFF\x0A' + b'\x11' * image_size) + \
+		box(b'Exif', struct.pack('>I', 0) + tiff)
+	if xmp is not None:
+		boxes += struct.pack('>I', 0) + b'xml ' + xmp
+	return b'\x00\x00\x00\x0cJXL \r\n\x87\n' + boxes
+
+def cr3(ifd0:list, exif:list, makernote:list, gps:list, image_size:int = 1000) -> bytes:
+	# A Canon CR3: ftyp, moov with the uuid box of CMT1 (IFD0), CMT2 (EXIF), CMT3
+	# (the Canon MakerNote IFD) and CMT4 (GPS), then mdat. Every CMT box is a
+	# TIFF structure of its own with one IFD.
+	def cmt(box_type:bytes, entries:list) -> bytes:
+		return box(box_type, b'II*\x00' + struct.pack('<I', 8) + ifd(entries, 8))
+	uuid = box(b'uuid', bytes.fromhex('85c0b687820f11e08111f4ce462b6a48') + cmt(b'CMT1', ifd0) + cmt(b'CMT2', exif) +
+		cmt(b'CMT3', makernote) + cmt(b'CMT4', gps))
+	return box(b'ftyp', b'crx \x00\x00\x00\x01crx isom') + box(b'moov', box(b'mvhd', b'\x00' * 100) + uuid) + \
+		box(b'mdat', b'\x11' * image_size)
@@ -0,0 +1,79 @@
+'''
+	Tests of reading metadata of archive members.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import tarfile
+import zipfile
+
+import pytest
+
+import mediameta
+import samples
+
+def sample_jpeg() -> bytes:
+	# EXIF with an Apple MakerNote, XMP, a split ICC profile and IPTC
+	return samples.jpeg(samples.tiff_block(exif=[(0x927C, *samples.undefined(samples.apple_makernote()))]),
+		samples.xmp_segment() + samples.icc_segments(samples.icc_profile()) +
+		samples.iptc_segment([(2, 5, b'Title'), (2, 25, b'one'), (2, 25, b'two')]))
+
+def accessors(meta) -> dict:
+	# Everything a caller reads from an object, the raw tags and what is read later
+	if meta is None:
+		return None
+	icc = meta.icc_profile()
+	iptc = meta.iptc()
+	return {
+		'tags': meta._tags,
+		'all': dict(meta.all()),
+		'xmp': meta.xmp(),
+		'icc': (icc.description(), icc.data()) if icc is not None else None,
+		'iptc': dict(iptc.all()) if iptc is not None else None,
+		'makernote': meta.makernote(),
+		'content identifier': meta['MakerNote:ContentIdentifier'],
+		'blob': bytes(meta.blob('MakerNote')) if meta.blob('MakerNote') is not None else None
+	}
+
+@pytest.fixture
+def archive(tmp_path):
+	data = sample_jpeg()
+	archive_name = tmp_path / 'sample.zip'
+	with zipfile.ZipFile(archive_name, 'w') as z:
+		z.writestr(zipfile.ZipInfo('stored.jpg'), data, compress_type=zipfile.ZIP_STORED)
+		z.writestr(zipfile.ZipInfo('deflated.jpg'), data, compress_type=zipfile.ZIP_DEFLATED)
+		z.writestr(zipfile.ZipInfo('stored.tif'), samples.tiff_block(), compress_type=zipfile.ZIP_STORED)
+		z.writestr('readme.txt', 'not a media file')
+	return archive_name
+
+def test_members_are_read_in_place(archive):
+	results = dict(mediameta.scan_archive(archive, workers=0))
+	assert results['readme.txt'] is None
+	meta = results['stored.jpg']
+	assert meta.file_name() == str(archive) + '!stored.jpg'
+	assert meta['Make'] == samples.MAKE
+	assert meta.xmp() == {'xmp:Rating': '4'}
+	assert meta.icc_profile().description() == 'Display P3'
+	assert meta['MakerNote:ContentIdentifier'] == samples.CONTENT_IDENTIFIER
+
+def test_tar_members(tmp_path):
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(sample_jpeg())
+	for (mode, archive_name) in (('w', tmp_path / 'sample.tar'), ('w:gz', tmp_path / 'sample.tgz')):
+		with tarfile.open(archive_name, mode) as t:
+			t.add(file_name, 'sample.jpg')
+		((member_name, meta), ) = mediameta.scan_archive(archive_name, workers=0)
+		assert member_name == 'sample.jpg'
+		assert meta.xmp() == {'xmp:Rating': '4'}
+
+@pytest.mark.parametrize('keep_blobs', [True, False])
+def test_pooled_results_match_serial_ones(archive, keep_blobs):
+	serial = {name: accessors(meta) for (name, meta) in mediameta.scan_archive(archive, workers=0, keep_blobs=keep_blobs)}
+	pooled = {name: accessors(meta) for (name, meta) in mediameta.scan_archive(archive, workers=2, keep_blobs=keep_blobs)}
+	assert pooled.keys() == serial.keys()
+	for name in serial:
+		if serial[name] is None:
+			assert pooled[name] is None
+			continue
+		for field in serial[name]:
+			assert pooled[name][field] == serial[name][field], (name, field)
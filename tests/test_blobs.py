@@ -0,0 +1,53 @@
+'''
+	Tests of large binary values kept as memoryviews or references to the file.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import pickle
+
+import pytest
+
+import mediameta
+from mediameta import BlobReference
+import samples
+
+NOTE = samples.apple_makernote()
+
+def tiff() -> bytes:
+	return samples.tiff_block(exif=[(0x927C, *samples.undefined(NOTE))])
+
+@pytest.mark.parametrize('extension, data', [
+	('.jpg', samples.jpeg(tiff())),
+	('.heic', samples.heif(tiff())),
+	('.tif', tiff())
+])
+def test_blobs_of_a_file(tmp_path, extension, data):
+	file_name = tmp_path / ('sample' + extension)
+	file_name.write_bytes(data)
+
+	meta = mediameta.open(file_name)
+	assert isinstance(meta._tags[0x927C][0], (memoryview, bytes))
+	assert bytes(meta.blob('MakerNote')) == NOTE
+
+	meta = mediameta.open(file_name, keep_blobs=False)
+	reference = meta._tags[0x927C][0]
+	assert isinstance(reference, BlobReference)
+	assert data[reference.offset:reference.offset + reference.length] == NOTE
+	assert meta.blob('MakerNote') == NOTE
+	assert pickle.loads(pickle.dumps(meta)).blob('MakerNote') == NOTE
+
+@pytest.mark.parametrize('method, extents', [(0, 3), (1, 1), (1, 2)])
+def test_exif_not_in_one_piece(tmp_path, method, extents):
+	# No offset in the file to refer to, the value is copied out rather than kept as a view
+	file_name = tmp_path / 'sample.heic'
+	file_name.write_bytes(samples.heif(tiff(), method, extents))
+
+	meta = mediameta.open(file_name, keep_blobs=False)
+	assert type(meta._tags[0x927C][0]) is bytes
+	assert meta.blob('MakerNote') == NOTE
+	assert meta['MakerNote:ContentIdentifier'] == samples.CONTENT_IDENTIFIER
+
+	meta = mediameta.open(file_name)
+	assert isinstance(meta._tags[0x927C][0], memoryview)
+	assert meta['MakerNote:ContentIdentifier'] == samples.CONTENT_IDENTIFIER
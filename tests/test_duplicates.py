@@ -0,0 +1,71 @@
+'''
+	Tests of finding duplicate files and copies of the same shot.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import struct
+
+import mediameta
+from mediameta import metadata_digest
+from mediameta import fingerprint
+from mediameta import find_duplicates
+import samples
+
+def opened(tmp_path, name:str, data:bytes):
+	file_name = tmp_path / name
+	file_name.write_bytes(data)
+	return mediameta.open(file_name)
+
+def rotated(tiff:bytes) -> bytes:
+	# Swaps PixelXDimension and PixelYDimension as software turning the image would
+	width = struct.pack('<HHII', 0xA002, 4, 1, 4032)
+	height = struct.pack('<HHII', 0xA003, 4, 1, 3024)
+	return tiff.replace(width, struct.pack('<HHII', 0xA002, 4, 1, 3024)).replace(height, struct.pack('<HHII', 0xA003, 4, 1, 4032))
+
+def test_metadata_digest(tmp_path):
+	tiff = samples.tiff_block()
+	original = opened(tmp_path, 'original.jpg', samples.jpeg(tiff))
+	copy = opened(tmp_path, 'copy.jpg', samples.jpeg(tiff, samples.xmp_segment()))
+	other = opened(tmp_path, 'other.jpg', samples.jpeg(samples.tiff_block(exif=[(0x8827, *samples.short(400))])))
+
+	assert len(metadata_digest(original)) == 16
+	assert metadata_digest(original) == metadata_digest(copy)
+	assert metadata_digest(original) != metadata_digest(other)
+	assert metadata_digest(opened(tmp_path, 'copy.png', samples.png(tiff))) == metadata_digest(original)
+
+	# Files without an EXIF block are digested by their tag values
+	video = opened(tmp_path, 'video.mov', samples.mov())
+	assert metadata_digest(video) == metadata_digest(opened(tmp_path, 'copy.mov', samples.mov()))
+	assert metadata_digest(video) != metadata_digest(opened(tmp_path, 'other.mov', samples.mov({'com.apple.quicktime.make': samples.MAKE})))
+
+def test_fingerprint(tmp_path):
+	shot = opened(tmp_path, 'shot.jpg', samples.jpeg(samples.tiff_block(exif=[(0x9291, *samples.ascii('5'))])))
+	assert fingerprint(shot) == (samples.MAKE.casefold(), samples.MODEL.casefold(), samples.DATE_TIME, '5', 3024, 4032, '')
+
+	# Re-encoded and rotated by other software
+	edited = opened(tmp_path, 'edited.jpg', samples.jpeg(rotated(samples.tiff_block(
+		exif=[(0x9291, *samples.ascii('500'))], make=samples.MAKE.upper() + ' '))))
+	assert fingerprint(edited) == fingerprint(shot)
+	assert metadata_digest(edited) != metadata_digest(shot)
+
+	later = opened(tmp_path, 'later.jpg', samples.jpeg(samples.tiff_block(exif=[(0x9291, *samples.ascii('6'))])))
+	assert fingerprint(later) != fingerprint(shot)
+
+	assert fingerprint(opened(tmp_path, 'video.mov', samples.mov()))[2] == '2022-06-01t12:00:00+0300'
+	assert fingerprint(opened(tmp_path, 'undated.mov', samples.mov({'com.apple.quicktime.make': samples.MAKE}))) is None
+
+def test_find_duplicates(tmp_path):
+	tiff = samples.tiff_block()
+	items = [opened(tmp_path, 'a.jpg', samples.jpeg(tiff)),
+		opened(tmp_path, 'b.jpg', samples.jpeg(samples.tiff_block(exif=[(0x8827, *samples.short(400))]))),
+		opened(tmp_path, 'c.jpg', samples.jpeg(tiff)),
+		opened(tmp_path, 'd.mov', samples.mov({'com.apple.quicktime.make': samples.MAKE}))]
+
+	groups = find_duplicates(iter(items))
+	assert groups == [[items[0], items[2]]]
+
+	# The same shot, whatever the ISO speed, files without a capture time are left out
+	groups = find_duplicates(items + [opened(tmp_path, 'e.mov', samples.mov({}))], key=fingerprint)
+	assert groups == [items[:3]]
+	assert find_duplicates([]) == []
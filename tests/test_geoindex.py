@@ -0,0 +1,90 @@
+'''
+	Tests of GPS coordinates and of the spatial index.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import random
+
+import pytest
+
+import mediameta
+from mediameta import GeoIndex
+from mediameta import GPS_coordinates
+from mediameta import ISO6709_to_decimal
+from mediameta import DMS_to_decimal
+from mediameta.geoindex import distance
+import samples
+
+PLACES = [('spb', 59.9386, 30.3141), ('istanbul', 41.0082, 28.9784), ('fiji', -17.7134, 178.065),
+	('samoa', -13.759, -172.1046), ('london', 51.5072, -0.1276), ('pole', 89.9, 0.0)]
+
+def index() -> GeoIndex:
+	geo = GeoIndex()
+	for (name, lat, lng) in PLACES:
+		geo.add(name, lat, lng)
+	return geo
+
+@pytest.mark.parametrize('location, expected', [
+	('+41.0668+029.0193+045.000/', (41.0668, 29.0193)),
+	('-3345.5-07030.0/', (-33.758333, -70.5)),
+	('+594000+0301500/', (59.666667, 30.25)),
+	('+5x', None),
+	('', None)
+])
+def test_iso6709(location, expected):
+	coord = ISO6709_to_decimal(location)
+	assert coord == expected if expected is None else coord == pytest.approx(expected, abs=1e-6)
+
+def test_dms():
+	assert DMS_to_decimal(['59/1', '56/1', '1234/100'], 'N') == pytest.approx(59.936761, abs=1e-6)
+	assert DMS_to_decimal(['30/1', '18/1', '0/1'], 'W') == pytest.approx(-30.3)
+
+def test_coordinates_of_files(tmp_path):
+	image = tmp_path / 'image.jpg'
+	image.write_bytes(samples.jpeg(samples.tiff_block()))
+	assert GPS_coordinates(mediameta.open(image)) == pytest.approx((59.936761, 30.315772), abs=1e-6)
+
+	video = tmp_path / 'video.mov'
+	video.write_bytes(samples.mov({'com.apple.quicktime.location.ISO6709': '+41.0668+029.0193+045.000/'}))
+	assert GPS_coordinates(mediameta.open(video)) == pytest.approx((41.0668, 29.0193))
+
+	image.write_bytes(samples.jpeg(samples.tiff_block(gps=False)))
+	meta = mediameta.open(image)
+	assert GPS_coordinates(meta) is None
+	assert not GeoIndex().add_metadata(meta)
+
+def test_bounding_box():
+	geo = index()
+	assert sorted(name for (name, _, _) in geo.bounding_box(40, 0, 60, 40)) == ['istanbul', 'spb']
+	# Across the antimeridian
+	assert sorted(name for (name, _, _) in geo.bounding_box(-20, 170, -10, -170)) == ['fiji', 'samoa']
+	assert geo.bounding_box(0, 0, 1, 1) == []
+
+def test_nearest():
+	geo = index()
+	((d, name, _, _),) = geo.nearest(60.0, 30.0)
+	assert name == 'spb' and d == pytest.approx(distance(60.0, 30.0, 59.9386, 30.3141))
+	assert [name for (_, name, _, _) in geo.nearest(45.0, 20.0, 3)] == ['istanbul', 'london', 'spb']
+	assert len(geo.nearest(0, 0, 100)) == len(PLACES)
+	assert GeoIndex().nearest(0, 0) == [] and geo.nearest(0, 0, 0) == []
+
+def test_nearest_against_a_full_scan():
+	rng = random.Random(1)
+	geo = GeoIndex()
+	points = [('p{0}'.format(i), rng.uniform(-90, 90), rng.uniform(-180, 180)) for i in range(2000)]
+	for point in points:
+		geo.add(*point)
+	for _ in range(20):
+		(lat, lng) = (rng.uniform(-90, 90), rng.uniform(-180, 180))
+		expected = sorted(points, key=lambda p: distance(lat, lng, p[1], p[2]))[:5]
+		assert [name for (_, name, _, _) in geo.nearest(lat, lng, 5)] == [name for (name, _, _) in expected]
+
+def test_save_and_load(tmp_path):
+	geo = index()
+	geo.save(tmp_path / 'places.geo')
+	loaded = GeoIndex.load(tmp_path / 'places.geo')
+	assert len(loaded) == len(PLACES)
+	assert loaded.bounding_box(-90, -180, 90, 180) == geo.bounding_box(-90, -180, 90, 180)
+	with pytest.raises(ValueError):
+		GeoIndex.from_bytes(b'MMTI' + bytes(6))
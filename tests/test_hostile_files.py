@@ -0,0 +1,52 @@
+'''
+	Tests of parsing malformed and hostile files within the work budgets.
+
+	The samples in tests/fuzz are files cut short (truncated_*), IFDs
+	pointing back to themselves (looping_*), entry and value counts far
+	beyond the data (huge_count_*) and box or chunk sizes running past
+	their parent or the end of the file (box_overflow_*, chunk_overflow_*).
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import os
+from time import monotonic
+
+import pytest
+
+import mediameta
+from mediameta import UnsupportedMediaFile
+from mediameta import ParsingBudgetExceeded
+import samples
+
+FUZZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fuzz')
+
+READ_BUDGET = 1024 * 1024
+TIME_BUDGET = 1.0
+
+@pytest.mark.parametrize('file_name', sorted(os.listdir(FUZZ)))
+def test_parses_or_raises_within_budget(file_name):
+	started = monotonic()
+	try:
+		meta = mediameta.open(os.path.join(FUZZ, file_name), read_budget=READ_BUDGET, time_budget=TIME_BUDGET)
+	except UnsupportedMediaFile:
+		meta = None
+	if meta is not None:
+		# What is decoded on demand gets a budget of its own
+		dict(meta.all())
+		for accessor in ('xmp', 'iptc', 'icc_profile', 'makernote', 'mp_images'):
+			if hasattr(meta, accessor):
+				try:
+					getattr(meta, accessor)()
+				except UnsupportedMediaFile:
+					pass
+	# The time budget is checked between reads, give it some slack
+	assert monotonic() - started < 2 * TIME_BUDGET
+
+def test_read_budget(tmp_path):
+	# A valid movie with more metadata than the budget allows
+	file_name = tmp_path / 'sample.mov'
+	file_name.write_bytes(samples.mov({'com.dandelion.key{0}'.format(i): 'value' for i in range(1000)}))
+	with pytest.raises(ParsingBudgetExceeded):
+		mediameta.open(file_name, read_budget=4096)
+	assert len(mediameta.open(file_name, read_budget=READ_BUDGET).keys()) == 1000
@@ -0,0 +1,82 @@
+'''
+	Tests of ICC profiles, put together from JPEG segments and read lazily.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import struct
+
+import pytest
+
+import mediameta
+from mediameta import ICCProfile
+import samples
+
+def profile_v4() -> bytes:
+	# A version 4.3 profile with an mluc description and a text copyright
+	profile = bytearray(samples.icc_profile(size=400))
+	profile[8:10] = b'\x04\x30'
+	profile[64:68] = struct.pack('>I', 1)
+	profile[80:84] = b'appl'
+	description = 'Дисплей P3'.encode('utf_16_be')
+	mluc = b'mluc' + b'\x00' * 4 + struct.pack('>II', 1, 12) + b'enUS' + struct.pack('>II', len(description), 28) + description
+	copyright = b'text' + b'\x00' * 4 + b'Public Domain\x00'
+	profile[128:156] = struct.pack('>I', 2) + b'desc' + struct.pack('>II', 160, len(mluc)) + \
+		b'cprt' + struct.pack('>II', 160 + len(mluc), len(copyright))
+	profile[160:160+len(mluc)] = mluc
+	profile[160+len(mluc):160+len(mluc)+len(copyright)] = copyright
+	return bytes(profile)
+
+def test_header():
+	profile = ICCProfile(profile_v4())
+	assert profile._tags is None
+	assert len(profile) == 400
+	assert profile.version() == '4.3.0'
+	assert profile.device_class() == 'Display'
+	assert profile.color_space() == 'RGB'
+	assert profile.connection_space() == 'XYZ'
+	assert profile.rendering_intent() == 'Media-relative colorimetric'
+	assert profile.creator() == 'appl'
+	assert profile._tags is None
+
+def test_tags():
+	profile = ICCProfile(profile_v4())
+	assert profile.tags() == ['desc', 'cprt']
+	assert profile.description() == 'Дисплей P3'
+	assert profile.text('cprt') == 'Public Domain'
+	assert profile.tag('wtpt') is None and profile.text('wtpt') is None
+	assert isinstance(profile.tag('desc'), memoryview)
+	assert ICCProfile(samples.icc_profile('sRGB IEC61966-2.1')).description() == 'sRGB IEC61966-2.1'
+
+def test_not_a_profile():
+	with pytest.raises(ValueError):
+		ICCProfile(b'\x00' * 200)
+	with pytest.raises(ValueError):
+		ICCProfile(samples.icc_profile()[:100])
+	# Tags past the end of the profile are left out
+	profile = bytearray(profile_v4())
+	profile[148:152] = struct.pack('>I', 1000000)
+	assert ICCProfile(bytes(profile)).tags() == ['desc']
+	assert ICCProfile(bytes(profile)).text('cprt') is None
+
+@pytest.mark.parametrize('parts', [1, 2, 5])
+def test_jpeg_segments(tmp_path, parts):
+	# Segments are written in reverse order, their sequence numbers count
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block(), samples.icc_segments(profile_v4(), parts)))
+	meta = mediameta.open(file_name)
+	assert meta._icc_profile is None
+	assert bytes(meta.icc_profile().data()) == profile_v4()
+	assert meta.icc_profile() is meta.icc_profile()
+
+def test_tiff_and_no_profile(tmp_path):
+	file_name = tmp_path / 'sample.tif'
+	file_name.write_bytes(samples.tiff_block(ifd0=[(0x8773, *samples.undefined(profile_v4()))]))
+	assert mediameta.open(file_name).icc_profile().description() == 'Дисплей P3'
+
+	file_name.write_bytes(samples.tiff_block(ifd0=[(0x8773, *samples.undefined(b'\x00' * 200))]))
+	assert mediameta.open(file_name).icc_profile() is None
+
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block()))
+	assert mediameta.open(file_name).icc_profile() is None
@@ -0,0 +1,77 @@
+'''
+	Tests of the cache of interpreted values.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import pytest
+
+import mediameta
+import samples
+
+@pytest.fixture
+def cache():
+	(_, _, maxsize, _) = mediameta.interpretation_cache_info()
+	mediameta.clear_interpretation_cache()
+	yield
+	mediameta.set_interpretation_cache_size(maxsize)
+	mediameta.clear_interpretation_cache()
+
+@pytest.fixture
+def files(tmp_path):
+	names = []
+	for i in range(5):
+		file_name = tmp_path / 'sample{0}.jpg'.format(i)
+		file_name.write_bytes(samples.jpeg(samples.tiff_block(exif=[(0x8827, *samples.short(100 * (i + 1)))])))
+		names.append(file_name)
+	return names
+
+def interpreted(file_name) -> dict:
+	meta = mediameta.open(file_name)
+	meta.interpret()
+	return dict(meta.all())
+
+def test_batch_hits_the_cache(cache, files):
+	mediameta.set_interpretation_cache_size(4096)
+	first = interpreted(files[0])
+	info = mediameta.interpretation_cache_info()
+	assert info.hits == 0 and info.misses == info.currsize > 0
+
+	# Only the ISO speed differs from file to file
+	for file_name in files[1:]:
+		assert interpreted(file_name).keys() == first.keys()
+	after = mediameta.interpretation_cache_info()
+	assert after.misses - info.misses <= len(files) - 1
+	assert after.hits >= (len(files) - 1) * (info.misses - 1)
+
+def test_cached_values_are_not_shared(cache, files):
+	meta = mediameta.open(files[0])
+	meta.interpret()
+	meta._interpreted_tags[0x829D].append('changed')
+	assert interpreted(files[0])['FNumber'] == 'f/2.8'
+	assert mediameta.interpretation_cache_info().hits > 0
+
+def test_same_values_with_and_without_the_cache(cache, files):
+	mediameta.set_interpretation_cache_size(0)
+	uncached = [interpreted(file_name) for file_name in files]
+	assert mediameta.interpretation_cache_info() == (0, 0, 0, 0)
+	mediameta.set_interpretation_cache_size(4096)
+	assert [interpreted(file_name) for file_name in files] == uncached
+	assert [interpreted(file_name) for file_name in files] == uncached
+
+def test_least_recently_used_values_are_dropped(cache, files):
+	mediameta.set_interpretation_cache_size(3)
+	interpreted(files[0])
+	assert mediameta.interpretation_cache_info().currsize == 3
+	mediameta.set_interpretation_cache_size(1)
+	assert mediameta.interpretation_cache_info().currsize == 1
+	mediameta.clear_interpretation_cache()
+	assert mediameta.interpretation_cache_info() == (0, 0, 1, 0)
+
+def test_own_interpreters_are_not_cached(cache, files):
+	meta = mediameta.open(files[0])
+	calls = []
+	meta.assign_interpreter('Make', lambda values: calls.append(values) or ['Interpreted'])
+	meta.interpret()
+	meta.interpret()
+	assert (meta['Make'], len(calls)) == ('Interpreted', 2)
@@ -0,0 +1,92 @@
+'''
+	Tests of the I/O hints of bulk scans.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import os
+
+import pytest
+
+import mediameta
+from mediameta import MediaMetadata
+from mediameta import prefetched
+from mediameta import physical_order
+from mediameta import mediametadata
+from mediameta.iohints import _open_for_scan
+import samples
+
+@pytest.fixture
+def dropped(monkeypatch):
+	# Turns bulk scans on and collects what would be dropped from the page cache
+	ranges = {}
+	monkeypatch.setattr(MediaMetadata, 'bulk_scan', True)
+	monkeypatch.setattr(mediametadata, '_drop_cache', lambda file_name, read_ranges: ranges.setdefault(file_name, list(read_ranges)))
+	return ranges
+
+def movie_after_media_data(size:int) -> bytes:
+	# A movie with moov after a big mdat, as cameras write them
+	movie = samples.mov()
+	ftyp_size = int.from_bytes(movie[:4], 'big')
+	return movie[:ftyp_size] + samples.box(b'mdat', b'\x11' * size) + movie[ftyp_size:]
+
+def test_reads_are_noted(tmp_path):
+	file_name = tmp_path / 'data'
+	file_name.write_bytes(bytes(range(256)) * 100)
+	ranges = []
+	with _open_for_scan(str(file_name), ranges) as f:
+		f.seek(1000)
+		assert f.read(10) == (bytes(range(256)) * 100)[1000:1010]
+		f.seek(20000)
+		f.read()
+	# Reads are buffered, the ranges noted cover what was asked for and stay within the file
+	assert any(offset <= 1000 and 1010 <= offset + length for (offset, length) in ranges)
+	assert all(offset + length <= 25600 for (offset, length) in ranges)
+	assert any(offset <= 20000 and 25600 == offset + length for (offset, length) in ranges)
+
+def test_bulk_scan_drops_only_what_was_read(tmp_path, dropped):
+	file_name = tmp_path / 'video.mov'
+	file_name.write_bytes(movie_after_media_data(4 * 1024 * 1024))
+	meta = mediameta.open(file_name)
+	assert meta['com.apple.quicktime.make'] == samples.MAKE
+	ranges = dropped[str(file_name)]
+	assert (0, 4096) in ranges
+	assert sum(length for (_, length) in ranges) < 64 * 1024
+
+def test_bulk_scan_reads_the_same(tmp_path, dropped):
+	image = tmp_path / 'image.jpg'
+	image.write_bytes(samples.jpeg(samples.tiff_block(), samples.xmp_segment()))
+	meta = mediameta.open(image)
+	assert str(image) in dropped
+	assert meta.xmp() == {'xmp:Rating': '4'}
+
+	MediaMetadata.bulk_scan = False
+	assert dict(mediameta.open(image).all()) == dict(meta.all())
+
+def test_prefetched(tmp_path):
+	names = [str(tmp_path / 'file{0}'.format(i)) for i in range(20)]
+	for name in names[::2]:
+		with open(name, 'wb') as f:
+			f.write(b'data')
+	# Files that are not there are not prefetched, but still yielded
+	assert list(prefetched(names, depth=3)) == names
+	assert list(prefetched(names, depth=100)) == names
+	assert list(prefetched([])) == []
+
+def test_physical_order(tmp_path):
+	names = []
+	for i in range(10):
+		file_name = tmp_path / 'file{0}'.format(i)
+		file_name.write_bytes(bytes([i]) * 8192)
+		names.append(str(file_name))
+	missing = [str(tmp_path / 'missing1'), str(tmp_path / 'missing0')]
+	shuffled = names[5:] + missing[:1] + names[:5] + missing[1:]
+
+	for use_fiemap in (True, False):
+		ordered = physical_order(shuffled, use_fiemap)
+		assert sorted(ordered[:len(names)]) == sorted(names)
+		# Files that cannot be looked at come last as they were given
+		assert ordered[len(names):] == missing
+	# Without FIEMAP the files are sorted by inode
+	assert physical_order(shuffled, use_fiemap=False)[:len(names)] == sorted(names, key=lambda name: os.stat(name).st_ino)
+	assert physical_order([]) == []
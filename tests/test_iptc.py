@@ -0,0 +1,90 @@
+'''
+	Tests of the IPTC-IIM and image resource indexes.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import struct
+
+import mediameta
+from mediameta import ImageResources
+from mediameta import IPTCIndex
+import samples
+
+DATASETS = [(1, 90, b'\x1b%G'), (2, 0, b'\x00\x04'), (2, 5, 'Заголовок'.encode('utf_8')),
+	(2, 25, b'one'), (2, 25, b'two'), (3, 10, b'\x01\x02')]
+
+def iim(datasets:list) -> bytes:
+	return b''.join(struct.pack('>BBBH', 0x1C, record, dataset, len(value)) + value for (record, dataset, value) in datasets)
+
+def resource(resource_id:int, data:bytes, name:bytes = b'') -> bytes:
+	# A resource block, the Pascal string name and the data padded to even lengths
+	pascal = bytes((len(name),)) + name
+	return b'8BIM' + struct.pack('>H', resource_id) + pascal + b'\x00' * (len(pascal) & 1) + \
+		struct.pack('>I', len(data)) + data + b'\x00' * (len(data) & 1)
+
+def test_datasets():
+	index = IPTCIndex(iim(DATASETS), 'latin_1')
+	assert len(index) == 5
+	assert index._decoded == {}
+	assert index['Keywords'] == ['one', 'two']
+	assert index['2:25'] is index['Keywords']
+	assert index['ObjectName'] == ['Заголовок']     # 1:90 switches text to UTF-8
+	assert index['ApplicationRecordVersion'] == [4]
+	assert index['3:10'] == [b'\x01\x02']
+	assert index['City'] == [] and 'City' not in index
+	assert index.get('City', 'none') == 'none'
+	assert index.keys() == ['CodedCharacterSet', 'ApplicationRecordVersion', 'ObjectName', 'Keywords', '3:10']
+
+def test_encoding():
+	data = iim([(2, 90, 'Санкт-Петербург'.encode('cp1251'))])
+	assert IPTCIndex(data, 'cp1251')['City'] == ['Санкт-Петербург']
+
+def test_extended_dataset():
+	value = b'x' * 40000
+	data = struct.pack('>BBBH', 0x1C, 2, 120, 0x8004) + struct.pack('>I', len(value)) + value + iim([(2, 5, b'Title')])
+	index = IPTCIndex(data)
+	assert index['Caption-Abstract'] == ['x' * 40000]
+	assert index['ObjectName'] == ['Title']
+
+def test_truncated_and_padded_data():
+	data = iim([(2, 5, b'Title'), (2, 25, b'one')])
+	assert IPTCIndex(data[:-1]).keys() == ['ObjectName']
+	assert IPTCIndex(data + b'\x00' * 3).keys() == ['ObjectName', 'Keywords']
+	assert len(IPTCIndex(b'')) == 0
+
+def test_image_resources():
+	data = resource(0x03ED, b'\x00' * 16) + resource(0x0404, iim([(2, 5, b'Title')]), b'IPTC') + \
+		resource(0x0404, b'second') + resource(0x0ABC, b'odd')
+	resources = ImageResources(data)
+	assert resources.ids() == [0x03ED, 0x0404, 0x0ABC]
+	assert 0x0404 in resources and 0x0406 not in resources
+	assert resources.name(0x0404) == 'IPTCNAA'
+	assert resources.name(0x0ABC) == 'Resource 0x0ABC'
+	block = resources.get(0x0404)
+	assert isinstance(block, memoryview)
+	assert IPTCIndex(block)['ObjectName'] == ['Title']
+	(offset, length) = resources.location(0x0ABC)
+	assert data[offset:offset+length] == b'odd'
+	assert resources.get(0x0406) is None
+	# A block running past the end stops the index
+	assert ImageResources(data[:-4]).ids() == [0x03ED, 0x0404]
+
+def test_jpeg(tmp_path):
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block(), samples.iptc_segment(DATASETS)))
+	meta = mediameta.open(file_name)
+	assert meta.image_resources().ids() == [0x0404]
+	assert meta.iptc()['Keywords'] == ['one', 'two']
+	assert meta.iptc() is meta.iptc()
+
+def test_tiff(tmp_path):
+	# IPTCNAA is read as it is, ImageResources is the fallback
+	file_name = tmp_path / 'sample.tif'
+	file_name.write_bytes(samples.tiff_block(ifd0=[(0x83BB, *samples.long(*struct.unpack('<3I', iim([(2, 5, b'Title12')]))))]))
+	assert mediameta.open(file_name).iptc()['ObjectName'] == ['Title12']
+
+	file_name.write_bytes(samples.tiff_block(ifd0=[(0x8649, *samples.undefined(resource(0x0404, iim([(2, 5, b'Title')]))))]))
+	meta = mediameta.open(file_name)
+	assert meta.image_resources().name(0x0404) == 'IPTCNAA'
+	assert meta.iptc()['ObjectName'] == ['Title']
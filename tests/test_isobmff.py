@@ -0,0 +1,83 @@
+'''
+	Tests of HEIC, AVIF and CR3 files read through the ISOBMFF box walker.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import struct
+
+import pytest
+
+import mediameta
+import samples
+
+CANON_NOTE = [(0x0009, *samples.ascii('Dandelion Owner')), (0x000C, *samples.long(123456))]
+
+def cr3(**options) -> bytes:
+	return samples.cr3([(0x010F, *samples.ascii('Canon')), (0x0110, *samples.ascii('EOS R5')),
+		(0x0132, *samples.ascii(samples.DATE_TIME))],
+		[(0x829D, *samples.rational((28, 10))), (0x9003, *samples.ascii(samples.DATE_TIME))],
+		CANON_NOTE,
+		[(0x0001, *samples.ascii('N')), (0x0002, *samples.rational((59, 1), (56, 1), (1234, 100)))], **options)
+
+@pytest.mark.parametrize('extension, brand, file_type', [
+	('.heic', b'heic', '.HEIC'),
+	('.heif', b'mif1', '.HEIF'),
+	('.avif', b'avif', '.AVIF')
+])
+def test_heif_images(tmp_path, extension, brand, file_type):
+	file_name = tmp_path / ('sample' + extension)
+	file_name.write_bytes(samples.heif(samples.tiff_block(), brand=brand, xmp=samples.XMP_PACKET,
+		icc=samples.icc_profile('HEIF P3')))
+	meta = mediameta.open(file_name)
+	assert meta.file_type() == file_type
+	assert meta['Make'] == samples.MAKE
+	assert meta['GPSLongitude'] == ['30/1', '18/1', '5678/100']
+	assert meta.xmp() == {'xmp:Rating': '4'}
+	assert meta.icc_profile().description() == 'HEIF P3'
+
+@pytest.mark.parametrize('method, extents', [(0, 1), (0, 4), (1, 1), (1, 3)])
+def test_exif_item_locations(tmp_path, method, extents):
+	file_name = tmp_path / 'sample.heic'
+	file_name.write_bytes(samples.heif(samples.tiff_block(), method, extents))
+	assert mediameta.open(file_name)['DateTimeOriginal'] == samples.DATE_TIME
+
+def test_exif_item_out_of_the_file(tmp_path):
+	data = samples.heif(samples.tiff_block())
+	file_name = tmp_path / 'sample.heic'
+	file_name.write_bytes(data[:data.index(b'mdat') + 10])
+	with pytest.raises(mediameta.UnsupportedMediaFile):
+		mediameta.open(file_name)
+
+def test_cr3(tmp_path):
+	file_name = tmp_path / 'sample.cr3'
+	file_name.write_bytes(cr3())
+	meta = mediameta.open(file_name)
+	assert meta.file_type() == '.CR3'
+	assert meta['Make'] == 'Canon'
+	assert meta['Model'] == 'EOS R5'
+	assert meta['FNumber'] == '28/10'
+	assert meta['GPSLatitudeRef'] == 'N'
+	assert meta['GPSLatitude'] == ['59/1', '56/1', '1234/100']
+	assert meta.makernote() == {'MakerNote:OwnerName': 'Dandelion Owner', 'MakerNote:SerialNumber': 123456}
+
+def test_cr3_image_data_is_not_read(tmp_path):
+	file_name = tmp_path / 'sample.cr3'
+	file_name.write_bytes(cr3(image_size=4 * 1024 * 1024))
+	assert mediameta.open(file_name, read_budget=16 * 1024)['Model'] == 'EOS R5'
+
+def test_cr3_without_cmt_boxes(tmp_path):
+	file_name = tmp_path / 'sample.cr3'
+	data = cr3()
+	file_name.write_bytes(data.replace(bytes.fromhex('85c0b687820f11e08111f4ce462b6a48'), b'\x00' * 16))
+	with pytest.raises(mediameta.UnsupportedMediaFile):
+		mediameta.open(file_name)
+
+def test_64_bit_box_sizes(tmp_path):
+	# The meta box written with a 64-bit size, the Exif item is in its idat box
+	data = samples.heif(samples.tiff_block(), method=1)
+	meta = struct.unpack('>I', data[:4])[0]
+	meta_size = struct.unpack('>I', data[meta:meta+4])[0]
+	file_name = tmp_path / 'sample.heic'
+	file_name.write_bytes(data[:meta] + struct.pack('>I', 1) + b'meta' + struct.pack('>Q', meta_size + 8) + data[meta+8:])
+	assert mediameta.open(file_name)['Make'] == samples.MAKE
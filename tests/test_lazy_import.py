@@ -0,0 +1,51 @@
+'''
+	Tests of the lazily loaded package.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+import mediameta
+import samples
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+def loaded_modules(code:str) -> list:
+	# The mediameta modules a fresh interpreter has loaded after running code
+	env = dict(os.environ, PYTHONPATH=SRC)
+	out = subprocess.run([sys.executable, '-c', code + '\nimport sys, json\n' +
+		'print(json.dumps(sorted(m for m in sys.modules if m.startswith("mediameta."))))'],
+		env=env, capture_output=True, text=True, check=True)
+	return json.loads(out.stdout)
+
+def test_import_loads_no_formats():
+	modules = loaded_modules('import mediameta')
+	for name in ('tags', 'imagemetadata', 'videometadata', 'interpreters', 'xmp', 'geoindex', 'archives'):
+		assert 'mediameta.' + name not in modules
+
+def test_a_video_loads_no_tag_tables(tmp_path):
+	file_name = tmp_path / 'video.mov'
+	file_name.write_bytes(samples.mov())
+	modules = loaded_modules('import mediameta\nmediameta.open({0!r})["com.apple.quicktime.make"]'.format(str(file_name)))
+	assert 'mediameta.videometadata' in modules
+	assert 'mediameta.tags' not in modules and 'mediameta.imagemetadata' not in modules
+
+def test_names_are_loaded_on_first_access():
+	assert mediameta.ImageMetadata.__name__ == 'ImageMetadata'
+	assert 'ImageMetadata' in vars(mediameta)
+	assert 'GeoIndex' in dir(mediameta)
+	with pytest.raises(AttributeError):
+		mediameta.NoSuchName
+
+def test_star_import_keeps_the_builtin_open():
+	scope = {}
+	exec('from mediameta import *', scope)
+	assert 'open' not in scope
+	assert all(name in scope for name in mediameta.__all__)
+	assert 'sniff' in scope and 'ImageMetadata' in scope
@@ -0,0 +1,59 @@
+'''
+	Tests of pairing Live Photos and grouping bursts.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import mediameta
+from mediameta import content_identifier
+from mediameta import burst_uuid
+from mediameta import pair_live_photos
+from mediameta import group_bursts
+import samples
+
+BURST = 'BBBBBBBB-2222-3333-4444-555555555555'
+OTHER = 'CCCCCCCC-2222-3333-4444-555555555555'
+
+def image(tmp_path, name:str, content_identifier:str = samples.CONTENT_IDENTIFIER, burst_uuid:str = None):
+	file_name = tmp_path / name
+	file_name.write_bytes(samples.jpeg(samples.tiff_block(
+		exif=[(0x927C, *samples.undefined(samples.apple_makernote(content_identifier, burst_uuid)))])))
+	return mediameta.open(file_name)
+
+def video(tmp_path, name:str, content_identifier:str = samples.CONTENT_IDENTIFIER):
+	file_name = tmp_path / name
+	file_name.write_bytes(samples.mov({'com.apple.quicktime.make': samples.MAKE,
+		'com.apple.quicktime.content.identifier': content_identifier}))
+	return mediameta.open(file_name)
+
+def test_identifiers(tmp_path):
+	assert content_identifier(image(tmp_path, 'image.jpg', samples.CONTENT_IDENTIFIER.lower())) == samples.CONTENT_IDENTIFIER
+	assert content_identifier(video(tmp_path, 'video.mov')) == samples.CONTENT_IDENTIFIER
+	assert content_identifier(video(tmp_path, 'blank.mov', ' ')) is None
+
+	shot = image(tmp_path, 'burst.jpg', burst_uuid=BURST)
+	assert burst_uuid(shot) == BURST
+	assert burst_uuid(image(tmp_path, 'single.jpg')) is None
+
+	plain = tmp_path / 'plain.jpg'
+	plain.write_bytes(samples.jpeg(samples.tiff_block()))
+	assert content_identifier(mediameta.open(plain)) is None and burst_uuid(mediameta.open(plain)) is None
+
+def test_pair_live_photos(tmp_path):
+	heic_export = image(tmp_path, 'a.jpg')
+	jpeg_export = image(tmp_path, 'b.jpg')
+	movie = video(tmp_path, 'a.mov')
+	unpaired_image = image(tmp_path, 'c.jpg', OTHER)
+	unpaired_video = video(tmp_path, 'd.mov', BURST)
+
+	pairs = pair_live_photos(iter([movie, heic_export, unpaired_image, unpaired_video, jpeg_export]))
+	assert pairs == [(heic_export, movie), (jpeg_export, movie)]
+	assert pair_live_photos([unpaired_image, unpaired_video]) == []
+
+def test_group_bursts(tmp_path):
+	shots = [image(tmp_path, 'shot{0}.jpg'.format(i), OTHER, BURST) for i in range(3)]
+	single = image(tmp_path, 'single.jpg', burst_uuid=OTHER)
+	movie = video(tmp_path, 'a.mov')
+
+	assert group_bursts(iter([shots[0], single, movie, shots[1], shots[2]])) == [shots]
+	assert group_bursts([single, movie]) == []
@@ -0,0 +1,73 @@
+'''
+	Tests of MakerNotes decoded on demand.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import struct
+
+import pytest
+
+import mediameta
+import samples
+
+def with_note(make:str, note) -> bytes:
+	# A TIFF with a MakerNote. note is the bytes of the note or a function making
+	# them from the offset of the note in the TIFF data, for vendors counting
+	# offsets from the TIFF header. The note is placed, found and made again,
+	# its length does not change, so neither does the layout.
+	make_note = note if callable(note) else lambda offset: note
+	draft = make_note(0)
+	tiff = samples.tiff_block(exif=[(0x927C, *samples.undefined(draft))], make=make)
+	return samples.tiff_block(exif=[(0x927C, *samples.undefined(make_note(tiff.index(draft))))], make=make)
+
+def canon(offset:int) -> bytes:
+	return samples.ifd([(0x0008, *samples.long(1001234)), (0x0009, *samples.ascii('Dandelion Owner'))], offset)
+
+def sony(offset:int) -> bytes:
+	return b'SONY DSC \x00\x00\x00' + samples.ifd([(0xB001, *samples.short(358)), (0x0102, *samples.long(2))], offset + 12)
+
+def nikon() -> bytes:
+	entries = [(0x0002, *samples.short(0, 400)), (0x001D, *samples.ascii('1234567'))]
+	return b'Nikon\x00\x02\x10\x00\x00' + b'II*\x00' + struct.pack('<I', 8) + samples.ifd(entries, 8)
+
+def fujifilm() -> bytes:
+	entries = [(0x1000, *samples.ascii('NORMAL')), (0x1401, *samples.short(0x0600))]
+	return b'FUJIFILM' + struct.pack('<I', 12) + samples.ifd(entries, 12)
+
+@pytest.mark.parametrize('make, note, expected', [
+	('Apple', samples.apple_makernote(), {'MakerNote:ContentIdentifier': samples.CONTENT_IDENTIFIER}),
+	('Canon', canon, {'MakerNote:FileNumber': 1001234, 'MakerNote:OwnerName': 'Dandelion Owner'}),
+	('SONY', sony, {'MakerNote:SonyModelID': 358, 'MakerNote:Quality': 2}),
+	('NIKON CORPORATION', nikon(), {'MakerNote:ISO': [0, 400], 'MakerNote:SerialNumber': '1234567'}),
+	('FUJIFILM', fujifilm(), {'MakerNote:Quality': 'NORMAL', 'MakerNote:FilmMode': 0x0600})
+], ids=['Apple', 'Canon', 'Sony', 'Nikon', 'Fujifilm'])
+def test_vendors(tmp_path, make, note, expected):
+	file_name = tmp_path / 'sample.tif'
+	file_name.write_bytes(with_note(make, note))
+	meta = mediameta.open(file_name)
+	assert not meta._makernote_decoded
+	assert all(key < 0x20000 for key in meta._tags)
+	assert meta.makernote() == expected
+
+	# Any MakerNote tag decodes the note
+	meta = mediameta.open(file_name)
+	(name, value) = next(iter(expected.items()))
+	assert meta[name] == value
+	assert meta._makernote_decoded
+
+def test_unknown_and_broken_notes(tmp_path):
+	file_name = tmp_path / 'sample.tif'
+	file_name.write_bytes(with_note('Dandelion', b'\x00' * 64))
+	assert mediameta.open(file_name).makernote() == {}
+
+	# An IFD running past the end of the note is left alone
+	file_name.write_bytes(with_note('FUJIFILM', fujifilm()[:20]))
+	meta = mediameta.open(file_name)
+	assert meta.makernote() == {}
+	assert meta['Make'] == 'FUJIFILM'
+
+def test_makernote_of_a_jpeg(tmp_path):
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(with_note('Canon', canon)))
+	assert mediameta.open(file_name)['MakerNote:OwnerName'] == 'Dandelion Owner'
@@ -0,0 +1,66 @@
+'''
+	Tests of the Multi-Picture index of JPEG files.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import mediameta
+from mediameta import MPImage
+import samples
+
+def multi_picture() -> tuple:
+	# A primary image with a preview and a gain map appended. Returns the file
+	# and the bytes of the appended images.
+	preview = samples.jpeg(samples.tiff_block())
+	gain_map = samples.jpeg()
+
+	def primary(base:int, size:int) -> bytes:
+		# Offsets and sizes do not change the length of the segment
+		return samples.jpeg(samples.tiff_block(), samples.mpf_segment([
+			(0x20030000, size, 0, 2, 3),
+			(0x00010001, len(preview), size - base, 0, 0),
+			(0x00050000, len(gain_map), size + len(preview) - base, 0, 0)
+		]))
+
+	draft = primary(0, 0)
+	return (primary(draft.index(b'MPF\x00') + 4, len(draft)) + preview + gain_map, preview, gain_map)
+
+def test_embedded_images(tmp_path):
+	(data, preview, gain_map) = multi_picture()
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(data)
+	meta = mediameta.open(file_name)
+	assert meta._mp_images is None
+	size = len(data) - len(preview) - len(gain_map)
+	assert meta.embedded_images() == [
+		MPImage('Baseline MP Primary Image', 0, size, [2, 3]),
+		MPImage('Large Thumbnail (VGA)', size, len(preview), []),
+		MPImage('Gain Map Image', size + len(preview), len(gain_map), [])
+	]
+	assert bytes(meta.embedded_image(0)) == data[:size]
+	assert bytes(meta.embedded_image(1)) == preview
+	assert bytes(meta.embedded_image(2)) == gain_map
+	assert meta.embedded_image(3) is None and meta.embedded_image(-1) is None
+	# MP Index tags are kept apart from the tags of the image
+	assert 'Make' in dict(meta.all()) and not any(key >= 0x70000 for key in meta._tags)
+
+def test_images_out_of_the_file(tmp_path):
+	(data, preview, gain_map) = multi_picture()
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(data[:-len(gain_map)])
+	meta = mediameta.open(file_name)
+	assert len(meta.embedded_images()) == 3
+	assert bytes(meta.embedded_image(1)) == preview
+	assert meta.embedded_image(2) is None
+
+def test_no_mpf_segment(tmp_path):
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block()))
+	meta = mediameta.open(file_name)
+	assert meta.embedded_images() == []
+	assert meta.embedded_image(0) is None
+
+def test_broken_mp_index(tmp_path):
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block(), samples.segment(0xFFE2, b'MPF\x00II*\x00\xFF\xFF\x00\x00')))
+	assert mediameta.open(file_name).embedded_images() == []
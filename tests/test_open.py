@@ -0,0 +1,84 @@
+'''
+	Tests of telling formats by their magic numbers and of mediameta.open().
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import io
+
+import pytest
+
+import mediameta
+from mediameta import sniff
+from mediameta.mediametadata import _PrereadFile
+import samples
+
+@pytest.mark.parametrize('header, file_type', [
+	(b'\xFF\xD8\xFF\xE0', '.JPG'),
+	(b'\x89PNG\r\n\x1a\n', '.PNG'),
+	(b'RIFF\x00\x01\x00\x00WEBPVP8X', '.WEBP'),
+	(b'\x00\x00\x00\x0cJXL \r\n\x87\n', '.JXL'),
+	(b'\xFF\x0A\x11\x11', '.JXL'),
+	(b'\x00\x00\x00\x18ftypheic\x00\x00\x00\x00mif1heic', '.HEIC'),
+	(b'\x00\x00\x00\x18ftypavif\x00\x00\x00\x00mif1avif', '.AVIF'),
+	(b'\x00\x00\x00\x18ftypcrx \x00\x00\x00\x01crx isom', '.CR3'),
+	(b'\x00\x00\x00\x14ftypqt  \x00\x00\x00\x00qt  ', '.MOV'),
+	(b'\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00isommp42', '.MP4'),
+	(b'\x00\x00\x00\x18ftypXXXX\x00\x00\x00\x00XXXXheix', '.HEIC'),   # by a compatible brand
+	(b'\x00\x00\x00\x10ftypXXXX\x00\x00\x00\x00heix', None),          # past the end of ftyp
+	(b'II*\x00\x10\x00\x00\x00CR\x02\x00', '.CR2'),
+	(b'II*\x00\x08\x00\x00\x00', '.TIFF'),
+	(b'MM\x00*\x00\x00\x00\x08', '.TIFF'),
+	(b'IIRO\x08\x00\x00\x00', '.ORF'),
+	(b'IIU\x00\x08\x00\x00\x00', '.RW2'),
+	(b'GIF89a', None),
+	(b'', None)
+])
+def test_sniff(header, file_type):
+	assert sniff(header) == file_type
+
+def test_open_tells_the_format_by_the_content(tmp_path):
+	# Names do not matter, the first bytes do
+	file_name = tmp_path / 'image.png'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block()))
+	meta = mediameta.open(file_name)
+	assert isinstance(meta, mediameta.ImageMetadata)
+	assert meta.file_type() == '.JPG'
+	assert meta['Make'] == samples.MAKE
+
+	file_name = tmp_path / 'video.jpg'
+	file_name.write_bytes(samples.mov())
+	meta = mediameta.open(str(file_name))
+	assert isinstance(meta, mediameta.VideoMetadata)
+	assert meta.file_type() == '.MOV'
+	assert meta['com.apple.quicktime.model'] == samples.MODEL
+
+def test_open_passes_options_on(tmp_path):
+	file_name = tmp_path / 'image'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block(exif=[(0x927C, *samples.undefined(samples.apple_makernote()))])))
+	assert isinstance(mediameta.open(file_name, keep_blobs=False)._tags[0x927C][0], mediameta.BlobReference)
+	with pytest.raises(mediameta.ParsingBudgetExceeded):
+		mediameta.open(file_name, read_budget=100)
+
+	# Batches pass the same options to every file, videos ignore those of images
+	file_name.write_bytes(samples.mov())
+	assert mediameta.open(file_name, keep_blobs=False)['com.apple.quicktime.make'] == samples.MAKE
+
+def test_open_unknown_formats(tmp_path):
+	file_name = tmp_path / 'image.jpg'
+	file_name.write_bytes(b'GIF89a' + b'\x00' * 100)
+	with pytest.raises(mediameta.UnsupportedMediaFile):
+		mediameta.open(file_name)
+	file_name.write_bytes(b'')
+	with pytest.raises(mediameta.UnsupportedMediaFile):
+		mediameta.open(file_name)
+
+def test_preread_file():
+	data = bytes(range(100))
+	f = _PrereadFile(io.BytesIO(data), data[:10])
+	assert f.read(4) == data[:4]
+	assert f.read(10) == data[4:14]           # from the header and from the file
+	f.seek(2)
+	assert f.read() == data[2:]
+	f.seek(-5, io.SEEK_END)
+	assert (f.tell(), f.read(10)) == (95, data[95:])
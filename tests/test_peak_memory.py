@@ -0,0 +1,45 @@
+'''
+	Peak memory of parsing big files, see benchmarks/peak_memory.py.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import os
+import sys
+import importlib.util
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+import peak_memory
+
+# Big enough for a parser reading or touching a whole file to go over the budgets
+FILE_SIZE = 256 * 1024 * 1024
+
+@pytest.fixture(scope='module')
+def directory(tmp_path_factory):
+	# Sparse files only, writing FILE_SIZE bytes of zeros is not what is tested
+	directory = tmp_path_factory.mktemp('sparse')
+	probe = directory / 'probe'
+	peak_memory.write_sparse(probe, FILE_SIZE, b'head', b'tail')
+	blocks = getattr(os.stat(probe), 'st_blocks', None)
+	os.remove(probe)
+	if blocks is None or blocks * 512 >= FILE_SIZE // 2:
+		pytest.skip('No sparse files on this file system')
+	if importlib.util.find_spec('resource') is None:
+		pytest.skip('No resource module on this system')
+	return directory
+
+@pytest.mark.parametrize('title, class_name, extension, generate', peak_memory.SCENARIOS)
+def test_peak_memory(directory, title, class_name, extension, generate):
+	file_name = directory / ('sparse' + extension)
+	metadata_size = generate(file_name, FILE_SIZE)
+	try:
+		result = peak_memory.measure(class_name, str(file_name))
+	finally:
+		os.remove(file_name)
+
+	assert 'error' not in result, result.get('error')
+	assert result['tags'] > 0
+	assert result['peak'] <= peak_memory.TRACEMALLOC_BASE + peak_memory.TRACEMALLOC_FACTOR * metadata_size
+	assert result['rss'] <= peak_memory.RSS_BASE + peak_memory.RSS_FACTOR * metadata_size
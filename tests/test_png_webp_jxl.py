@@ -0,0 +1,79 @@
+'''
+	Tests of EXIF, XMP and ICC profiles in PNG, WebP and JPEG XL files.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import struct
+
+import pytest
+
+import mediameta
+from mediameta import BlobReference
+import samples
+
+NOTE = samples.apple_makernote()
+TIFF = samples.tiff_block(exif=[(0x927C, *samples.undefined(NOTE))])
+PROFILE = samples.icc_profile('sRGB')
+
+FORMATS = [
+	('.png', '.PNG', lambda **options: samples.png(TIFF, samples.XMP_PACKET, PROFILE, **options)),
+	('.webp', '.WEBP', lambda **options: samples.webp(TIFF, samples.XMP_PACKET, PROFILE, **options)),
+	('.jxl', '.JXL', lambda **options: samples.jxl(TIFF, samples.XMP_PACKET, **options))
+]
+
+@pytest.mark.parametrize('extension, file_type, make', FORMATS)
+def test_metadata(tmp_path, extension, file_type, make):
+	file_name = tmp_path / ('sample' + extension)
+	file_name.write_bytes(make())
+	meta = mediameta.open(file_name)
+	assert meta.file_type() == file_type
+	assert meta['Make'] == samples.MAKE
+	assert meta['DateTimeOriginal'] == samples.DATE_TIME
+	assert meta['GPSLatitude'] == ['59/1', '56/1', '1234/100']
+	assert meta['MakerNote:ContentIdentifier'] == samples.CONTENT_IDENTIFIER
+	assert meta.xmp() == {'xmp:Rating': '4'}
+	if extension != '.jxl':
+		assert meta.icc_profile().description() == 'sRGB'
+
+@pytest.mark.parametrize('extension, file_type, make', FORMATS)
+def test_blobs_point_into_the_file(tmp_path, extension, file_type, make):
+	data = make()
+	file_name = tmp_path / ('sample' + extension)
+	file_name.write_bytes(data)
+	reference = mediameta.open(file_name, keep_blobs=False)._tags[0x927C][0]
+	assert isinstance(reference, BlobReference)
+	assert data[reference.offset:reference.offset + reference.length] == NOTE
+
+@pytest.mark.parametrize('extension, file_type, make', FORMATS)
+def test_image_data_is_not_read(tmp_path, extension, file_type, make):
+	file_name = tmp_path / ('sample' + extension)
+	file_name.write_bytes(make(image_size=4 * 1024 * 1024))
+	assert mediameta.open(file_name, read_budget=64 * 1024)['Make'] == samples.MAKE
+
+def test_webp_exif_with_the_app1_prefix(tmp_path):
+	file_name = tmp_path / 'sample.webp'
+	file_name.write_bytes(samples.webp(TIFF, app1_prefix=True))
+	assert mediameta.open(file_name)['Model'] == samples.MODEL
+
+def test_jxl_boxes_with_64_bit_sizes(tmp_path):
+	data = samples.jxl(TIFF)
+	exif = data.index(b'Exif') - 4
+	exif_box = struct.pack('>I', 1) + b'Exif' + struct.pack('>Q', len(data) - exif + 8) + data[exif+8:]
+	file_name = tmp_path / 'sample.jxl'
+	file_name.write_bytes(data[:exif] + exif_box)
+	assert mediameta.open(file_name)['Model'] == samples.MODEL
+
+def test_files_without_exif(tmp_path):
+	# A bare JPEG XL codestream has no boxes, a PNG may have no eXIf chunk
+	file_name = tmp_path / 'sample.jxl'
+	file_name.write_bytes(b'\xFF\x0A' + b'\x11' * 100)
+	with pytest.raises(mediameta.UnsupportedMediaFile):
+		mediameta.open(file_name)
+
+	file_name = tmp_path / 'sample.png'
+	data = samples.png(TIFF)
+	exif = data.index(b'eXIf') - 4
+	file_name.write_bytes(data[:exif] + data[exif+12+len(TIFF):])
+	with pytest.raises(mediameta.UnsupportedMediaFile):
+		mediameta.open(file_name)
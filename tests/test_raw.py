@@ -0,0 +1,64 @@
+'''
+	Tests of camera RAW files based on TIFF.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import struct
+
+import pytest
+
+import mediameta
+from mediameta import ImageMetadata
+import samples
+
+IMAGE_SIZE = 8 * 1024 * 1024
+
+# Extension, signature, bytes between the header and IFD0, the type told by the first bytes
+RAWS = [
+	('.dng', b'II*\x00', b'', '.TIFF'),
+	('.nef', b'II*\x00', b'', '.TIFF'),
+	('.arw', b'II*\x00', b'', '.TIFF'),
+	('.cr2', b'II*\x00', b'CR\x02\x00' + struct.pack('<I', 0), '.CR2'),
+	('.orf', b'IIRO', b'', '.ORF'),
+	('.rw2', b'IIU\x00', b'', '.RW2')
+]
+
+def raw(signature:bytes, extra:bytes) -> bytes:
+	# The metadata, then the image data the strip points to
+	strip = [(0x0111, *samples.long(0)), (0x0117, *samples.long(IMAGE_SIZE))]
+	tiff = samples.tiff_block(ifd0=strip, signature=signature, extra=extra)
+	strip = [(0x0111, *samples.long(len(tiff))), (0x0117, *samples.long(IMAGE_SIZE))]
+	return samples.tiff_block(ifd0=strip, signature=signature, extra=extra)
+
+@pytest.mark.parametrize('extension, signature, extra, file_type', RAWS)
+def test_raw(tmp_path, extension, signature, extra, file_type):
+	file_name = tmp_path / ('sample' + extension)
+	with open(file_name, 'wb') as f:
+		f.write(raw(signature, extra))
+		f.truncate(f.tell() + IMAGE_SIZE)
+
+	# Told by the name and by the first bytes alike, the image data is never read
+	meta = ImageMetadata(file_name, read_budget=64 * 1024)
+	assert meta.file_type() == extension.upper()
+	assert meta['Make'] == samples.MAKE
+	assert meta['FNumber'] == '28/10'
+	assert meta['GPSLatitudeRef'] == 'N'
+	assert meta['StripOffsets'] == len(raw(signature, extra))
+
+	meta = mediameta.open(file_name, read_budget=64 * 1024)
+	assert meta.file_type() == file_type
+	assert meta['Model'] == samples.MODEL
+
+def test_big_endian_tiff(tmp_path):
+	file_name = tmp_path / 'sample.tif'
+	file_name.write_bytes(b'MM\x00*' + struct.pack('>I', 8) + struct.pack('>H', 1) +
+		struct.pack('>HHII', 0x0110, 2, 7, 26) + struct.pack('>I', 0) + b'Sample\x00')
+	assert mediameta.open(file_name)['Model'] == 'Sample'
+
+def test_not_a_tiff(tmp_path):
+	file_name = tmp_path / 'sample.nef'
+	file_name.write_bytes(b'IIXX' + struct.pack('<I', 8) + b'\x00' * 100)
+	with pytest.raises(mediameta.UnsupportedMediaFile):
+		mediameta.open(file_name)
+	assert list(ImageMetadata(file_name).all()) == []
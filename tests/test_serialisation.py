@@ -0,0 +1,147 @@
+'''
+	Tests of to_bytes(), from_bytes() and batches.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import pytest
+
+import mediameta
+from mediameta import MediaMetadata
+from mediameta import BlobReference
+import samples
+
+# A record of version 2 of the sample JPEG written by samples.jpeg(samples.tiff_block())
+LEGACY_RECORD = bytes.fromhex(
+	'4d4d4d44020d496d6167654d657461646174610b002f746d702f6c672e6a7067042e4a5047057574665f380e00010f01070100000009'
+	'00000044616e64656c696f6e01100107010000000600000053616d706c6501120100010000000101320107010000001300000032303232'
+	'3a30363a30312031323a30303a303081698700010000007c8125880001000000ce019d8204010000001c0000000a000000010390070100'
+	'000013000000323032323a30363a30312031323a30303a30300102a00101000000c00f0103a00101000000d00b0201000701000000010000'
+	'004e02020004030000003b000000010000003800000001000000d2040000640000000203000701000000010000004502040004030000001e'
+	'0000000100000012000000010000002e16000064000000107481b7164e6097cec660a1e3cdfd8f30')
+
+@pytest.fixture
+def image(tmp_path):
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block(exif=[(0x927C, *samples.undefined(samples.apple_makernote()))]),
+		samples.xmp_segment() + samples.icc_segments(samples.icc_profile())))
+	return file_name
+
+@pytest.fixture
+def video(tmp_path):
+	file_name = tmp_path / 'sample.mov'
+	file_name.write_bytes(samples.mov())
+	return file_name
+
+def assert_same(restored, meta):
+	assert type(restored) is type(meta)
+	assert restored.file_name() == meta.file_name()
+	assert restored.file_type() == meta.file_type()
+	assert restored._tags.keys() == meta._tags.keys()
+	for (key, values) in meta._tags.items():
+		assert [bytes(v) if isinstance(v, memoryview) else v for v in values] == restored._tags[key], key
+		assert [bytes if isinstance(v, memoryview) else type(v) for v in values] == list(map(type, restored._tags[key])), key
+	assert restored._nonprintable_tags == meta._nonprintable_tags
+	assert restored._digest == meta._digest
+
+def test_image_round_trip(image):
+	meta = mediameta.open(image)
+	assert mediameta.metadata_digest(meta) is not None
+	restored = MediaMetadata.from_bytes(meta.to_bytes())
+	assert_same(restored, meta)
+	assert restored['FNumber'] == meta['FNumber']
+	assert dict(restored.all()) == dict(meta.all())
+
+def test_video_round_trip(video):
+	meta = mediameta.open(video)
+	restored = MediaMetadata.from_bytes(meta.to_bytes())
+	assert_same(restored, meta)
+	assert restored['com.apple.quicktime.creationdate'] == '2022-06-01T12:00:00+0300'
+
+def test_restored_image_reads_its_file(image):
+	# Segments, ICC profile and MakerNote are found where the original object found them
+	meta = mediameta.open(image, keep_blobs=False)
+	restored = MediaMetadata.from_bytes(meta.to_bytes())
+	assert isinstance(restored._tags[0x927C][0], BlobReference)
+	assert restored.xmp() == meta.xmp() == {'xmp:Rating': '4'}
+	assert restored.icc_profile().description() == 'Display P3'
+	assert restored['MakerNote:ContentIdentifier'] == samples.CONTENT_IDENTIFIER
+	assert restored.makernote() == meta.makernote()
+
+def test_restored_image_can_be_updated(image):
+	restored = MediaMetadata.from_bytes(mediameta.open(image).to_bytes())
+	restored.update({'Orientation': [6]})
+	assert mediameta.open(image)['Orientation'] == 6
+
+def test_values_of_every_type(image):
+	meta = mediameta.open(image)
+	meta._tags |= {
+		'ints': [0, 1, 0xFFFFFFFF, -1, 2**40, -2**63],
+		'floats': [0.5, -1e300, float('inf')],
+		'strings': ['', 'plain', 'with\x00nul', 'юникод', '\udcff'],
+		'bytes': [b'', b'\x00' * 300, bytearray(b'abc')],
+		'blobs': [BlobReference(2**40, 10)],
+		'mixed': ['1/2', 3, 4.5, b'6', BlobReference(7, 8), True],
+		'none': []
+	}
+	meta._nonprintable_tags |= {'bytes', 0x0110}
+	restored = MediaMetadata.from_bytes(meta.to_bytes())
+	assert restored._tags['mixed'] == ['1/2', 3, 4.5, b'6', BlobReference(7, 8), 1]
+	assert restored._tags['bytes'] == [b'', b'\x00' * 300, b'abc']
+	for key in ('ints', 'floats', 'strings', 'blobs', 'none'):
+		assert restored._tags[key] == meta._tags[key], key
+	assert restored._nonprintable_tags == meta._nonprintable_tags
+
+def test_same_layout_different_values(tmp_path):
+	# Files of one camera share the layout of their records, not their values
+	first = tmp_path / 'first.jpg'
+	second = tmp_path / 'second.jpg'
+	first.write_bytes(samples.jpeg(samples.tiff_block(exif=[(0x8827, *samples.short(100))])))
+	second.write_bytes(samples.jpeg(samples.tiff_block(exif=[(0x8827, *samples.short(200))])))
+	(a, b) = mediameta.load_batch(mediameta.dump_batch([mediameta.open(first), mediameta.open(second)]))
+	assert (a._tags[0x8827], b._tags[0x8827]) == ([100], [200])
+
+def test_legacy_record():
+	restored = MediaMetadata.from_bytes(LEGACY_RECORD)
+	assert restored['Make'] == samples.MAKE
+	assert restored['GPSLatitude'] == ['59/1', '56/1', '1234/100']
+	assert restored._digest is not None
+
+def test_records_at_an_offset(image, video):
+	records = [mediameta.open(image).to_bytes(), mediameta.open(video).to_bytes()]
+	data = memoryview(b'junk' + b''.join(records))
+	(first, end) = MediaMetadata._unpack(data, 4)
+	assert end == 4 + len(records[0])
+	assert MediaMetadata.from_bytes(data, end)['com.apple.quicktime.make'] == samples.MAKE
+	assert first['Make'] == samples.MAKE
+
+def test_corrupt_records(image):
+	record = mediameta.open(image).to_bytes()
+	with pytest.raises(ValueError):
+		MediaMetadata.from_bytes(b'not a record')
+	for length in range(len(record)):
+		with pytest.raises(ValueError):
+			MediaMetadata.from_bytes(record[:length])
+	for position in range(5, len(record)):
+		broken = bytearray(record)
+		broken[position] ^= 0xFF
+		try:
+			MediaMetadata.from_bytes(bytes(broken))
+		except ValueError:
+			pass
+
+def test_batches(image, video):
+	items = [mediameta.open(image), mediameta.open(video), mediameta.open(image, keep_blobs=False)]
+	restored = mediameta.load_batch(mediameta.dump_batch(items))
+	assert len(restored) == len(items)
+	for (r, meta) in zip(restored, items):
+		assert_same(r, meta)
+
+	buffer = bytearray(100000)
+	size = mediameta.dump_batch_into(buffer, items, 10)
+	assert size == len(mediameta.dump_batch(items))
+	for (r, meta) in zip(mediameta.load_batch(memoryview(buffer), 10), items):
+		assert_same(r, meta)
+
+	with pytest.raises(ValueError):
+		mediameta.dump_batch_into(bytearray(size - 1), items)
@@ -0,0 +1,73 @@
+'''
+	Tests of sharded scans through a work queue.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import pytest
+
+import mediameta
+from mediameta import ShardQueue
+from mediameta import SQLiteShardQueue
+from mediameta import enqueue
+from mediameta import scan_shards
+from mediameta import load_shards
+import samples
+
+@pytest.fixture
+def library(tmp_path):
+	# Seven images, a video and a file that is not a media file
+	paths = []
+	for i in range(7):
+		file_name = tmp_path / 'image{0}.jpg'.format(i)
+		file_name.write_bytes(samples.jpeg(samples.tiff_block(exif=[(0x8827, *samples.short(i + 1))])))
+		paths.append(str(file_name))
+	(tmp_path / 'video.mov').write_bytes(samples.mov())
+	(tmp_path / 'notes.txt').write_bytes(b'not a media file')
+	return paths + [str(tmp_path / 'video.mov'), str(tmp_path / 'notes.txt'), str(tmp_path / 'missing.jpg')]
+
+def test_queue_is_abstract():
+	with pytest.raises(TypeError):
+		ShardQueue()
+
+def test_enqueue_is_idempotent(tmp_path, library):
+	with SQLiteShardQueue(str(tmp_path / 'queue.db')) as queue:
+		assert enqueue(queue, [path + '\n' for path in library] + ['\n'], shard_size=4) == 3
+		assert enqueue(queue, library, shard_size=4) == 0
+		assert queue.progress() == {'pending': 3, 'claimed': 0, 'done': 0}
+
+def test_claims_and_leases(tmp_path):
+	with SQLiteShardQueue(str(tmp_path / 'queue.db')) as queue:
+		enqueue(queue, ['a', 'b', 'c'], shard_size=2)
+		assert queue.claim('one', 60) == ('0000000000', ['a', 'b'])
+		assert queue.claim('two', 60) == ('0000000001', ['c'])
+		assert queue.claim('three', 60) is None
+		assert queue.renew('0000000000', 'one', 60)
+		assert not queue.renew('0000000000', 'two', 60)
+
+		# An expired lease hands the shard out again
+		assert queue.renew('0000000001', 'two', -1)
+		assert queue.claim('three', 60) == ('0000000001', ['c'])
+		assert not queue.renew('0000000001', 'two', 60)
+
+		queue.complete('0000000000', 'one', ['b'])
+		assert queue.progress() == {'pending': 0, 'claimed': 1, 'done': 1}
+		assert queue.failed() == ['b']
+
+def test_scan_and_resume(tmp_path, library):
+	output = tmp_path / 'results'
+	with SQLiteShardQueue(str(tmp_path / 'queue.db')) as queue:
+		enqueue(queue, library, shard_size=4)
+		# The first worker stops after one shard, the second one picks up the rest
+		assert scan_shards(queue, str(output), worker='one', max_shards=1) == 1
+		assert queue.progress() == {'pending': 2, 'claimed': 0, 'done': 1}
+		assert scan_shards(queue, str(output), worker='two', ordered=True, keep_blobs=False) == 2
+		assert scan_shards(queue, str(output)) == 0
+		assert sorted(queue.failed()) == sorted(library[-2:])
+
+	assert sorted(path.name for path in output.iterdir()) == ['0000000000.mmb', '0000000001.mmb', '0000000002.mmb']
+	results = list(load_shards(str(output)))
+	assert sorted(meta.file_name() for meta in results) == sorted(library[:-2])
+	assert {meta.file_name(): meta['ISOSpeedRatings'] for meta in results if meta.file_name().endswith('.jpg')} == \
+		{path: i + 1 for (i, path) in enumerate(library[:7])}
+	assert [type(meta) for meta in results].count(mediameta.VideoMetadata) == 1
@@ -0,0 +1,50 @@
+'''
+	Tests of tags stored under integer keys and named through the registry.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import mediameta
+from mediameta.tags import _TagRegistry
+from mediameta.tags import _GPS_NAMESPACE
+from mediameta.tags import _tag_name
+from mediameta.tags import _tag_keys
+import samples
+
+def test_registry_round_trip():
+	for (key, info) in _TagRegistry.items():
+		assert info.key == key
+		assert _tag_name(key) == info.name
+		assert key in _tag_keys(info.name)
+
+def test_unknown_tags():
+	assert _tag_name(0xC0DE) == 'Tag 0xC0DE (49374)'
+	assert _tag_keys('Tag 0xC0DE (49374)') == (0xC0DE, _GPS_NAMESPACE | 0xC0DE)
+	assert _tag_name(0x30000 | 0xC0DE) == 'MakerNote:Tag 0xC0DE (49374)'
+	assert 0x30000 | 0xC0DE in _tag_keys('MakerNote:Tag 0xC0DE (49374)')
+	for name in ('Tag 0xC0DE (49375)', 'Tag 0xXYZW (00000)', 'Tag 0xC0DE', 'NoSuchTag'):
+		assert _tag_keys(name) == ()
+	# Make is not found under its number, an unknown GPS tag of that number is
+	assert _tag_keys('Tag 0x010F (00271)') == (_GPS_NAMESPACE | 0x010F, )
+
+def test_image_tags(tmp_path):
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block(
+		ifd0=[(0x9C9B, 1, 12, 'Title'.encode('utf_16_le') + b'\x00\x00'), (0xC0DE, *samples.short(7))])))
+	meta = mediameta.open(file_name)
+
+	assert all(isinstance(key, int) for key in meta._tags)
+	assert meta._tags[0x010F] == [samples.MAKE]
+	assert meta._tags[_GPS_NAMESPACE | 0x0001] == ['N']
+	assert meta['Make'] == samples.MAKE
+	assert meta['GPSLatitudeRef'] == 'N'
+	assert meta['XPTitle'] == 'Title'
+	assert meta['Tag 0xC0DE (49374)'] == 7
+	assert meta['NoSuchTag'] is None
+
+	names = meta.keys()
+	assert 'Make' in names and 'GPSLongitude' in names and 'Tag 0xC0DE (49374)' in names
+	assert [name for (name, _) in meta.all()] == names
+	# Pointers to other IFDs are not printed
+	assert 'ExifIFDPointer' in names and 'ExifIFDPointer' not in str(meta)
+	assert 'Make\t' + samples.MAKE in str(meta)
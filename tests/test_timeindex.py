@@ -0,0 +1,80 @@
+'''
+	Tests of capture timestamps and of the time-range index.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import pytest
+
+import mediameta
+from mediameta import TimeIndex
+from mediameta import capture_timestamp
+from mediameta import EXIF_to_epoch
+from mediameta import ISO8601_to_epoch
+import samples
+
+NOON = 1654084800   # 2022-06-01 12:00:00 UTC
+DAY = 86400
+
+@pytest.mark.parametrize('date_time, offset, expected', [
+	('2022:06:01 12:00:00', None, NOON),
+	('2022:06:01 12:00:00', '+03:00', NOON - 3 * 3600),
+	('2022-06-01 12:00:00', '-0530', NOON + 5 * 3600 + 1800),
+	('2022:06:01 12:00:00', 'garbage', NOON),
+	('2022:13:01 12:00:00', None, None),
+	('    :  :     :  :  ', None, None),
+	(20220601, None, None)
+])
+def test_exif_dates(date_time, offset, expected):
+	assert EXIF_to_epoch(date_time, offset) == expected
+
+def test_iso8601_dates():
+	assert ISO8601_to_epoch('2022-06-01T12:00:00+0300') == NOON - 3 * 3600
+	assert ISO8601_to_epoch('2022-06-01T12:00:00.250+03:00') == NOON - 3 * 3600
+	assert ISO8601_to_epoch('2022-06-01T12:00:00Z', 3600) == NOON
+	assert ISO8601_to_epoch('2022-06-01 12:00:00', 3600) == NOON - 3600
+	assert ISO8601_to_epoch('June 1st') is None
+	assert ISO8601_to_epoch(None) is None
+
+def test_capture_timestamps(tmp_path):
+	image = tmp_path / 'image.jpg'
+	image.write_bytes(samples.jpeg(samples.tiff_block(exif=[(0x9011, *samples.ascii('+03:00'))])))
+	assert capture_timestamp(mediameta.open(image)) == NOON - 3 * 3600
+
+	# Without an offset the default one is assumed
+	image.write_bytes(samples.jpeg(samples.tiff_block()))
+	assert capture_timestamp(mediameta.open(image), default_offset=7200) == NOON - 7200
+
+	video = tmp_path / 'video.mov'
+	video.write_bytes(samples.mov())
+	assert capture_timestamp(mediameta.open(video)) == NOON - 3 * 3600
+
+	video.write_bytes(samples.mov({'com.apple.quicktime.make': samples.MAKE}))
+	meta = mediameta.open(video)
+	assert capture_timestamp(meta) is None
+	assert not TimeIndex().add_metadata(meta)
+
+def test_queries():
+	index = TimeIndex()
+	for (i, ts) in enumerate([NOON + DAY, NOON, NOON + 10, NOON + 3 * DAY, NOON - DAY // 2 - 1]):
+		index.add('f{0}'.format(i), ts)
+	assert (index.first(), index.last()) == (NOON - DAY // 2 - 1, NOON + 3 * DAY)
+	assert index.range(NOON, NOON + DAY) == [(NOON, 'f1'), (NOON + 10, 'f2')]
+	assert index.count(NOON, NOON + DAY + 1) == 3
+	assert index.count(NOON + DAY, NOON) == 0
+	midnight = NOON - DAY // 2
+	assert index.per_day() == [(midnight - DAY, 1), (midnight, 2), (midnight + DAY, 1), (midnight + 3 * DAY, 1)]
+	# Days of UTC+03:00 begin three hours earlier
+	assert index.per_day(utc_offset=3 * 3600)[0] == (midnight - 3 * 3600, 3)
+	assert index.per_day(NOON, NOON + 2 * DAY) == [(midnight, 2), (midnight + DAY, 1)]
+	assert TimeIndex().per_day() == [] and TimeIndex().first() is None
+
+def test_save_and_load(tmp_path):
+	index = TimeIndex()
+	for i in range(100):
+		index.add('file{0}.jpg'.format(i), NOON - i * 3600)
+	index.save(tmp_path / 'times.idx')
+	loaded = TimeIndex.load(tmp_path / 'times.idx')
+	assert loaded.range(0, 2**40) == index.range(0, 2**40)
+	with pytest.raises(ValueError):
+		TimeIndex.from_bytes(b'MMGI' + bytes(6))
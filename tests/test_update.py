@@ -0,0 +1,122 @@
+'''
+	Tests of ImageMetadata.update().
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import os
+
+import pytest
+
+import mediameta
+import samples
+
+LONG_MAKE = 'Dandelion Systems, a much longer name of the maker'
+
+def write(tmp_path, name:str, data:bytes):
+	file_name = tmp_path / name
+	file_name.write_bytes(data)
+	return file_name
+
+def sample_jpeg() -> bytes:
+	# Segments after the EXIF one move when it grows
+	return samples.jpeg(samples.tiff_block(), samples.xmp_segment() + samples.icc_segments(samples.icc_profile()))
+
+def test_in_place(tmp_path):
+	file_name = write(tmp_path, 'sample.jpg', sample_jpeg())
+	inode = os.stat(file_name).st_ino
+	size = os.path.getsize(file_name)
+
+	meta = mediameta.open(file_name)
+	patches = meta.update({'Orientation': 6, 'DateTimeOriginal': '2021:07:14 18:02:11', 'FNumber': '18/10'})
+	assert len(patches) > 0
+	assert meta['Orientation'] == 6
+
+	# Positioned writes into the same file, which keeps its size
+	assert os.stat(file_name).st_ino == inode
+	assert os.path.getsize(file_name) == size
+	reopened = mediameta.open(file_name)
+	assert reopened['Orientation'] == 6
+	assert reopened['DateTimeOriginal'] == '2021:07:14 18:02:11'
+	assert reopened._tags[0x829D] == ['18/10']
+	assert reopened['Make'] == samples.MAKE
+
+def test_shorter_value_fits_in_place(tmp_path):
+	file_name = write(tmp_path, 'sample.tif', samples.tiff_block())
+	size = os.path.getsize(file_name)
+	mediameta.open(file_name).update({'Make': 'Dand'})
+	assert mediameta.open(file_name)['Make'] == 'Dand'
+	assert os.path.getsize(file_name) == size
+
+def test_growing_tiff(tmp_path):
+	file_name = write(tmp_path, 'sample.tif', samples.tiff_block())
+	size = os.path.getsize(file_name)
+	meta = mediameta.open(file_name)
+	meta.update({'Make': LONG_MAKE})
+	assert meta['Make'] == LONG_MAKE
+
+	# The value is appended to the file, everything else stays where it was
+	assert os.path.getsize(file_name) > size
+	reopened = mediameta.open(file_name)
+	assert reopened['Make'] == LONG_MAKE
+	assert reopened['Model'] == samples.MODEL
+	assert reopened['GPSLatitude'] == meta['GPSLatitude']
+
+def test_growing_jpeg_app1(tmp_path):
+	data = sample_jpeg()
+	file_name = write(tmp_path, 'sample.jpg', data)
+	meta = mediameta.open(file_name)
+	meta.update({'Make': LONG_MAKE, 'Orientation': 3})
+
+	# The APP1 segment is rewritten longer, the rest of the file moves along
+	rewritten = file_name.read_bytes()
+	assert len(rewritten) > len(data)
+	assert rewritten.endswith(data[-1010:])
+	reopened = mediameta.open(file_name)
+	assert reopened['Make'] == LONG_MAKE
+	assert reopened['Orientation'] == 3
+	assert reopened.xmp() == {'xmp:Rating': '4'}
+	assert reopened.icc_profile().description() == 'Display P3'
+	# The object that was updated finds the segments that moved
+	assert meta.xmp() == {'xmp:Rating': '4'}
+	assert meta.icc_profile().description() == 'Display P3'
+
+def test_atomic(tmp_path):
+	file_name = write(tmp_path, 'sample.jpg', sample_jpeg())
+	inode = os.stat(file_name).st_ino
+	mediameta.open(file_name).update({'Orientation': 8}, atomic=True)
+
+	# A patched copy replaces the file, no temporary file is left behind
+	assert os.stat(file_name).st_ino != inode
+	assert os.listdir(tmp_path) == ['sample.jpg']
+	assert mediameta.open(file_name)['Orientation'] == 8
+
+def test_dry_run(tmp_path):
+	data = sample_jpeg()
+	file_name = write(tmp_path, 'sample.jpg', data)
+	meta = mediameta.open(file_name)
+	patches = meta.update({'Make': LONG_MAKE}, dry_run=True)
+	assert len(patches) > 0
+	assert file_name.read_bytes() == data
+	assert meta['Make'] == samples.MAKE
+
+def test_other_formats_only_in_place(tmp_path):
+	file_name = write(tmp_path, 'sample.heic', samples.heif(samples.tiff_block()))
+	meta = mediameta.open(file_name)
+	meta.update({'Orientation': 6})
+	assert mediameta.open(file_name)['Orientation'] == 6
+	with pytest.raises(ValueError):
+		meta.update({'Make': LONG_MAKE})
+
+def test_missing_tag(tmp_path):
+	file_name = write(tmp_path, 'sample.jpg', sample_jpeg())
+	with pytest.raises(KeyError):
+		mediameta.open(file_name).update({'Artist': 'Nobody'})
+
+def test_file_changed_since_parsed(tmp_path):
+	file_name = write(tmp_path, 'sample.tif', samples.tiff_block())
+	meta = mediameta.open(file_name)
+	# An entry ahead of that of Orientation moves it
+	file_name.write_bytes(samples.tiff_block(ifd0=[(0x010E, *samples.ascii('Description'))]))
+	with pytest.raises(ValueError):
+		meta.update({'Orientation': 6})
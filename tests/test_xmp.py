@@ -0,0 +1,87 @@
+'''
+	Tests of the streaming XMP reader and of XMP in JPEG files.
+
+	Copyright 2022 Dandelion Systems <dandelion.systems at gmail.com>
+	SPDX-License-Identifier: MIT
+'''
+import mediameta
+from mediameta import XMPReader
+from mediameta import parse_xmp
+import samples
+
+GUID = '0123456789ABCDEF0123456789ABCDEF'
+HAS_EXTENDED = 'xmpNote:HasExtendedXMP'
+
+PACKET = (b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+	b'<rdf:Description xmlns:xmp="http://ns.adobe.com/xap/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/"'
+	b' xmlns:cam="http://example.com/camera/" xmp:Rating="4">'
+	b'<dc:subject><rdf:Bag><rdf:li>one</rdf:li><rdf:li>two</rdf:li></rdf:Bag></dc:subject>'
+	b'<dc:title><rdf:Alt><rdf:li xml:lang="x-default">Title</rdf:li></rdf:Alt></dc:title>'
+	b'<xmp:CreatorTool>Sample</xmp:CreatorTool>'
+	b'<cam:Lens>50mm</cam:Lens>'
+	b'</rdf:Description></rdf:RDF></x:xmpmeta>')
+
+def extended_packets() -> tuple:
+	main = (b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+		b'<rdf:Description xmlns:xmp="http://ns.adobe.com/xap/1.0/" xmlns:xmpNote="http://ns.adobe.com/xmp/note/"'
+		b' xmp:Rating="5" xmpNote:HasExtendedXMP="' + GUID.encode('ascii') + b'"/></rdf:RDF></x:xmpmeta>')
+	extended = (b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+		b'<rdf:Description xmlns:GCamera="http://ns.google.com/photos/1.0/camera/" GCamera:MotionPhoto="1"'
+		b' xmlns:xmp="http://ns.adobe.com/xap/1.0/" xmp:Rating="1"/></rdf:RDF></x:xmpmeta>')
+	return (main, extended)
+
+def test_all_top_level_properties():
+	values = parse_xmp(PACKET)
+	assert values == {'xmp:Rating': '4', 'dc:subject': ['one', 'two'], 'dc:title': ['Title'],
+		'xmp:CreatorTool': 'Sample', 'cam:Lens': '50mm'}
+	assert parse_xmp(PACKET.decode('utf_8')) == values
+
+def test_selected_properties():
+	assert parse_xmp(PACKET, ['dc:subject', 'xmp:CreatorTool']) == {'dc:subject': ['one', 'two'], 'xmp:CreatorTool': 'Sample'}
+	# A prefix the reader does not know is resolved by the declaration in the packet
+	assert parse_xmp(PACKET, ['cam:Lens']) == {'cam:Lens': '50mm'}
+	assert parse_xmp(PACKET, ['exif:FNumber']) == {}
+	assert parse_xmp(PACKET, []) == {}
+
+def test_stops_at_the_last_property():
+	consumed = []
+	def chunks():
+		for i in range(0, len(PACKET), 16):
+			consumed.append(i)
+			yield PACKET[i:i+16]
+	assert parse_xmp(chunks(), ['xmp:Rating']) == {'xmp:Rating': '4'}
+	assert len(consumed) < len(PACKET) // 16
+
+	reader = XMPReader(['xmp:Rating'])
+	assert reader.feed(PACKET)
+	assert reader.feed(b'not even XML')
+	assert reader.close() == {'xmp:Rating': '4'}
+
+def test_malformed_packet_keeps_what_was_found():
+	broken = PACKET[:PACKET.index(b'<xmp:CreatorTool>')] + b'<<<' + PACKET
+	assert parse_xmp(broken) == {'xmp:Rating': '4', 'dc:subject': ['one', 'two'], 'dc:title': ['Title']}
+
+def test_jpeg(tmp_path):
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block(), samples.xmp_segment(PACKET)))
+	meta = mediameta.open(file_name)
+	assert meta.xmp(['xmp:Rating']) == {'xmp:Rating': '4'}
+	assert meta.xmp()['dc:subject'] == ['one', 'two']
+
+def test_extended_xmp(tmp_path):
+	(main, extended) = extended_packets()
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block(), samples.xmp_segment(main) +
+		samples.extended_xmp_segments(GUID, extended, 3)))
+	meta = mediameta.open(file_name)
+	# The main packet wins over the extension, the extension adds what the main packet lacks
+	assert meta.xmp(['xmp:Rating', 'GCamera:MotionPhoto']) == {'xmp:Rating': '5', 'GCamera:MotionPhoto': '1'}
+	assert meta.xmp(['xmp:Rating']) == {'xmp:Rating': '5'}
+	assert meta.xmp() == {'xmp:Rating': '5', HAS_EXTENDED: GUID, 'GCamera:MotionPhoto': '1'}
+
+def test_extended_xmp_of_another_packet(tmp_path):
+	(main, extended) = extended_packets()
+	file_name = tmp_path / 'sample.jpg'
+	file_name.write_bytes(samples.jpeg(samples.tiff_block(), samples.xmp_segment(main) +
+		samples.extended_xmp_segments('F' * 32, extended)))
+	assert mediameta.open(file_name).xmp(['GCamera:MotionPhoto']) == {}